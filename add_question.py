@@ -8,10 +8,13 @@ from aiogram.exceptions import TelegramBadRequest
 from aiogram.enums import ParseMode
 
 import config
-from bot import db, bot
+from bot import db
 import logging
+from html import escape
 from typing import Optional, Dict, Any, List, Union, Tuple
+from outbound import outbound_queue, Priority
 from .start_bot import main_menu_keyboard, welcome_message
+from .topic_picker import topic_picker
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +47,12 @@ MESSAGES = {
     "select_correct_option": "✅ لطفاً گزینه صحیح را انتخاب کنید:" + SPONSOR_FOOTER,
     "question_submitted": "📤 سوال شما برای بررسی ارسال شد. با تشکر!" + SPONSOR_FOOTER,
     "question_added": "✅ سوال با موفقیت اضافه شد." + SPONSOR_FOOTER,
+    "duplicate_question": "♻️ این سوال قبلاً در این موضوع ثبت شده است. لطفاً سوال دیگری ارسال کنید." + SPONSOR_FOOTER,
     "cancel_prompt": "🚫 عملیات لغو شد. آیا می‌خواهید به منوی اصلی بازگردید؟" + SPONSOR_FOOTER,
     "only_text": "⚠️ لطفاً فقط پیام متنی ارسال کنید." + SPONSOR_FOOTER,
     "error_general": "❌ خطایی رخ داده است. لطفاً بعداً دوباره امتحان کنید." + SPONSOR_FOOTER,
     "error_question_not_found": "❌ این سوال دیگر در دسترس نیست. ممکن است قبلاً پردازش شده باشد." + SPONSOR_FOOTER,
+    "error_already_moderated": "⚠️ این سوال قبلاً توسط مدیر دیگری بررسی شده است." + SPONSOR_FOOTER,
     "error_db_operation": "❌ در حال حاضر امکان پردازش این درخواست وجود ندارد. لطفاً بعداً دوباره امتحان کنید." + SPONSOR_FOOTER,
     "admin_new_question": """
 📩 سوال جدید توسط کاربر {user_name} (شناسه: {user_id}):
@@ -99,6 +104,10 @@ MESSAGES = {
 
 لطفاً سوال دیگری ارسال کنید.
 """ + SPONSOR_FOOTER,
+    "similar_questions_title": "\n⚠️ <b>سوالات مشابه در این موضوع:</b>\n",
+    "similar_question_row": "• {percent}٪ — {text} ({status})\n",
+    "similar_status_approved": "تأیید شده",
+    "similar_status_pending": "در انتظار تأیید",
     "admin_question_approved": "✅ سوال با موفقیت تأیید شد." + SPONSOR_FOOTER,
     "admin_question_rejected": "❌ سوال رد شد." + SPONSOR_FOOTER,
     "welcome_back": "👋 {full_name} عزیز، خوش آمدید!" + SPONSOR_FOOTER,
@@ -134,18 +143,7 @@ async def safe_edit_message(message: Message, text: str, reply_markup: Optional[
 def get_topics_keyboard() -> Optional[InlineKeyboardMarkup]:
 
     try:
-        topics = db.get_all_topics()
-        if not topics:
-            return None
-
-        kb = InlineKeyboardBuilder()
-        for topic in topics:
-            if topic.get("is_active", True):
-                kb.button(text=topic["name"], callback_data=f"add_question_topic_{topic['topic_id']}")
-
-        kb.button(text=MESSAGES["btn_cancel"], callback_data="add_question_cancel")
-        kb.adjust(2) 
-        return kb.as_markup()
+        return topic_picker.keyboard("add_question_topic_", "add_question_cancel", only_active=True)
     except Exception as e:
         logger.error(f"Error creating topics keyboard: {e}")
         return None
@@ -464,6 +462,15 @@ async def correct_option_selected(callback: CallbackQuery, state: FSMContext) ->
 
         await state.clear()
 
+        if response.get("duplicate_of"):
+            await safe_edit_message(
+                callback.message,
+                MESSAGES["duplicate_question"]
+            )
+            logger.info(f"User {callback.from_user.id} submitted a duplicate of question "
+                        f"{response['duplicate_of']['question_id']}")
+            return
+
         if response["status"] == "error":
             logger.error(f"Error creating question: {response['message']}")
             await safe_edit_message(
@@ -493,7 +500,8 @@ async def correct_option_selected(callback: CallbackQuery, state: FSMContext) ->
                 question_text=question_text,
                 options=options,
                 correct_option=correct_option + 1,  
-                question_id=question_id
+                question_id=question_id,
+                similar_questions=response.get("similar_questions")
             )
 
         try:
@@ -509,9 +517,22 @@ async def correct_option_selected(callback: CallbackQuery, state: FSMContext) ->
         await callback.answer()
 
 
+def format_similar_questions(similar_questions: List[Dict[str, Any]]) -> str:
+
+    text = MESSAGES["similar_questions_title"]
+    for question in similar_questions[:config.DEDUP_SHOWN_MATCHES]:
+        text += MESSAGES["similar_question_row"].format(
+            percent=round(question["similarity"] * 100),
+            text=escape(question["text"]),
+            status=MESSAGES["similar_status_approved"] if question["is_approved"] else MESSAGES["similar_status_pending"]
+        )
+    return text
+
+
 async def notify_admin_for_approval(user_id: str, user_name: str, topic_name: str, 
                                   question_text: str, options: List[str], 
-                                  correct_option: int, question_id: str) -> None:
+                                  correct_option: int, question_id: str,
+                                  similar_questions: Optional[List[Dict[str, Any]]] = None) -> None:
 
     try:
         admin_message = MESSAGES["admin_new_question"].format(
@@ -525,14 +546,17 @@ async def notify_admin_for_approval(user_id: str, user_name: str, topic_name: st
             option_4=options[3],
             correct_option=correct_option
         )
+        if similar_questions:
+            admin_message += format_similar_questions(similar_questions)
 
-        await bot.send_message(
+        outbound_queue.enqueue(
             chat_id=config.ADMIN_ID,
             text=admin_message,
             reply_markup=get_admin_approval_keyboard(question_id),
-            parse_mode=ParseMode.HTML
+            parse_mode=ParseMode.HTML,
+            priority=Priority.HIGH
         )
-        logger.info(f"Sent approval notification to admin for question ID {question_id}")
+        logger.info(f"Queued approval notification to admin for question ID {question_id}")
     except Exception as e:
         logger.error(f"Error sending question approval notification to admin: {e}")
 
@@ -547,17 +571,26 @@ async def process_question_decision(callback: CallbackQuery, is_approve: bool) -
     question_id = callback.data.split("_")[2]
     
     try:
-        question_data = db.get_question_by_id(question_id)
+        # Decide first: only the admin whose update wins notifies the submitter
+        if is_approve:
+            response = db.approve_question(question_id)
+        else:
+            response = db.reject_question(question_id, only_pending=True)
 
-        if question_data["status"] != "success":
-            logger.error(f"Question not found during {action} process: {question_id}")
+        if response["status"] == "error":
+            if "already_moderated" in response:
+                logger.info(f"Question {question_id} was not pending anymore during {action} process")
+                message_key = "error_already_moderated" if response["already_moderated"] else "error_question_not_found"
+            else:
+                logger.error(f"Database error during question {action}: {response['message']}")
+                message_key = "error_db_operation"
             await safe_edit_message(
                 callback.message,
-                f"{callback.message.text}\n\n{MESSAGES['error_question_not_found']}"
+                f"{callback.message.text}\n\n{MESSAGES[message_key]}"
             )
             return
 
-        question = question_data["question"]
+        question = response["question"]
         user_id = question["created_by"]
 
         topic_response = db.get_topic_by_id(question["topic_id"])
@@ -569,7 +602,7 @@ async def process_question_decision(callback: CallbackQuery, is_approve: bool) -
 
         try:
             message_key = "question_approved" if is_approve else "question_rejected"
-            await bot.send_message(
+            outbound_queue.enqueue(
                 chat_id=int(user_id),
                 text=MESSAGES[message_key].format(
                     topic_name=topic_name,
@@ -582,21 +615,10 @@ async def process_question_decision(callback: CallbackQuery, is_approve: bool) -
                 ),
                 parse_mode=ParseMode.HTML
             )
-            logger.info(f"Sent {action} notification to user {user_id}")
+            logger.info(f"Queued {action} notification to user {user_id}")
         except Exception as e:
             logger.error(f"Error notifying user about question {action}: {e}")
 
-        db_method = db.approve_question if is_approve else db.reject_question
-        response = db_method(question_id)
-
-        if response["status"] == "error":
-            logger.error(f"Database error during question {action}: {response['message']}")
-            await safe_edit_message(
-                callback.message,
-                f"{callback.message.text}\n\n{MESSAGES['error_db_operation']}"
-            )
-            return
-
         message_key = "admin_question_approved" if is_approve else "admin_question_rejected"
         symbol = "✅" if is_approve else "❌"
         await safe_edit_message(
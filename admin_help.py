@@ -11,15 +11,23 @@ admin_help_message = """
 📊 <b>دستورات مدیریتی:</b>
 
 🔍 /stats - مشاهده آمار سرور
+🐢 /dbprofile - مشاهده کندترین فراخوانی‌های پایگاه داده
+📤 /export_questions [csv|jsonl] - خروجی فشرده سوالات یک موضوع
+📤 /export_users [csv|jsonl] - خروجی فشرده آمار کاربران
 
 📝 /add_topic - اضافه کردن موضوع جدید
-🗑️ /delete_topic - حذف موضوع انتخابی
-✏️ /edit_topic - ویرایش موضوع موجود
+🗑️ /delete_topic [بخشی از نام] - حذف موضوع انتخابی
+✏️ /edit_topic [بخشی از نام] - ویرایش موضوع موجود
 
 ❓ /add_question - اضافه کردن سوال جدید
-🗑️ /delete_question - حذف سوال انتخابی
+📥 /import_questions - وارد کردن گروهی سوالات از فایل CSV یا JSON
+🗑️ /delete_question [بخشی از نام موضوع] - حذف سوال انتخابی
 🔄 /pending_questions - مشاهده سوالات در انتظار تایید
 
+📣 /broadcast - ارسال پیام همگانی به کاربران
+🛑 /broadcast_cancel - لغو ارسال همگانی در حال اجرا
+▶️ /broadcast_resume - ادامه ارسال همگانی نیمه‌کاره
+
 """
 
 
@@ -6,7 +6,7 @@ import logging
 from datetime import datetime
 from html import escape
 
-from bot import db
+from bot import db, database_profiler
 import config
 
 logger = logging.getLogger(__name__)
@@ -58,9 +58,18 @@ MESSAGES = {
     "questions_per_topic_title": "📚 <b>سوالات به تفکیک موضوع:</b>",
     "question_per_topic_row": "• {name}: <b>{count}</b> سوال",
     
-    "unknown_user": "کاربر با شناسه {user_id}"
+    "unknown_user": "کاربر با شناسه {user_id}",
+    
+    "db_profile_title": "🐢 <b>پرهزینه‌ترین فراخوانی‌های پایگاه داده</b> (مرتب‌سازی: {key})\n",
+    "db_profile_row": "• <code>{method}</code>: {calls} بار، مجموع <b>{total_time:.2f}</b> ث، p50 {p50:.1f} / p99 {p99:.1f} میلی‌ثانیه، {documents} سند",
+    "db_profile_empty": "📭 هنوز فراخوانی‌ای ثبت نشده است." + SPONSOR_FOOTER,
+    "db_profile_disabled": "⚠️ پروفایل پایگاه داده غیرفعال است (DB_PROFILING)." + SPONSOR_FOOTER,
+    "db_profile_reset": "🔄 آمار پروفایل پایگاه داده پاک شد." + SPONSOR_FOOTER,
+    "db_profile_usage": "ℹ️ استفاده: /dbprofile [total_time|calls|p99|documents|reset]" + SPONSOR_FOOTER
 }
 
+DB_PROFILE_SORT_KEYS = ("total_time", "calls", "p99", "documents")
+
 
 async def format_statistics(stats):
 
@@ -210,11 +219,49 @@ async def show_admin_statistics(message: Message) -> None:
             text=stats_text,
             parse_mode=ParseMode.HTML
         )
-        logger.info(f"Statistics displayed for admin {user_id}")
+        logger.info("Statistics displayed for admin %s", user_id, extra={"user_id": user_id})
         
     except Exception as e:
         await message.answer(
             text=MESSAGES["processing_error"],
             parse_mode=ParseMode.HTML
         )
-        logger.error(f"Error processing statistics: {e}") 
\ No newline at end of file
+        logger.error(f"Error processing statistics: {e}") 
+
+
+@admin_stats_router.message(Command("dbprofile"), F.from_user.id == config.ADMIN_ID)
+async def show_db_profile(message: Message) -> None:
+
+    if database_profiler is None:
+        await message.answer(MESSAGES["db_profile_disabled"], parse_mode=ParseMode.HTML)
+        return
+    
+    args = message.text.split()[1:]
+    key = args[0] if args else "total_time"
+    
+    if key == "reset":
+        database_profiler.reset()
+        await message.answer(MESSAGES["db_profile_reset"], parse_mode=ParseMode.HTML)
+        return
+    
+    if key not in DB_PROFILE_SORT_KEYS:
+        await message.answer(MESSAGES["db_profile_usage"], parse_mode=ParseMode.HTML)
+        return
+    
+    rows = database_profiler.top(limit=config.DB_PROFILE_TOP_COUNT, key=key)
+    if not rows:
+        await message.answer(MESSAGES["db_profile_empty"], parse_mode=ParseMode.HTML)
+        return
+    
+    lines = [MESSAGES["db_profile_title"].format(key=key)]
+    for row in rows:
+        lines.append(MESSAGES["db_profile_row"].format(
+            method=row["method"],
+            calls=row["calls"],
+            total_time=row["total_time"],
+            p50=row["p50"] * 1000,
+            p99=row["p99"] * 1000,
+            documents=row["documents"]
+        ))
+    
+    await message.answer("\n".join(lines), parse_mode=ParseMode.HTML)
@@ -0,0 +1,143 @@
+"""
+Local stand-in for the Telegram Bot API, for load tests.
+
+Serves /bot<token>/<method> like api.telegram.org, records every call and
+enforces Telegram's flood limits: about 30 messages per second overall and
+one message per second per chat (or per inline message for edits). Requests
+over the limit get the same 429 answer Telegram sends, with retry_after.
+"""
+import itertools
+import json
+import math
+import time
+from collections import Counter
+from typing import Dict, Any, Optional, Tuple, Union
+
+from aiohttp import web
+
+from outbound import TokenBucket
+
+# Methods that count against the flood limits
+LIMITED_METHODS = {"sendmessage", "editmessagetext", "editmessagereplymarkup", "sendphoto", "senddocument"}
+
+
+class FakeTelegramServer:
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 1, chat_burst: float = 3):
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.calls: Counter = Counter()
+        self.flood_errors: Counter = Counter()
+        self._chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._blocked_until: Dict[Union[int, str], float] = {}
+        self._message_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.flood_errors.clear()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = await self._read_params(request)
+        self.calls[method] += 1
+
+        if method in LIMITED_METHODS:
+            retry_after = self._check_flood(params)
+            if retry_after:
+                self.flood_errors[method] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                })
+
+        return web.json_response({"ok": True, "result": self._result(method, params)})
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> Dict[str, Any]:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = dict(await request.post())
+        for key, value in params.items():
+            if isinstance(value, str) and value[:1] in "{[":
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    pass
+        return params
+
+    def _check_flood(self, params: Dict[str, Any]) -> int:
+        """
+        Returns:
+            int: 0 if the request is allowed, otherwise the retry_after to answer with
+        """
+        target = params.get("inline_message_id") or params.get("chat_id")
+        now = time.monotonic()
+
+        blocked_until = self._blocked_until.get(target, 0)
+        if blocked_until > now:
+            return math.ceil(blocked_until - now)
+
+        bucket = self._chat_buckets.get(target)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, capacity=self.chat_burst)
+            self._chat_buckets[target] = bucket
+
+        # Both limits are checked before either token is taken, so a request
+        # refused by one of them doesn't use up the other
+        global_wait = self.global_bucket.delay()
+        if global_wait:
+            # The bot as a whole is over the limit, not this chat
+            return max(1, math.ceil(global_wait))
+
+        chat_wait = bucket.delay()
+        if chat_wait:
+            # Like Telegram, make the offender wait a little longer than strictly necessary
+            retry_after = max(1, math.ceil(chat_wait * 2))
+            self._blocked_until[target] = now + retry_after
+            return retry_after
+
+        bucket.reserve()
+        self.global_bucket.reserve()
+        return 0
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method in ("sendmessage", "editmessagetext") and not params.get("inline_message_id"):
+            chat_id = params.get("chat_id", 0)
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "group" if str(chat_id).startswith("-") else "private"},
+                "text": params.get("text", ""),
+            }
+        if method == "getchatmember":
+            return {
+                "status": "member",
+                "user": {"id": int(params.get("user_id", 0)), "is_bot": False, "first_name": "Load"},
+            }
+        if method == "getme":
+            return {"id": 1, "is_bot": True, "first_name": "Load test bot", "username": "load_test_bot"}
+        return True
+
+    def snapshot(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        return dict(self.calls), dict(self.flood_errors)
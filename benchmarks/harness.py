@@ -0,0 +1,267 @@
+"""
+Benchmark harness: runs the real routers against in-memory MongoDB (mongomock)
+and Redis (fakeredis) stand-ins, with a fake Telegram session.
+
+Import this module before anything from the bot: it swaps the MongoDB
+client and the Redis connection for the in-memory ones, then imports bot.py
+so that the module-level `db`, `bot` and `dp` objects are built on top of them.
+"""
+import asyncio
+import importlib
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, AsyncGenerator
+
+import fakeredis
+import mongomock
+import pymongo
+import redis
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+pymongo.MongoClient = mongomock.MongoClient
+_fake_redis_server = fakeredis.FakeServer()
+redis.Redis = lambda *args, **kwargs: fakeredis.FakeRedis(
+    server=_fake_redis_server, decode_responses=kwargs.get("decode_responses", False)
+)
+
+from aiogram import Bot  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import TelegramMethod, SendMessage, EditMessageText, GetChatMember  # noqa: E402
+from aiogram.types import Message, Chat, User, ChatMemberMember  # noqa: E402
+
+import bot as bot_module  # noqa: E402
+
+PLUGINS = ("join_quiz", "leaderboard", "admin_stats", "add_question")
+
+
+class FakeSession(BaseSession):
+    """
+    Telegram session that answers every request locally, after an optional simulated round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests: Dict[str, int] = {}
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        name = type(method).__name__
+        self.requests[name] = self.requests.get(name, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if isinstance(method, (SendMessage, EditMessageText)):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=int(chat_id), type="private"),
+                text=method.text
+            )
+        if isinstance(method, GetChatMember):
+            return ChatMemberMember(user=User(id=method.user_id, is_bot=False, first_name="Bench"))
+        return True
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def setup(latency: float = 0.0, session: Optional[BaseSession] = None) -> BaseSession:
+    """
+    Route the bot through a FakeSession (or the given session) and include the benchmarked routers.
+    """
+    from metrics import setup_handler_metrics
+
+    session = session or FakeSession(latency)
+    bot_module.bot.session = session
+    for name in PLUGINS:
+        module = importlib.import_module(f"plugins.{name}")
+        bot_module.dp.include_router(getattr(module, f"{name}_router"))
+    setup_handler_metrics(bot_module.dp)
+    return session
+
+
+def seed(users: int, topics: int, questions_per_topic: int, pending_questions: int,
+         rng: random.Random) -> Dict[str, Any]:
+    """
+    Fill the in-memory database with synthetic users, topics and questions.
+
+    Returns:
+        Dict[str, Any]: IDs the scenarios pick from
+    """
+    db = bot_module.db
+    now = datetime.now()
+
+    user_ids = [100000 + index for index in range(users)]
+    db.users.insert_many([
+        {
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "full_name": f"Bench User {user_id}",
+            "has_start": True,
+            "stats": {
+                "total_quiz": rng.randint(0, 200),
+                "total_correct": rng.randint(0, 2000),
+                "total_wrong": rng.randint(0, 2000),
+                "total_points": rng.randint(0, 50000),
+                "quiz_created": rng.randint(0, 20),
+            },
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id in user_ids
+    ])
+
+    topic_ids = [f"t{index:07d}" for index in range(topics)]
+    db.topics.insert_many([
+        {
+            "topic_id": topic_id,
+            "name": f"Topic {index}",
+            "description": "Synthetic benchmark topic with enough text",
+            "created_at": now,
+            "updated_at": now,
+            "is_active": True,
+            "question_count": questions_per_topic,
+            "stats": {"topic_played": rng.randint(0, 1000)},
+        }
+        for index, topic_id in enumerate(topic_ids)
+    ])
+
+    def question(question_id: str, topic_id: str, is_approved: bool) -> Dict[str, Any]:
+        return {
+            "question_id": question_id,
+            "topic_id": topic_id,
+            "text": f"Synthetic question {question_id}?",
+            "options": ["first", "second", "third", "fourth"],
+            "correct_option": rng.randrange(4),
+            "created_by": str(rng.choice(user_ids)),
+            "is_approved": is_approved,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    counter = itertools.count()
+    approved = [
+        question(f"q{next(counter):07d}", topic_id, True)
+        for topic_id in topic_ids for _ in range(questions_per_topic)
+    ]
+    if approved:
+        db.questions.insert_many(approved)
+
+    pending_ids = [f"p{index:07d}" for index in range(pending_questions)]
+    if pending_ids:
+        db.questions.insert_many([question(question_id, rng.choice(topic_ids), False) for question_id in pending_ids])
+
+    return {"user_ids": user_ids, "topic_ids": topic_ids, "pending_ids": pending_ids}
+
+
+_update_ids = itertools.count(1)
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+
+
+def message_update(user_id: int, text: str) -> Dict[str, Any]:
+    update_id = next(_update_ids)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": text,
+        },
+    }
+
+
+def callback_update(user_id: int, data: str, message_text: str = "",
+                    inline_message_id: Optional[str] = None) -> Dict[str, Any]:
+    update_id = next(_update_ids)
+    callback = {
+        "id": str(update_id),
+        "from": _user(user_id),
+        "chat_instance": "benchmark",
+        "data": data,
+    }
+    if inline_message_id:
+        callback["inline_message_id"] = inline_message_id
+    else:
+        callback["message"] = {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "text": message_text,
+        }
+    return {"update_id": update_id, "callback_query": callback}
+
+
+def clear_rate_limits() -> None:
+    from utils import redis_client
+
+    for key in redis_client.scan_iter(match="user:*:func:*"):
+        redis_client.delete(key)
+
+
+def summarize(latencies: List[float], wall_time: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "iterations": len(ordered),
+        "throughput_per_s": round(len(ordered) / wall_time, 2) if wall_time else None,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.50), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_scenario(make_update: Callable[[int], Dict[str, Any]], iterations: int,
+                       concurrency: int = 1, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Feed `iterations` updates to the dispatcher and measure the latency of each.
+
+    Args:
+        make_update: Builds the raw update of iteration i
+        iterations: Number of measured updates
+        concurrency: Number of updates in flight at once
+        warmup: Unmeasured updates sent first
+    """
+    dp, bot = bot_module.dp, bot_module.bot
+
+    for index in range(warmup):
+        await dp.feed_raw_update(bot, make_update(index))
+    clear_rate_limits()
+
+    latencies: List[float] = []
+
+    async def feed(index: int) -> None:
+        update = make_update(warmup + index)
+        started = time.perf_counter()
+        await dp.feed_raw_update(bot, update)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for batch_start in range(0, iterations, concurrency):
+        batch = range(batch_start, min(batch_start + concurrency, iterations))
+        await asyncio.gather(*(feed(index) for index in batch))
+    wall_time = time.perf_counter() - started
+
+    return summarize(latencies, wall_time)
@@ -0,0 +1,212 @@
+"""
+Replay bursts of realistic traffic against a local fake Telegram Bot API.
+
+    pip install -r requirements.txt -r benchmarks/requirements-bench.txt
+    python benchmarks/load_test.py --joins 500 --duration 10 --output load.json
+
+Scenarios:
+    lobby_stampede      --joins users join one lobby within --duration seconds
+    leaderboard_rush    --joins users open the global leaderboard within --duration seconds
+    moderation_backlog  the admin approves/rejects --backlog pending questions as fast as possible
+
+For each scenario the report lists the Bot API calls by method, the 429
+answers the fake API gave, handler latency and event-loop lag. Traffic the
+scenario caused after its last update (debounced lobby edits, queued
+notifications) is included: the scenario only ends once the outbound queue
+has drained or --drain-timeout expired.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Dict, List, Any, Callable
+
+import harness
+from fake_telegram import FakeTelegramServer
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+import config
+from callbacks import QuizAction, encode_quiz_callback
+from outbound import outbound_queue
+from render import lobby_renderer
+from session_store import issue_quiz_token
+
+LAG_SAMPLE_INTERVAL = 0.01
+
+
+class LoopLagSampler:
+    """
+    Measures how late a periodic wake-up fires; the delay is time the loop spent busy elsewhere.
+    """
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task = None
+
+    def start(self) -> None:
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        ordered = sorted(self.samples) or [0.0]
+        return {
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+
+async def replay(updates: List[Dict[str, Any]], duration: float) -> List[float]:
+    """
+    Feed the updates spread evenly over `duration` seconds, without waiting for earlier ones to finish.
+    """
+    dp, bot = harness.bot_module.dp, harness.bot_module.bot
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    latencies: List[float] = []
+
+    async def feed(update: Dict[str, Any], at: float) -> None:
+        await asyncio.sleep(max(0.0, at - loop.time()))
+        begin = time.perf_counter()
+        await dp.feed_raw_update(bot, update)
+        latencies.append(time.perf_counter() - begin)
+
+    step = duration / max(len(updates), 1)
+    await asyncio.gather(*(feed(update, started + index * step) for index, update in enumerate(updates)))
+    return latencies
+
+
+async def drain(timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    # Let debounced lobby edits fire first
+    await asyncio.sleep(config.LOBBY_RENDER_DEBOUNCE + 0.1)
+    while time.monotonic() < deadline:
+        if outbound_queue.is_idle:
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+
+def lobby_stampede(ids: Dict[str, Any], args: argparse.Namespace, rng: random.Random) -> List[Dict[str, Any]]:
+    creator_id = ids["user_ids"][0]
+    token = issue_quiz_token("stampede", rng.choice(ids["topic_ids"]), creator_id)
+    data = encode_quiz_callback(QuizAction.JOIN, token)
+    joiners = [creator_id] + rng.sample(ids["user_ids"][1:], min(args.joins, len(ids["user_ids"]) - 1))
+    return [harness.callback_update(user_id, data, inline_message_id="inline-stampede") for user_id in joiners]
+
+
+def leaderboard_rush(ids: Dict[str, Any], args: argparse.Namespace, rng: random.Random) -> List[Dict[str, Any]]:
+    users = rng.sample(ids["user_ids"], min(args.joins, len(ids["user_ids"])))
+    return [harness.message_update(user_id, config.MAIN_MENU_GLOBAL_LEADERBOARD_BUTTON) for user_id in users]
+
+
+def moderation_backlog(ids: Dict[str, Any], args: argparse.Namespace, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        harness.callback_update(
+            config.ADMIN_ID,
+            f"{'approve' if index % 3 else 'reject'}_question_{question_id}",
+            message_text="Question"
+        )
+        for index, question_id in enumerate(ids["pending_ids"][:args.backlog])
+    ]
+
+
+SCENARIOS: Dict[str, Callable[..., List[Dict[str, Any]]]] = {
+    "lobby_stampede": lobby_stampede,
+    "leaderboard_rush": leaderboard_rush,
+    "moderation_backlog": moderation_backlog,
+}
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    server = FakeTelegramServer()
+    url = await server.start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(url))
+    harness.setup(session=session)
+    ids = harness.seed(
+        users=args.users,
+        topics=args.topics,
+        questions_per_topic=args.questions_per_topic,
+        pending_questions=args.backlog,
+        rng=rng
+    )
+    outbound_queue.start(harness.bot_module.bot)
+    sampler = LoopLagSampler()
+    results: Dict[str, Any] = {"meta": vars(args).copy(), "scenarios": {}}
+
+    try:
+        for name in args.scenarios:
+            updates = SCENARIOS[name](ids, args, rng)
+            duration = 0.0 if name == "moderation_backlog" else args.duration
+            harness.clear_rate_limits()
+            server.reset()
+
+            sampler.start()
+            started = time.perf_counter()
+            latencies = await replay(updates, duration)
+            drained = await drain(args.drain_timeout)
+            elapsed = time.perf_counter() - started
+            lag = await sampler.stop()
+
+            calls, flood_errors = server.snapshot()
+            results["scenarios"][name] = {
+                "updates": len(updates),
+                "elapsed_s": round(elapsed, 3),
+                "drained": drained,
+                "api_calls": calls,
+                "flood_errors": flood_errors,
+                "handler_latency": harness.summarize(latencies, elapsed),
+                "loop_lag": lag,
+            }
+            print(f"{name}: {results['scenarios'][name]}", file=sys.stderr)
+            lobby_renderer.forget("stampede")
+    finally:
+        await outbound_queue.stop()
+        await session.close()
+        await server.stop()
+
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay bursts of quiz traffic against a fake Telegram API")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--questions-per-topic", type=int, default=50)
+    parser.add_argument("--joins", type=int, default=500, help="Users taking part in the burst scenarios")
+    parser.add_argument("--duration", type=float, default=10.0, help="Length of a burst in seconds")
+    parser.add_argument("--backlog", type=int, default=200, help="Pending questions moderated in one go")
+    parser.add_argument("--drain-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = json.dumps(asyncio.run(main(args)), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
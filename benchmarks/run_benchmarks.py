@@ -0,0 +1,178 @@
+"""
+Run the handler benchmarks and print the results as JSON.
+
+    pip install -r requirements.txt -r benchmarks/requirements-bench.txt
+    python benchmarks/run_benchmarks.py --users 20000 --topics 200 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json
+
+With --baseline, every scenario also reports the relative change of its
+p50/p99 latency and throughput against the given earlier run.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+from typing import Dict, Any, Optional
+
+import harness
+
+import config
+from callbacks import QuizAction, encode_quiz_callback
+from outbound import outbound_queue
+from render import lobby_renderer
+from session_store import issue_quiz_token
+from utils import active_quizzes
+
+# Joins are spread over this many lobbies
+JOIN_LOBBIES = 20
+
+
+def scenario_join_quiz(ids: Dict[str, Any], rng: random.Random):
+    creator_ids = rng.sample(ids["user_ids"], min(JOIN_LOBBIES, len(ids["user_ids"])))
+    lobbies = []
+    for index, creator_id in enumerate(creator_ids):
+        quiz_id = f"bench{index:04d}"
+        token = issue_quiz_token(quiz_id, rng.choice(ids["topic_ids"]), creator_id)
+        lobbies.append((quiz_id, encode_quiz_callback(QuizAction.JOIN, token)))
+
+    user_ids = ids["user_ids"]
+
+    def make_update(index: int) -> Dict[str, Any]:
+        quiz_id, data = lobbies[index % len(lobbies)]
+        return harness.callback_update(user_ids[index % len(user_ids)], data, inline_message_id=f"inline-{quiz_id}")
+
+    return make_update
+
+
+def scenario_global_leaderboard(ids: Dict[str, Any], rng: random.Random):
+    user_ids = ids["user_ids"]
+    return lambda index: harness.message_update(user_ids[index % len(user_ids)], config.MAIN_MENU_GLOBAL_LEADERBOARD_BUTTON)
+
+
+def scenario_personal_stats(ids: Dict[str, Any], rng: random.Random):
+    user_ids = ids["user_ids"]
+    return lambda index: harness.message_update(user_ids[index % len(user_ids)], config.MAIN_MENU_LEADERBOARD_BUTTON)
+
+
+def scenario_admin_statistics(ids: Dict[str, Any], rng: random.Random):
+    return lambda index: harness.message_update(config.ADMIN_ID, "/stats")
+
+
+def scenario_question_decision(ids: Dict[str, Any], rng: random.Random):
+    pending_ids = ids["pending_ids"]
+
+    def make_update(index: int) -> Dict[str, Any]:
+        action = "approve" if index % 2 == 0 else "reject"
+        question_id = pending_ids[index % len(pending_ids)]
+        return harness.callback_update(config.ADMIN_ID, f"{action}_question_{question_id}", message_text="Question")
+
+    return make_update
+
+
+SCENARIOS = {
+    "join_quiz": scenario_join_quiz,
+    "show_global_leaderboard": scenario_global_leaderboard,
+    "show_personal_stats": scenario_personal_stats,
+    "show_admin_statistics": scenario_admin_statistics,
+    "process_question_decision": scenario_question_decision,
+}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=harness.ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        result["change"] = {
+            key: round(result[key] / previous[key] - 1, 4)
+            for key in ("p50_ms", "p99_ms", "throughput_per_s")
+            if result.get(key) and previous.get(key)
+        }
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    session = harness.setup(latency=args.telegram_latency / 1000)
+    ids = harness.seed(
+        users=args.users,
+        topics=args.topics,
+        questions_per_topic=args.questions_per_topic,
+        pending_questions=args.iterations + args.warmup,
+        rng=rng
+    )
+    outbound_queue.start(harness.bot_module.bot)
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "users": args.users,
+            "topics": args.topics,
+            "questions_per_topic": args.questions_per_topic,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "telegram_latency_ms": args.telegram_latency,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    try:
+        for name in args.scenarios:
+            make_update = SCENARIOS[name](ids, rng)
+            results["scenarios"][name] = await harness.run_scenario(
+                make_update, args.iterations, concurrency=args.concurrency, warmup=args.warmup
+            )
+            print(f"{name}: {results['scenarios'][name]}", file=sys.stderr)
+    finally:
+        for quiz_id in list(active_quizzes):
+            lobby_renderer.forget(quiz_id)
+        await outbound_queue.stop()
+
+    results["meta"]["telegram_requests"] = session.requests
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the bot's hot handlers")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--topics", type=int, default=100)
+    parser.add_argument("--questions-per-topic", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--telegram-latency", type=float, default=0.0,
+                        help="Simulated Telegram round trip per request, in milliseconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+    payload = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
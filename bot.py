@@ -4,16 +4,22 @@ import config
 import asyncio
 import logging
 from db import Database
+from db_profiler import profile_database
+from outbound import outbound_queue
+from metrics import setup_handler_metrics, metrics_exporter
+from loop_monitor import loop_monitor
+from log_pipeline import setup_logging, stop_logging
 from typing import Union, Callable, Any
 import time
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
 dp = Dispatcher()
 bot = Bot(token=config.BOT_TOKEN)
 db = Database()
+database_profiler = profile_database(db)
 
 
 
@@ -21,6 +27,11 @@ db = Database()
 async def main():
     logger.info("Bot initialization started...")
     bot.delete_webhook(drop_pending_updates=True)
+
+    # Plugins and caches use the instance of the imported bot module, not this script's
+    from bot import db as shared_db
+    # Change listeners touch loop-owned caches; writes from worker threads are handed over to the loop
+    shared_db.bind_event_loop(asyncio.get_running_loop())
     
     
     logger.info("Loading routers...")
@@ -35,11 +46,14 @@ async def main():
     from plugins.edit_topic import edit_topic_router
     
     logger.info("Loading delete_topic_router...")
-    from plugins.delete_topic import delete_topic_router
+    from plugins.delete_topic import delete_topic_router, resume_topic_deletions
     
     logger.info("Loading add_question_router...")
     from plugins.add_question import add_question_router
     
+    logger.info("Loading import_questions_router...")
+    from plugins.import_questions import import_questions_router
+    
     logger.info("Loading delete_question_router...")
     from plugins.delete_question import delete_question_router
     
@@ -69,6 +83,15 @@ async def main():
 
     logger.info("Loading admin_help_router...")
     from plugins.admin_help import admin_help_router
+
+    logger.info("Loading export_data_router...")
+    from plugins.export_data import export_data_router
+
+    logger.info("Loading topic_picker_router...")
+    from plugins.topic_picker import topic_picker_router
+
+    logger.info("Loading broadcast_router...")
+    from plugins.broadcast import broadcast_router, resume_broadcast
     
     # Include routers
     logger.info("Including routers in dispatcher...")
@@ -77,6 +100,7 @@ async def main():
     dp.include_router(edit_topic_router)
     dp.include_router(delete_topic_router)
     dp.include_router(add_question_router)
+    dp.include_router(import_questions_router)
     dp.include_router(delete_question_router)
     dp.include_router(pending_questions_router)
     dp.include_router(leaderboard_router)
@@ -85,10 +109,50 @@ async def main():
     dp.include_router(join_quiz_router)
     dp.include_router(start_quiz_router)
     dp.include_router(admin_stats_router)
+    dp.include_router(export_data_router)
     dp.include_router(help_router)
     dp.include_router(admin_help_router)
+    dp.include_router(topic_picker_router)
+    dp.include_router(broadcast_router)
+    setup_handler_metrics(dp)
+    logger.info("Initializing question pools...")
+    import question_pool  # noqa: F401  (registers its database change listener)
+
+    # Startup jobs, referenced so they aren't garbage collected while running
+    background_tasks = set()
+
+    # Questions from before duplicate detection get their fingerprints in the background
+    background_tasks.add(asyncio.create_task(asyncio.to_thread(shared_db.backfill_question_fingerprints)))
+
+    logger.info("Building search index...")
+    from search import search_index
+    background_tasks.add(asyncio.create_task(search_index.start()))
+
+    # Repairs question counters left behind by a lost $inc; it must finish before
+    # polling starts, or a concurrent approval would be counted twice
+    logger.info("Reconciling topic question counts...")
+    await asyncio.to_thread(shared_db.reconcile_topic_question_counts)
+
+    logger.info("Starting outbound message queue...")
+    outbound_queue.start(bot)
+    resume_broadcast()
+    resume_topic_deletions()
+    await metrics_exporter.start()
+    if config.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
     logger.info("All routers loaded successfully. Starting polling...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for task in background_tasks:
+            task.cancel()
+        # Awaited so no task is destroyed while still pending
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await outbound_queue.stop()
+        await metrics_exporter.stop()
+        await loop_monitor.stop()
+        stop_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,332 @@
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ParseMode
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Optional, Dict, Any
+
+from bson.objectid import ObjectId
+
+import config
+from bot import db, bot
+from outbound import outbound_queue, Priority, DeliveryStatus
+from utils import redis_client
+
+logger = logging.getLogger(__name__)
+
+broadcast_router = Router(name="broadcast")
+
+BROADCAST_KEY = "broadcast:current"
+
+
+class BroadcastStates(StatesGroup):
+    waiting_for_text = State()
+    waiting_for_confirmation = State()
+
+
+SPONSOR_FOOTER = f" "
+
+MESSAGES = {
+    "enter_text": "📣 لطفاً متن پیام همگانی را ارسال کنید:" + SPONSOR_FOOTER,
+    "only_text": "⚠️ لطفاً فقط پیام متنی ارسال کنید." + SPONSOR_FOOTER,
+    "confirm": "⚠️ این پیام برای <b>{count}</b> کاربر ارسال می‌شود. آیا مطمئن هستید؟\n\n{text}",
+    "already_running": "⚠️ یک ارسال همگانی در حال اجراست. ابتدا آن را لغو کنید یا منتظر بمانید." + SPONSOR_FOOTER,
+    "nothing_to_resume": "📭 هیچ ارسال همگانی نیمه‌کاره‌ای وجود ندارد." + SPONSOR_FOOTER,
+    "cancelled": "🛑 ارسال همگانی لغو شد." + SPONSOR_FOOTER,
+    "progress": """
+📣 <b>ارسال همگانی {status}</b>
+
+✅ ارسال شده: <b>{sent}</b>
+🚫 مسدود کرده: <b>{blocked}</b>
+❌ ناموفق: <b>{failed}</b>
+📊 پیشرفت: <b>{processed}/{total}</b>
+⚡ سرعت: <b>{rate:.1f}</b> پیام در ثانیه
+""" + SPONSOR_FOOTER,
+    "status_running": "در حال اجرا...",
+    "status_done": "به پایان رسید",
+    "status_cancelled": "لغو شد",
+    "status_failed": "متوقف شد (خطا)",
+
+    "btn_confirm": "✅ ارسال",
+    "btn_cancel": "❌ لغو",
+}
+
+_current_task: Optional[asyncio.Task] = None
+
+
+def get_confirmation_keyboard() -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=MESSAGES["btn_confirm"], callback_data="broadcast_confirm")
+    kb.button(text=MESSAGES["btn_cancel"], callback_data="broadcast_cancel")
+    kb.adjust(2)
+    return kb.as_markup()
+
+
+def is_broadcast_running() -> bool:
+    return _current_task is not None and not _current_task.done()
+
+
+def load_checkpoint() -> Dict[str, Any]:
+    """
+    Read the persisted state of the current broadcast from Redis.
+    """
+    job = redis_client.hgetall(BROADCAST_KEY)
+    for counter in ("sent", "blocked", "failed", "total", "progress_message_id", "admin_chat_id"):
+        if counter in job:
+            job[counter] = int(job[counter])
+    return job
+
+
+async def report_progress(job: Dict[str, Any], status: str, rate: float) -> None:
+
+    text = MESSAGES["progress"].format(
+        status=MESSAGES[status],
+        sent=job["sent"],
+        blocked=job["blocked"],
+        failed=job["failed"],
+        processed=job["sent"] + job["blocked"] + job["failed"],
+        total=job["total"],
+        rate=rate
+    )
+
+    try:
+        await bot.edit_message_text(
+            chat_id=job["admin_chat_id"],
+            message_id=job["progress_message_id"],
+            text=text,
+            parse_mode=ParseMode.HTML
+        )
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e).lower():
+            logger.warning(f"Could not update broadcast progress: {e}")
+    except Exception as e:
+        logger.warning(f"Could not update broadcast progress: {e}")
+
+
+async def run_broadcast() -> None:
+    """
+    Deliver the current broadcast, resuming from its last checkpoint.
+
+    Recipients are streamed from a projected cursor in _id order, a window at
+    a time. Each window is handed to the outbound queue (which persists it)
+    before the checkpoint moves past it, so an interruption neither skips nor
+    repeats recipients. Users who blocked the bot are marked as not started.
+    """
+    job = load_checkpoint()
+    if not job:
+        return
+
+    after_id = ObjectId(job["last_id"]) if job.get("last_id") else None
+    users = db.iter_user_ids(has_start=True, after_id=after_id, batch_size=config.BROADCAST_CURSOR_BATCH_SIZE)
+
+    started_at = time.monotonic()
+    delivered_this_run = 0
+    last_report = 0.0
+    status = "status_done"
+
+    try:
+        while redis_client.hget(BROADCAST_KEY, "status") == "running":
+            window = await asyncio.to_thread(list, itertools.islice(users, config.BROADCAST_WINDOW_SIZE))
+            if not window:
+                break
+
+            sends = [
+                asyncio.create_task(outbound_queue.send(
+                    chat_id=user_id,
+                    text=job["text"],
+                    parse_mode=ParseMode.HTML,
+                    priority=Priority.LOW
+                ))
+                for _, user_id in window
+            ]
+            await asyncio.sleep(0)
+            redis_client.hset(BROADCAST_KEY, "last_id", str(window[-1][0]))
+
+            results = await asyncio.gather(*sends)
+            for (_, user_id), result in zip(window, results):
+                if result == DeliveryStatus.SENT:
+                    job["sent"] += 1
+                elif result == DeliveryStatus.BLOCKED:
+                    job["blocked"] += 1
+                    db.mark_user_blocked(user_id)
+                else:
+                    job["failed"] += 1
+            delivered_this_run += len(window)
+
+            redis_client.hset(BROADCAST_KEY, mapping={
+                "sent": job["sent"],
+                "blocked": job["blocked"],
+                "failed": job["failed"],
+            })
+
+            now = time.monotonic()
+            if now - last_report >= config.BROADCAST_PROGRESS_INTERVAL:
+                last_report = now
+                await report_progress(job, "status_running", delivered_this_run / (now - started_at))
+        else:
+            status = "status_cancelled"
+    except asyncio.CancelledError:
+        # Shutdown: keep the checkpoint so the broadcast resumes on the next start
+        logger.info("Broadcast interrupted, progress checkpointed")
+        raise
+    except Exception as e:
+        status = "status_failed"
+        logger.error(f"Error during broadcast: {e}")
+        redis_client.hset(BROADCAST_KEY, "status", "failed")
+
+    elapsed = max(time.monotonic() - started_at, 1e-6)
+    await report_progress(job, status, delivered_this_run / elapsed)
+
+    if status != "status_failed":
+        redis_client.delete(BROADCAST_KEY)
+    logger.info(f"Broadcast finished: {job['sent']} sent, {job['blocked']} blocked, {job['failed']} failed")
+
+
+def start_broadcast_task() -> None:
+
+    global _current_task
+    _current_task = asyncio.create_task(run_broadcast())
+
+
+def resume_broadcast() -> bool:
+    """
+    Resume a broadcast interrupted by a restart or an error.
+
+    Returns:
+        bool: Whether there was a broadcast to resume
+    """
+    status = redis_client.hget(BROADCAST_KEY, "status")
+    if status not in ("running", "failed") or is_broadcast_running():
+        return False
+
+    redis_client.hset(BROADCAST_KEY, "status", "running")
+    start_broadcast_task()
+    logger.info("Resumed interrupted broadcast")
+    return True
+
+
+@broadcast_router.message(Command("broadcast"), F.from_user.id == config.ADMIN_ID)
+async def cmd_broadcast(message: Message, state: FSMContext) -> None:
+
+    try:
+        if is_broadcast_running():
+            await message.answer(MESSAGES["already_running"], parse_mode=ParseMode.HTML)
+            return
+
+        await state.set_state(BroadcastStates.waiting_for_text)
+        await message.answer(MESSAGES["enter_text"], parse_mode=ParseMode.HTML)
+        logger.info(f"Admin {message.from_user.id} initiated a broadcast")
+    except Exception as e:
+        logger.error(f"Error in broadcast command: {e}")
+
+
+@broadcast_router.message(BroadcastStates.waiting_for_text, F.text)
+async def process_broadcast_text(message: Message, state: FSMContext) -> None:
+
+    try:
+        text = message.html_text
+        await state.update_data(text=text)
+        await state.set_state(BroadcastStates.waiting_for_confirmation)
+
+        await message.answer(
+            MESSAGES["confirm"].format(count=db.get_count_of_started_users(), text=text),
+            reply_markup=get_confirmation_keyboard(),
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error(f"Error processing broadcast text: {e}")
+
+
+@broadcast_router.message(BroadcastStates.waiting_for_text)
+async def process_invalid_broadcast_input(message: Message) -> None:
+
+    await message.answer(MESSAGES["only_text"], parse_mode=ParseMode.HTML)
+
+
+@broadcast_router.callback_query(F.data == "broadcast_confirm")
+async def confirm_broadcast(callback: CallbackQuery, state: FSMContext) -> None:
+
+    try:
+        data = await state.get_data()
+        await state.clear()
+
+        if is_broadcast_running() or not data.get("text"):
+            await callback.answer(MESSAGES["already_running"], show_alert=True)
+            return
+
+        total = db.get_count_of_started_users()
+        progress_message = await callback.message.edit_text(
+            MESSAGES["progress"].format(
+                status=MESSAGES["status_running"],
+                sent=0, blocked=0, failed=0, processed=0, total=total, rate=0.0
+            ),
+            parse_mode=ParseMode.HTML
+        )
+
+        redis_client.delete(BROADCAST_KEY)
+        redis_client.hset(BROADCAST_KEY, mapping={
+            "status": "running",
+            "text": data["text"],
+            "admin_chat_id": callback.message.chat.id,
+            "progress_message_id": progress_message.message_id,
+            "last_id": "",
+            "total": total,
+            "sent": 0,
+            "blocked": 0,
+            "failed": 0,
+        })
+
+        start_broadcast_task()
+        await callback.answer()
+        logger.info(f"Admin {callback.from_user.id} started a broadcast to {total} users")
+    except Exception as e:
+        logger.error(f"Error starting broadcast: {e}")
+        await callback.answer()
+
+
+@broadcast_router.callback_query(F.data == "broadcast_cancel")
+async def cancel_broadcast_setup(callback: CallbackQuery, state: FSMContext) -> None:
+
+    await state.clear()
+    try:
+        await callback.message.edit_text(MESSAGES["cancelled"], parse_mode=ParseMode.HTML)
+    except TelegramBadRequest:
+        logger.debug("Could not edit message, it might be too old")
+    await callback.answer()
+
+
+@broadcast_router.message(Command("broadcast_cancel"), F.from_user.id == config.ADMIN_ID)
+async def cmd_broadcast_cancel(message: Message) -> None:
+
+    if redis_client.hget(BROADCAST_KEY, "status") is None:
+        await message.answer(MESSAGES["nothing_to_resume"], parse_mode=ParseMode.HTML)
+        return
+
+    if is_broadcast_running():
+        # The running task notices the status change after its current window
+        redis_client.hset(BROADCAST_KEY, "status", "cancelled")
+    else:
+        redis_client.delete(BROADCAST_KEY)
+
+    await message.answer(MESSAGES["cancelled"], parse_mode=ParseMode.HTML)
+    logger.info(f"Admin {message.from_user.id} cancelled the broadcast")
+
+
+@broadcast_router.message(Command("broadcast_resume"), F.from_user.id == config.ADMIN_ID)
+async def cmd_broadcast_resume(message: Message) -> None:
+
+    if is_broadcast_running():
+        await message.answer(MESSAGES["already_running"], parse_mode=ParseMode.HTML)
+        return
+
+    if not resume_broadcast():
+        await message.answer(MESSAGES["nothing_to_resume"], parse_mode=ParseMode.HTML)
@@ -0,0 +1,169 @@
+import logging
+from typing import Dict, Any, Optional, Callable, Union, NamedTuple
+
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects buttons whose callback_data is longer than this (in bytes)
+MAX_CALLBACK_DATA_LENGTH = 64
+
+CALLBACK_SCHEMA_VERSION = 2
+SEPARATOR = ":"
+
+
+class QuizAction:
+    START = "s"
+    JOIN = "j"
+    QUESTION_COUNT = "c"
+    TIME_LIMIT = "t"
+
+
+# Colon-separated prefixes used before the codec existed; still accepted so old messages keep working
+LEGACY_PREFIXES = {
+    "quiz_start": QuizAction.START,
+    "quiz_join": QuizAction.JOIN,
+    "quiz_qcount": QuizAction.QUESTION_COUNT,
+    "quiz_tlimit": QuizAction.TIME_LIMIT,
+}
+
+
+class QuizCallback(NamedTuple):
+    """
+    Decoded payload of a quiz lobby button.
+
+    Current buttons only carry a quiz token (see session_store.issue_quiz_token);
+    the IDs are only set for buttons sent before tokens were introduced.
+    """
+    action: str
+    token: Optional[str] = None
+    topic_id: Optional[str] = None
+    creator_id: Optional[int] = None
+    quiz_id: Optional[str] = None
+    question_count: Optional[int] = None
+    time_limit: Optional[int] = None
+
+
+class CallbackDataError(ValueError):
+    pass
+
+
+def _check_id(value: str) -> str:
+    if not value or SEPARATOR in value:
+        raise CallbackDataError(f"Invalid id in callback data: {value!r}")
+    return value
+
+
+def encode_quiz_callback(action: str, token: str,
+                         question_count: Optional[int] = None, time_limit: Optional[int] = None) -> str:
+    """
+    Encode a quiz button payload.
+
+    Layout: `q<action><version>:<token>[:<count>][:<time>]`.
+    The start button carries both the count and the time, the option buttons carry their own value.
+
+    Raises:
+        CallbackDataError: If the payload would not fit in a Telegram button
+    """
+    fields = [f"q{action}{CALLBACK_SCHEMA_VERSION}", _check_id(token)]
+    if action in (QuizAction.START, QuizAction.QUESTION_COUNT):
+        fields.append(str(question_count))
+    if action in (QuizAction.START, QuizAction.TIME_LIMIT):
+        fields.append(str(time_limit))
+
+    data = SEPARATOR.join(fields)
+    if len(data.encode()) > MAX_CALLBACK_DATA_LENGTH:
+        raise CallbackDataError(f"Callback data too long ({len(data.encode())} bytes): {data}")
+    return data
+
+
+VALUE_FIELDS = {
+    QuizAction.START: ("question_count", "time_limit"),
+    QuizAction.JOIN: (),
+    QuizAction.QUESTION_COUNT: ("question_count",),
+    QuizAction.TIME_LIMIT: ("time_limit",),
+}
+
+
+def _token_decoder(action: str) -> Callable[[list], QuizCallback]:
+    value_fields = VALUE_FIELDS[action]
+    field_count = 1 + len(value_fields)
+
+    def decode(parts: list) -> QuizCallback:
+        if len(parts) != field_count:
+            raise CallbackDataError("Unexpected number of fields")
+        values = {name: int(value) for name, value in zip(value_fields, parts[1:])}
+        return QuizCallback(action=action, token=_check_id(parts[0]), **values)
+
+    return decode
+
+
+def _legacy_decoder(action: str) -> Callable[[list], QuizCallback]:
+    """
+    Decoder of the layout used before quiz tokens, which carries the IDs themselves.
+
+    These IDs come from the client; they only identify a lobby that already exists (see join_quiz).
+    """
+    value_fields = VALUE_FIELDS[action]
+    field_count = 3 + len(value_fields)
+
+    def decode(parts: list) -> QuizCallback:
+        # Legacy buttons may carry trailing fields that are not needed anymore
+        if len(parts) < field_count:
+            raise CallbackDataError("Unexpected number of fields")
+        topic_id, creator_id, quiz_id = parts[0], parts[1], parts[2]
+        values = {name: int(value) for name, value in zip(value_fields, parts[3:field_count])}
+        return QuizCallback(
+            action=action,
+            topic_id=_check_id(topic_id),
+            creator_id=int(creator_id),
+            quiz_id=_check_id(quiz_id),
+            **values
+        )
+
+    return decode
+
+
+# Prefix -> decoder; a payload is routed with a single dict lookup
+DECODERS: Dict[str, Callable[[list], QuizCallback]] = {
+    f"q{action}{CALLBACK_SCHEMA_VERSION}": _token_decoder(action) for action in VALUE_FIELDS
+}
+DECODERS.update({prefix: _legacy_decoder(action) for prefix, action in LEGACY_PREFIXES.items()})
+
+
+def decode_callback(data: Optional[str]) -> Optional[QuizCallback]:
+    """
+    Decode a quiz button payload.
+
+    Returns:
+        Optional[QuizCallback]: The payload, or None if it is not a valid quiz payload
+    """
+    if not data or len(data) > MAX_CALLBACK_DATA_LENGTH * 4:
+        return None
+
+    prefix, _, rest = data.partition(SEPARATOR)
+    decoder = DECODERS.get(prefix)
+    if decoder is None:
+        return None
+
+    try:
+        return decoder(rest.split(SEPARATOR))
+    except ValueError as e:
+        logger.debug("Rejected malformed callback data %r: %s", data, e)
+        return None
+
+
+class QuizCallbackFilter(Filter):
+    """
+    Matches quiz buttons of the given actions and passes the decoded payload as `quiz_callback`.
+    """
+
+    def __init__(self, *actions: str):
+        self.actions = frozenset(actions)
+
+    async def __call__(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        payload = decode_callback(callback.data)
+        if payload is None or (self.actions and payload.action not in self.actions):
+            return False
+        return {"quiz_callback": payload}
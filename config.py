@@ -41,6 +41,157 @@ OPTION_MAX_LENGTH = 20
 OPTION_MIN_LENGTH = 1
 OPTION_COUNT = 4
 
+#Duplicate Detection Settings
+# Character n-gram size of the question shingles
+DEDUP_SHINGLE_SIZE = 3
+# MinHash signature length and LSH bands; rows per band = NUM_PERM / BANDS.
+# Candidates show up from a similarity of about (1 / BANDS) ** (1 / rows), ~0.6 here
+DEDUP_NUM_PERM = 32
+DEDUP_BANDS = 8
+# Candidates at least this similar (Jaccard of shingles) count as near duplicates
+DEDUP_SIMILARITY_THRESHOLD = 0.6
+DEDUP_MAX_CANDIDATES = 50
+# Refuse new questions whose normalized text already exists in the topic
+DEDUP_REJECT_EXACT = True
+# Similar questions listed in the moderation message
+DEDUP_SHOWN_MATCHES = 3
+
+#Search Settings
+SEARCH_PAGE_SIZE = 8
+SEARCH_INLINE_RESULTS = 10
+# Indexed terms tried for the unfinished last word of a query
+SEARCH_PREFIX_EXPANSIONS = 50
+# Weight of a term by where it appears in a topic
+SEARCH_NAME_WEIGHT = 3.0
+SEARCH_DESCRIPTION_WEIGHT = 1.0
+SEARCH_QUESTION_WEIGHT = 0.3
+
+#Topic Picker Settings
+# Topics per page of a topic selection keyboard
+TOPIC_PICKER_PAGE_SIZE = 10
+# Pages whose buttons keep working; older ones ask to run the command again
+TOPIC_PICKER_MAX_VIEWS = 500
+
+#Inline Results Settings
+# Seconds Telegram may serve an inline answer from its own cache
+INLINE_CACHE_TIME = 300
+# Inline queries whose results are kept, and for how many seconds
+INLINE_CACHE_SIZE = 2000
+INLINE_CACHE_TTL = 60
+
+#Question Import Settings
+# Questions per insert_many during a bulk import
+IMPORT_BATCH_SIZE = 500
+# Telegram bots can't download files larger than 20 MB
+IMPORT_MAX_FILE_SIZE = 20 * 1024 * 1024
+# Invalid rows listed in the error report; the rest are only counted
+IMPORT_MAX_ERRORS = 1000
+IMPORT_ERRORS_IN_MESSAGE = 20
+
+#Export Settings
+# Documents fetched per cursor round-trip while exporting
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COMPRESS_LEVEL = 6
+# Seconds between progress updates of a running export
+EXPORT_PROGRESS_INTERVAL = 5
+# Telegram bots can't send documents larger than 50 MB
+EXPORT_MAX_FILE_SIZE = 50 * 1024 * 1024
+
+#Outbound Message Settings
+# Telegram allows about 30 messages/second overall, 1 message/second per private chat
+# and 20 messages/minute per group
+OUTBOUND_GLOBAL_RATE = 25
+OUTBOUND_PRIVATE_CHAT_RATE = 1
+OUTBOUND_GROUP_CHAT_RATE = 20 / 60
+OUTBOUND_CONCURRENCY = 10
+OUTBOUND_MAX_RETRIES = 3
+OUTBOUND_MAX_TRACKED_CHATS = 10000
+# Pending messages are mirrored to Redis in one pipeline per this many seconds;
+# a crash loses at most the messages queued within it
+OUTBOUND_PERSIST_DELAY = 0.2
+
+#Broadcast Settings
+BROADCAST_WINDOW_SIZE = 50
+BROADCAST_CURSOR_BATCH_SIZE = 500
+BROADCAST_PROGRESS_INTERVAL = 5
+
+#Question Count Settings
+# Tries per topic when a concurrent approval changes the counter during reconciliation
+RECONCILE_MAX_ATTEMPTS = 3
+
+#Topic Deletion Settings
+# Questions removed per delete_many while a topic is deleted in the background
+TOPIC_DELETE_BATCH_SIZE = 500
+# Pause between two chunks, so the deletion doesn't monopolize the primary (seconds)
+TOPIC_DELETE_PAUSE = 0.2
+TOPIC_DELETE_PROGRESS_INTERVAL = 5
+
+#Lobby Settings
+# How long an idle quiz lobby is kept in the session store (seconds)
+LOBBY_TTL = 6 * 60 * 60
+# Joins within this window are folded into a single lobby message edit (seconds)
+LOBBY_RENDER_DEBOUNCE = 1.0
+# Quiz keyboard layouts (question count x time limit selections) kept in memory
+QUIZ_KEYBOARD_CACHE_SIZE = 64
+
+#Question Sampling Settings
+# How many recently played questions are remembered per user and topic
+RECENT_QUESTIONS_LIMIT = 200
+# Candidate multiplier used when sampling is weighted by difficulty
+QUESTION_SAMPLE_OVERSAMPLING = 3
+
+#Question Pool Settings
+# Upper bound on the number of questions held in the in-memory topic pools
+QUESTION_POOL_MAX_QUESTIONS = 50000
+
+#Metrics Settings
+# Prometheus text endpoint (GET /metrics); set METRICS_PORT to None to disable it
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+# Optional file the metrics are also written to every METRICS_DUMP_INTERVAL seconds
+METRICS_DUMP_PATH = None
+METRICS_DUMP_INTERVAL = 60
+
+#Database Profiling Settings
+DB_PROFILING = True
+# Database method calls slower than this are logged with their filters (seconds)
+DB_SLOW_CALL_THRESHOLD = 0.2
+# Also log the query plans of slow calls (runs explain, debug only)
+DB_PROFILE_EXPLAIN = False
+DB_PROFILE_TOP_COUNT = 10
+
+#Logging Settings
+LOG_LEVEL = "INFO"
+# "json" for one JSON object per line, "text" for plain lines
+LOG_FORMAT = "json"
+# Also write to this rotating file; None logs to stdout only
+LOG_FILE = None
+LOG_FILE_MAX_BYTES = 20 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+# Records waiting for the writer thread; more are dropped rather than blocking the bot
+LOG_QUEUE_SIZE = 10000
+# Share of DEBUG/INFO records kept per logger (warnings and errors are always kept)
+# (plugins log under "plugins.<module>", as bot.py imports them from the plugins package)
+LOG_SAMPLE_RATES = {
+    "plugins.join_quiz": 0.1,
+    "plugins.leaderboard": 0.1,
+    "utils": 0.2,
+}
+
+#Event Loop Monitor Settings
+LOOP_MONITOR_ENABLED = True
+# How often the heartbeat wakes up (seconds)
+LOOP_MONITOR_INTERVAL = 0.05
+# The loop counts as blocked when a heartbeat is this late (seconds)
+LOOP_BLOCK_THRESHOLD = 0.25
+# Rotating file for stall reports with stacks (e.g. "loop_stalls.log"); None only logs and counts them
+LOOP_MONITOR_REPORT_PATH = None
+LOOP_MONITOR_REPORT_MAX_BYTES = 5 * 1024 * 1024
+LOOP_MONITOR_REPORT_BACKUPS = 3
+
+#Moderation Settings
+PENDING_QUESTIONS_PAGE_SIZE = 5
+
 #Quiz Settings
 QUIZ_COUNT_OF_QUESTIONS_LIST = [7, 10, 14]
 QUIZ_COUNT_OF_QUESTIONS = QUIZ_COUNT_OF_QUESTIONS_LIST[0]
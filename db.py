@@ -1,16 +1,73 @@
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterator, Tuple, Iterable, NamedTuple, Type, Callable
+import asyncio
 import datetime
 import logging
 import random
+import re
 import string
+import threading
 import uuid
 import config
-from pymongo import MongoClient
+from db_profiler import command_tracer
+from dedup import Fingerprint, FINGERPRINT_VERSION, fingerprint, text_hash, shingles, normalize_text, similarity
+from pymongo import MongoClient, UpdateOne, UpdateMany, DeleteMany, ReturnDocument
 from pymongo.database import Database
 from bson.int64 import Int64
+from bson.objectid import ObjectId
 
 logger = logging.getLogger(__name__)
 
+# Topics being deleted in the background are invisible to every lookup
+NOT_DELETED = {"is_deleted": {"$ne": True}}
+
+
+class ChangeEvent:
+    QUESTION_APPROVED = "question_approved"
+    QUESTION_REMOVED = "question_removed"
+    TOPIC_DELETED = "topic_deleted"
+    # Name, description or active flag of a topic changed, or the topic was created
+    TOPIC_CHANGED = "topic_changed"
+
+
+class UserRecord(NamedTuple):
+    """Lightweight view of a user document; fields outside the projection are None."""
+    user_id: Any = None
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+    has_start: Optional[bool] = None
+    stats: Optional[Dict[str, Any]] = None
+
+
+class TopicRecord(NamedTuple):
+    """Lightweight view of a topic document; fields outside the projection are None."""
+    topic_id: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    is_active: Optional[bool] = None
+    question_count: Optional[int] = None
+    stats: Optional[Dict[str, Any]] = None
+
+
+class QuestionRecord(NamedTuple):
+    """Lightweight view of a question document; fields outside the projection are None."""
+    question_id: Optional[str] = None
+    topic_id: Optional[str] = None
+    text: Optional[str] = None
+    options: Optional[List[str]] = None
+    correct_option: Optional[int] = None
+    created_by: Optional[str] = None
+    is_approved: Optional[bool] = None
+
+
+class QuestionRow(NamedTuple):
+    """One question read from an import file; error is set if the row could not be parsed."""
+    row: int
+    text: Any = None
+    options: Any = None
+    correct_option: Any = None
+    error: Optional[str] = None
+
+
 class Database:
     """
     MongoDB database manager for the QuizBot application.
@@ -27,7 +84,7 @@ class Database:
             connection_string (str, optional): MongoDB connection string. Defaults to config.MONGO_URL.
             database_name (str, optional): Name of the database. Defaults to config.MONGO_DB_NAME.
         """
-        self.client = MongoClient(connection_string or config.MONGO_URL)
+        self.client = MongoClient(connection_string or config.MONGO_URL, event_listeners=[command_tracer])
         self.db: Database = self.client[database_name or config.MONGO_DB_NAME]
         
         # Collections
@@ -35,6 +92,72 @@ class Database:
         self.topics = self.db["topics"]
         self.questions = self.db["questions"]
 
+        self._change_listeners: List[Callable[[str, str, Optional[Dict[str, Any]]], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+        self._ensure_indexes()
+
+    def add_change_listener(self, listener: Callable[[str, str, Optional[Dict[str, Any]]], None]) -> None:
+        """
+        Register a callback for changes that affect the playable questions of a topic.
+        
+        Args:
+            listener (Callable): Called as listener(event, topic_id, question) with one of
+                the ChangeEvent values; question is the affected document, if any
+        """
+        self._change_listeners.append(listener)
+
+    def bind_event_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Run change listeners on this loop, also for writes made from worker threads.
+        
+        Listeners update caches owned by the event loop (question pools, the
+        search index, inline results) without locks, so a change made inside
+        asyncio.to_thread (imports, reconciliation) is handed over to the loop
+        instead of calling them from the worker thread.
+        """
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+
+    def _notify_change(self, event: str, topic_id: str, question: Dict[str, Any] = None) -> None:
+        if self._loop is not None and threading.get_ident() != self._loop_thread_id:
+            try:
+                self._loop.call_soon_threadsafe(self._dispatch_change, event, topic_id, question)
+            except RuntimeError:
+                logger.warning(f"Event loop closed, {event} of topic {topic_id} not dispatched")
+            return
+        self._dispatch_change(event, topic_id, question)
+
+    def _dispatch_change(self, event: str, topic_id: str, question: Optional[Dict[str, Any]]) -> None:
+        for listener in self._change_listeners:
+            try:
+                listener(event, topic_id, question)
+            except Exception as e:
+                logger.error(f"Error in database change listener for {event}: {e}")
+
+    def _ensure_indexes(self) -> None:
+        """
+        Create the indexes used by the lookup and range queries below.
+        
+        Index creation is idempotent, so this is safe to run on every start.
+        """
+        try:
+            self.users.create_index("user_id")
+            self.users.create_index([("has_start", 1), ("_id", 1)])
+            self.topics.create_index("topic_id")
+            self.topics.create_index("name")
+            self.topics.create_index([("name", 1), ("topic_id", 1)])
+            self.topics.create_index("is_deleted", sparse=True)
+            self.questions.create_index("question_id")
+            self.questions.create_index([("topic_id", 1), ("is_approved", 1), ("question_id", 1)])
+            self.questions.create_index([("is_approved", 1), ("question_id", 1)])
+            self.questions.create_index([("topic_id", 1), ("text_hash", 1)])
+            self.questions.create_index([("topic_id", 1), ("dedup_bands", 1)])
+            self.questions.create_index("moderation_id", sparse=True)
+        except Exception as e:
+            logger.warning(f"Could not ensure database indexes: {e}")
+
     def create_user(self, user_id: str, username: str = None, full_name: str = "", has_start: bool = None) -> Dict[str, Any]:
         """
         Create a new user or update an existing one.
@@ -137,6 +260,116 @@ class Database:
             users = self.users.find({})
         return list(users)
 
+    def iter_user_ids(self, has_start: bool = True, after_id: ObjectId = None,
+                      batch_size: int = 500) -> Iterator[Tuple[ObjectId, Any]]:
+        """
+        Stream user IDs in _id order without loading whole user documents.
+        
+        Args:
+            has_start (bool, optional): Only include users who have started the bot
+            after_id (ObjectId, optional): Resume after this document _id
+            batch_size (int, optional): Number of documents fetched per round-trip
+            
+        Yields:
+            Tuple[ObjectId, Any]: The document _id (usable as a resume point) and the Telegram user ID
+        """
+        query = {"has_start": True} if has_start else {}
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+
+        cursor = self.users.find(query, {"user_id": 1}).sort("_id", 1).batch_size(batch_size)
+        try:
+            for user in cursor:
+                yield user["_id"], user["user_id"]
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _user_id_variants(user_id: Any) -> List[Any]:
+        """
+        User IDs are stored both as Int64 and as strings; return every form to match against.
+        """
+        variants = [str(user_id)]
+        try:
+            variants.append(Int64(int(user_id)))
+        except (TypeError, ValueError):
+            pass
+        return variants
+
+    def mark_user_blocked(self, user_id: str) -> Dict[str, Any]:
+        """
+        Flag a user who blocked the bot so they are skipped by future broadcasts.
+        
+        Args:
+            user_id (str): User ID
+            
+        Returns:
+            Dict[str, Any]: Status and message
+        """
+        try:
+            self.users.update_many(
+                {"user_id": {"$in": self._user_id_variants(user_id)}},
+                {"$set": {"has_start": False, "updated_at": datetime.datetime.now()}}
+            )
+            logger.debug(f"User {user_id} marked as blocked")
+            return {"status": "success", "message": "User marked as blocked"}
+        except Exception as e:
+            logger.error(f"Error marking user as blocked: {str(e)}")
+            return {"status": "error", "message": f"Failed to mark user as blocked: {str(e)}"}
+
+    def _stream_records(self, collection, query: Dict[str, Any], record_type: Type[NamedTuple],
+                        projection: Optional[Iterable[str]], batch_size: int,
+                        sort: Optional[List[Tuple[str, int]]] = None) -> Iterator[NamedTuple]:
+        """
+        Stream documents of a collection as typed records, fetching only the projected fields.
+        
+        Args:
+            collection: Collection to read from
+            query (Dict[str, Any]): Filter for the documents
+            record_type (Type[NamedTuple]): Record class to build
+            projection (Iterable[str], optional): Fields to fetch. Defaults to all record fields
+            batch_size (int): Number of documents fetched per round-trip
+            sort (List[Tuple[str, int]], optional): Sort specification
+            
+        Yields:
+            NamedTuple: One record per document
+            
+        Raises:
+            ValueError: If the projection names a field the record type doesn't have
+        """
+        fields = tuple(projection or record_type._fields)
+        unknown_fields = set(fields) - set(record_type._fields)
+        if unknown_fields:
+            raise ValueError(f"Unknown {record_type.__name__} fields: {', '.join(sorted(unknown_fields))}")
+
+        mongo_projection = {field: 1 for field in fields}
+        mongo_projection["_id"] = 0
+
+        cursor = collection.find(query, mongo_projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            for document in cursor:
+                yield record_type(**document)
+        finally:
+            cursor.close()
+
+    def iter_users(self, has_start: bool = False, projection: Optional[Iterable[str]] = None,
+                   batch_size: int = 500) -> Iterator[UserRecord]:
+        """
+        Streaming counterpart of get_all_users.
+        
+        Args:
+            has_start (bool, optional): Filter users by has_start flag
+            projection (Iterable[str], optional): UserRecord fields to fetch
+            batch_size (int, optional): Number of documents fetched per round-trip
+            
+        Yields:
+            UserRecord: One record per user
+        """
+        query = {"has_start": True} if has_start else {}
+        return self._stream_records(self.users, query, UserRecord, projection, batch_size)
+
     def get_count_of_users(self) -> int:
         """
         Get total number of users.
@@ -207,7 +440,7 @@ class Database:
             raise ValueError(
                 f"Topic description must be between {config.TOPIC_DESCRIPTION_MIN_LENGTH} and {config.TOPIC_DESCRIPTION_MAX_LENGTH} characters")
 
-        existing_topic = self.topics.find_one({"name": topic_name})
+        existing_topic = self.topics.find_one({"name": topic_name, **NOT_DELETED})
         if existing_topic:
             return {"status": "error", "message": "A topic with this name already exists"}
 
@@ -230,6 +463,7 @@ class Database:
 
             topic_data["_id"] = result.inserted_id
             logger.debug(f"Topic '{topic_name}' created with ID: {topic_id}")
+            self._notify_change(ChangeEvent.TOPIC_CHANGED, topic_id)
 
             return {
                 "status": "success",
@@ -250,9 +484,67 @@ class Database:
         Returns:
             List[Dict[str, Any]]: List of all topic documents
         """
-        topics = self.topics.find()
+        topics = self.topics.find(NOT_DELETED)
         return list(topics)
 
+    def iter_topics(self, only_active: bool = False, projection: Optional[Iterable[str]] = None,
+                    batch_size: int = 100) -> Iterator[TopicRecord]:
+        """
+        Streaming counterpart of get_all_topics.
+        
+        Args:
+            only_active (bool, optional): Skip topics that are explicitly deactivated
+            projection (Iterable[str], optional): TopicRecord fields to fetch
+            batch_size (int, optional): Number of documents fetched per round-trip
+            
+        Yields:
+            TopicRecord: One record per topic
+        """
+        query = dict(NOT_DELETED)
+        if only_active:
+            query["is_active"] = {"$ne": False}
+        return self._stream_records(self.topics, query, TopicRecord, projection, batch_size)
+
+    def get_topics_page(self, limit: int, anchor: Optional[Tuple[str, str]] = None, direction: str = "next",
+                        only_active: bool = False, name_filter: Optional[str] = None) -> List[TopicRecord]:
+        """
+        Get one page of topics ordered by name, using keyset pagination on (name, topic_id).
+        
+        Args:
+            limit (int): Maximum number of topics to return
+            anchor (Tuple[str, str], optional): (name, topic_id) of the topic the page starts after
+                (direction="next") or ends before (direction="prev"). If omitted, the first or last page
+            direction (str, optional): "next" or "prev"
+            only_active (bool, optional): Skip topics that are explicitly deactivated
+            name_filter (str, optional): Only topics whose name contains this text, case-insensitively
+            
+        Returns:
+            List[TopicRecord]: Topic ID and name of each topic, in name order
+        """
+        if direction not in ("next", "prev"):
+            raise ValueError("Direction must be either 'next' or 'prev'")
+
+        conditions = [NOT_DELETED]
+        if only_active:
+            conditions.append({"is_active": {"$ne": False}})
+        if name_filter:
+            conditions.append({"name": {"$regex": re.escape(name_filter), "$options": "i"}})
+
+        operator, sort_order = ("$gt", 1) if direction == "next" else ("$lt", -1)
+        if anchor is not None:
+            name, topic_id = anchor
+            conditions.append({"$or": [
+                {"name": {operator: name}},
+                {"name": name, "topic_id": {operator: topic_id}},
+            ]})
+
+        cursor = self.topics.find({"$and": conditions}, {"topic_id": 1, "name": 1, "_id": 0})
+        cursor = cursor.sort([("name", sort_order), ("topic_id", sort_order)]).limit(limit)
+        topics = [TopicRecord(**document) for document in cursor]
+        if direction == "prev":
+            topics.reverse()
+        return topics
+
     def get_topic_by_id(self, topic_id: str) -> Dict[str, Any]:
         """
         Get a topic by its ID.
@@ -263,7 +555,7 @@ class Database:
         Returns:
             Dict[str, Any]: Status and topic data if found
         """
-        topic = self.topics.find_one({"topic_id": topic_id})
+        topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
         if not topic:
             return {"status": "error", "message": "Topic not found"}
 
@@ -279,7 +571,7 @@ class Database:
         Returns:
             Dict[str, Any]: Status and topic data if found
         """
-        topic = self.topics.find_one({"name": topic_name})
+        topic = self.topics.find_one({"name": topic_name, **NOT_DELETED})
         if not topic:
             return {"status": "error", "message": "Topic not found"}
 
@@ -296,13 +588,14 @@ class Database:
         Returns:
             Dict[str, Any]: Status and message
         """
-        topic = self.topics.find_one({"topic_id": topic_id})
+        topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
         if not topic:
             return {"status": "error", "message": "Topic not found"}
 
         try:
             self.topics.update_one({"topic_id": topic_id}, {"$set": {"name": new_name}})
             logger.debug(f"Topic {topic_id} name updated to '{new_name}'")
+            self._notify_change(ChangeEvent.TOPIC_CHANGED, topic_id)
             return {"status": "success", "message": "Topic name updated successfully"}
         except Exception as e:
             logger.error(f"Error updating topic name: {str(e)}")
@@ -319,13 +612,14 @@ class Database:
         Returns:
             Dict[str, Any]: Status and message
         """
-        topic = self.topics.find_one({"topic_id": topic_id})
+        topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
         if not topic:
             return {"status": "error", "message": "Topic not found"}
 
         try:
             self.topics.update_one({"topic_id": topic_id}, {"$set": {"description": new_description}})
             logger.debug(f"Topic {topic_id} description updated")
+            self._notify_change(ChangeEvent.TOPIC_CHANGED, topic_id)
             return {"status": "success", "message": "Topic description updated successfully"}
         except Exception as e:
             logger.error(f"Error updating topic description: {str(e)}")
@@ -342,7 +636,7 @@ class Database:
         Returns:
             Dict[str, Any]: Status and message
         """
-        topic = self.topics.find_one({"topic_id": topic_id})
+        topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
         if not topic:
             return {"status": "error", "message": "Topic not found"}
 
@@ -350,39 +644,120 @@ class Database:
             self.topics.update_one({"topic_id": topic_id}, {"$set": {"is_active": new_active_status}})
             status_str = "activated" if new_active_status else "deactivated"
             logger.debug(f"Topic {topic_id} {status_str}")
+            self._notify_change(ChangeEvent.TOPIC_CHANGED, topic_id)
             return {"status": "success", "message": f"Topic {status_str} successfully"}
         except Exception as e:
             logger.error(f"Error updating topic active status: {str(e)}")
             return {"status": "error", "message": f"Failed to update topic status: {str(e)}"}
 
-    def delete_topic(self, topic_id: str) -> Dict[str, Any]:
+    def delete_topic(self, topic_id: str, admin_chat_id: int = None, progress_message_id: int = None) -> Dict[str, Any]:
         """
-        Delete a topic and all associated questions.
+        Mark a topic as deleted; its questions are removed afterwards by delete_topic_questions.
+        
+        From this point on the topic is hidden from every topic lookup and the
+        change listeners drop it from their caches. The deletion state stays on
+        the topic document, so an interrupted deletion can be resumed.
         
         Args:
             topic_id (str): ID of the topic to delete
+            admin_chat_id (int, optional): Chat to report the deletion progress to
+            progress_message_id (int, optional): Message in that chat showing the progress
             
         Returns:
-            Dict[str, Any]: Status and message
+            Dict[str, Any]: Status, the topic and the number of questions to remove
         """
-        topic = self.topics.find_one({"topic_id": topic_id})
-        if not topic:
-            return {"status": "error", "message": "Topic not found"}
-
         try:
-            questions_deleted = self.questions.delete_many({"topic_id": topic_id})
-            
-            self.topics.delete_one({"topic_id": topic_id})
-            logger.debug(f"Topic {topic_id} deleted with {questions_deleted.deleted_count} associated questions")
-            
-            return {
-                "status": "success", 
-                "message": f"Topic deleted successfully along with {questions_deleted.deleted_count} associated questions"
-            }
+            question_count = self.questions.count_documents({"topic_id": topic_id})
+            topic = self.topics.find_one_and_update(
+                {"topic_id": topic_id, **NOT_DELETED},
+                {"$set": {
+                    "is_deleted": True,
+                    "is_active": False,
+                    "deletion": {
+                        "started_at": datetime.datetime.now(),
+                        "admin_chat_id": admin_chat_id,
+                        "progress_message_id": progress_message_id,
+                        "total": question_count,
+                        "deleted": 0,
+                    },
+                }},
+                return_document=ReturnDocument.AFTER
+            )
+            if not topic:
+                return {"status": "error", "message": "Topic not found"}
+
+            logger.debug(f"Topic {topic_id} marked as deleted, {question_count} questions to remove")
+            self._notify_change(ChangeEvent.TOPIC_DELETED, topic_id)
+            return {"status": "success", "topic": topic, "question_count": question_count}
         except Exception as e:
             logger.error(f"Error deleting topic: {str(e)}")
             return {"status": "error", "message": f"Failed to delete topic: {str(e)}"}
 
+    def delete_topic_questions(self, topic_id: str, limit: int) -> int:
+        """
+        Remove one chunk of the questions of a deleted topic and record the progress.
+        
+        Args:
+            topic_id (str): ID of the deleted topic
+            limit (int): Maximum number of questions to remove
+            
+        Returns:
+            int: Number of questions removed; 0 once none are left
+        """
+        ids = [question["_id"] for question in self.questions.find({"topic_id": topic_id}, {"_id": 1}).limit(limit)]
+        if not ids:
+            return 0
+
+        deleted = self.questions.delete_many({"_id": {"$in": ids}}).deleted_count
+        self.topics.update_one({"topic_id": topic_id, "is_deleted": True}, {"$inc": {"deletion.deleted": deleted}})
+        return deleted
+
+    def finish_topic_deletion(self, topic_id: str) -> None:
+        """
+        Remove the document of a deleted topic once its questions are gone.
+        """
+        self.topics.delete_one({"topic_id": topic_id, "is_deleted": True})
+        logger.debug(f"Topic {topic_id} deleted")
+
+    def get_topics_being_deleted(self) -> List[Dict[str, Any]]:
+        """
+        Get the topics whose deletion was started but not finished.
+        
+        Returns:
+            List[Dict[str, Any]]: Topic ID, name and deletion state of each topic
+        """
+        return list(self.topics.find({"is_deleted": True}, {"topic_id": 1, "name": 1, "deletion": 1, "_id": 0}))
+
+    @staticmethod
+    def _validate_question(question_text: Any, options: Any, correct_option: Any) -> Optional[str]:
+        """
+        Check a question against the length and option rules in config.
+        
+        Returns:
+            Optional[str]: Error message, or None if the question is valid
+        """
+        if not question_text or not isinstance(question_text, str):
+            return "Question text cannot be empty"
+
+        if len(question_text) < config.QUESTION_MIN_LENGTH or len(question_text) > config.QUESTION_MAX_LENGTH:
+            return f"Question text must be between {config.QUESTION_MIN_LENGTH} and {config.QUESTION_MAX_LENGTH} characters"
+
+        if not isinstance(options, (list, tuple)) or len(options) != config.OPTION_COUNT:
+            return f"Question must have exactly {config.OPTION_COUNT} options"
+
+        for i, option in enumerate(options):
+            if not option or not isinstance(option, str):
+                return f"Option {i + 1} cannot be empty"
+
+            if len(option) < config.OPTION_MIN_LENGTH or len(option) > config.OPTION_MAX_LENGTH:
+                return f"Option {i + 1} must be between {config.OPTION_MIN_LENGTH} and {config.OPTION_MAX_LENGTH} characters"
+
+        if not isinstance(correct_option, int) or isinstance(correct_option, bool) \
+                or correct_option < 0 or correct_option >= len(options):
+            return f"Correct option index must be between 0 and {len(options) - 1}"
+
+        return None
+
     def create_question(self, topic_id: str, question_text: str, options: list, correct_option: int,
                         created_by: str, is_approved: bool = False) -> Dict[str, Any]:
         """
@@ -397,34 +772,27 @@ class Database:
             is_approved (bool): Whether the question is approved (admin-created questions are auto-approved)
             
         Returns:
-            Dict[str, Any]: Created question information or error message
+            Dict[str, Any]: Created question information and the similar questions already in
+                the topic, or error message (with duplicate_of for an exact duplicate)
         """
         try:
-            if not question_text or not isinstance(question_text, str):
-                return {"status": "error", "message": "Question text cannot be empty"}
-
-            if len(question_text) < config.QUESTION_MIN_LENGTH or len(question_text) > config.QUESTION_MAX_LENGTH:
-                return {"status": "error",
-                        "message": f"Question text must be between {config.QUESTION_MIN_LENGTH} and {config.QUESTION_MAX_LENGTH} characters"}
-
-            if not options or len(options) != config.OPTION_COUNT:
-                return {"status": "error", "message": f"Question must have exactly {config.OPTION_COUNT} options"}
-
-            for i, option in enumerate(options):
-                if not option or not isinstance(option, str):
-                    return {"status": "error", "message": f"Option {i + 1} cannot be empty"}
-
-                if len(option) < config.OPTION_MIN_LENGTH or len(option) > config.OPTION_MAX_LENGTH:
-                    return {"status": "error",
-                            "message": f"Option {i + 1} must be between {config.OPTION_MIN_LENGTH} and {config.OPTION_MAX_LENGTH} characters"}
-
-            if correct_option < 0 or correct_option >= len(options):
-                return {"status": "error", "message": f"Correct option index must be between 0 and {len(options) - 1}"}
+            error = self._validate_question(question_text, options, correct_option)
+            if error:
+                return {"status": "error", "message": error}
 
-            topic = self.topics.find_one({"topic_id": topic_id})
+            topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
             if not topic:
                 return {"status": "error", "message": "Topic not found"}
 
+            question_fingerprint = fingerprint(question_text)
+            similar_questions = self.find_similar_questions(topic_id, question_text, question_fingerprint)
+            if config.DEDUP_REJECT_EXACT and similar_questions and similar_questions[0]["exact"]:
+                return {
+                    "status": "error",
+                    "message": "Duplicate question",
+                    "duplicate_of": similar_questions[0]
+                }
+
             question_id = str(uuid.uuid4())[:8]
 
             now = datetime.datetime.now()
@@ -436,6 +804,9 @@ class Database:
                 "correct_option": correct_option,
                 "created_by": created_by,
                 "is_approved": is_approved,
+                "text_hash": question_fingerprint.text_hash,
+                "dedup_bands": question_fingerprint.bands,
+                "fingerprint_version": FINGERPRINT_VERSION,
                 "created_at": now,
                 "updated_at": now
             }
@@ -450,13 +821,15 @@ class Database:
                     {"$inc": {"question_count": 1}}
                 )
                 logger.debug(f"Question {question_id} created and approved for topic {topic_id}")
+                self._notify_change(ChangeEvent.QUESTION_APPROVED, topic_id, question_data)
             else:
                 logger.debug(f"Question {question_id} created but pending approval for topic {topic_id}")
 
             return {
                 "status": "success",
                 "message": "Question created successfully",
-                "question": question_data
+                "question": question_data,
+                "similar_questions": similar_questions
             }
 
         except Exception as e:
@@ -466,6 +839,208 @@ class Database:
                 "message": f"Error creating question: {str(e)}"
             }
 
+    def find_similar_questions(self, topic_id: str, question_text: str,
+                               question_fingerprint: Optional[Fingerprint] = None,
+                               exclude_question_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Find questions of a topic with the same or nearly the same text.
+        
+        An exact duplicate is looked up by its normalized-text hash first; then
+        only questions sharing at least one MinHash band with the text are
+        fetched (both indexed), so the cost depends on the number of
+        candidates, not on the size of the topic. Candidates are scored by the
+        Jaccard similarity of their shingles.
+        
+        Args:
+            topic_id (str): ID of the topic to search
+            question_text (str): Text to compare against
+            question_fingerprint (Fingerprint, optional): Precomputed fingerprint of the text
+            exclude_question_id (str, optional): Question to leave out, e.g. the one being moderated
+            
+        Returns:
+            List[Dict[str, Any]]: question_id, text, is_approved, similarity and exact of each
+                match, exact duplicates first, then by similarity
+        """
+        question_fingerprint = question_fingerprint or fingerprint(question_text)
+        query = {"topic_id": topic_id}
+        if exclude_question_id:
+            query["question_id"] = {"$ne": exclude_question_id}
+        projection = {"question_id": 1, "text": 1, "text_hash": 1, "is_approved": 1, "_id": 0}
+
+        try:
+            # Looked up on its own so band candidates can't crowd the exact duplicate out of the limit
+            duplicate = self.questions.find_one({**query, "text_hash": question_fingerprint.text_hash}, projection)
+            candidates = self.questions.find(
+                {**query, "dedup_bands": {"$in": question_fingerprint.bands}},
+                projection,
+                limit=config.DEDUP_MAX_CANDIDATES
+            )
+            if duplicate is not None:
+                candidates = [duplicate] + [
+                    candidate for candidate in candidates
+                    if candidate["question_id"] != duplicate["question_id"]
+                ]
+
+            matches = []
+            for candidate in candidates:
+                exact = candidate.get("text_hash") == question_fingerprint.text_hash
+                score = 1.0 if exact else similarity(
+                    question_fingerprint.shingles, shingles(normalize_text(candidate.get("text", "")))
+                )
+                if exact or score >= config.DEDUP_SIMILARITY_THRESHOLD:
+                    matches.append({
+                        "question_id": candidate["question_id"],
+                        "text": candidate.get("text", ""),
+                        "is_approved": candidate.get("is_approved", False),
+                        "similarity": score,
+                        "exact": exact
+                    })
+
+            matches.sort(key=lambda match: (match["exact"], match["similarity"]), reverse=True)
+            return matches
+        except Exception as e:
+            logger.error(f"Error finding similar questions: {str(e)}")
+            return []
+
+    def backfill_question_fingerprints(self, batch_size: int = 500) -> int:
+        """
+        Add the duplicate-detection fields to questions created before they
+        existed, and recompute those of an older FINGERPRINT_VERSION.
+        
+        Returns:
+            int: Number of questions updated
+        """
+        updated = 0
+        try:
+            cursor = self.questions.find(
+                {"fingerprint_version": {"$ne": FINGERPRINT_VERSION}},
+                {"question_id": 1, "text": 1, "_id": 1},
+                batch_size=batch_size
+            )
+            operations = []
+            for question in cursor:
+                question_fingerprint = fingerprint(question.get("text") or "")
+                operations.append(UpdateOne(
+                    {"_id": question["_id"]},
+                    {"$set": {
+                        "text_hash": question_fingerprint.text_hash,
+                        "dedup_bands": question_fingerprint.bands,
+                        "fingerprint_version": FINGERPRINT_VERSION
+                    }}
+                ))
+                if len(operations) >= batch_size:
+                    updated += self.questions.bulk_write(operations, ordered=False).modified_count
+                    operations = []
+            if operations:
+                updated += self.questions.bulk_write(operations, ordered=False).modified_count
+
+            if updated:
+                logger.info(f"Updated duplicate-detection fingerprints of {updated} questions")
+            return updated
+        except Exception as e:
+            logger.error(f"Error backfilling question fingerprints: {str(e)}")
+            return updated
+
+    def import_questions(self, topic_id: str, rows: Iterable[QuestionRow], created_by: str,
+                         is_approved: bool = True, batch_size: int = None) -> Dict[str, Any]:
+        """
+        Bulk-insert questions into a topic, validating each row like create_question.
+        
+        Rows are consumed as they come, so `rows` can be a generator over a
+        file of any size. Questions whose normalized text already exists in
+        the topic (or earlier in the file) are skipped. Valid rows go out in
+        insert_many batches, and the topic counter gets a single $inc at the end.
+        
+        Args:
+            topic_id (str): ID of the topic to import into
+            rows (Iterable[QuestionRow]): Parsed rows; correct_option is 0-based
+            created_by (str): User ID recorded as the creator of the questions
+            is_approved (bool): Whether the imported questions are playable right away
+            batch_size (int, optional): Questions per insert_many. Defaults to config.IMPORT_BATCH_SIZE.
+            
+        Returns:
+            Dict[str, Any]: Status, inserted/duplicate counts and (row, message) errors
+        """
+        batch_size = batch_size or config.IMPORT_BATCH_SIZE
+        inserted = 0
+        duplicates = 0
+        errors: List[Tuple[int, str]] = []
+        error_count = 0
+
+        try:
+            if not self.topics.find_one({"topic_id": topic_id, **NOT_DELETED}, {"_id": 1}):
+                return {"status": "error", "message": "Topic not found"}
+
+            # Stored hashes of an older fingerprint version may not be backfilled yet
+            seen = {
+                question["text_hash"] if question.get("fingerprint_version") == FINGERPRINT_VERSION
+                else text_hash(question["text"])
+                for question in self.questions.find(
+                    {"topic_id": topic_id}, {"text": 1, "text_hash": 1, "fingerprint_version": 1, "_id": 0}
+                )
+                if question.get("text")
+            }
+
+            batch: List[Dict[str, Any]] = []
+            try:
+                for row in rows:
+                    error = row.error or self._validate_question(row.text, row.options, row.correct_option)
+                    if not error:
+                        question_fingerprint = fingerprint(row.text)
+                        if question_fingerprint.text_hash in seen:
+                            duplicates += 1
+                            continue
+                        seen.add(question_fingerprint.text_hash)
+
+                        now = datetime.datetime.now()
+                        batch.append({
+                            "question_id": str(uuid.uuid4())[:8],
+                            "topic_id": topic_id,
+                            "text": row.text,
+                            "options": list(row.options),
+                            "correct_option": row.correct_option,
+                            "created_by": created_by,
+                            "is_approved": is_approved,
+                            "text_hash": question_fingerprint.text_hash,
+                            "dedup_bands": question_fingerprint.bands,
+                            "fingerprint_version": FINGERPRINT_VERSION,
+                            "created_at": now,
+                            "updated_at": now
+                        })
+                        if len(batch) >= batch_size:
+                            inserted += len(self.questions.insert_many(batch, ordered=False).inserted_ids)
+                            batch = []
+                        continue
+
+                    error_count += 1
+                    if len(errors) < config.IMPORT_MAX_ERRORS:
+                        errors.append((row.row, error))
+
+                if batch:
+                    inserted += len(self.questions.insert_many(batch, ordered=False).inserted_ids)
+            finally:
+                # Count whatever made it in, even if a later batch failed
+                if is_approved and inserted:
+                    self.topics.update_one({"topic_id": topic_id}, {"$inc": {"question_count": inserted}})
+                    self._notify_change(ChangeEvent.QUESTION_APPROVED, topic_id)
+
+            logger.info(f"Imported {inserted} questions into topic {topic_id} "
+                        f"({duplicates} duplicates, {error_count} invalid rows)")
+            return {
+                "status": "success",
+                "inserted": inserted,
+                "duplicates": duplicates,
+                "error_count": error_count,
+                "errors": errors
+            }
+        except Exception as e:
+            logger.error(f"Error importing questions: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Error importing questions: {str(e)}",
+                "inserted": inserted
+            }
+
     def get_question_by_id(self, question_id: str) -> Dict[str, Any]:
         """
         Get a question by its ID.
@@ -505,14 +1080,224 @@ class Database:
 
         return {"status": "success", "questions": questions_list}
 
-    def get_pending_questions(self) -> Dict[str, Any]:
+    def iter_questions_by_topic(self, topic_id: str, only_approved: bool = True,
+                                projection: Optional[Iterable[str]] = None,
+                                batch_size: int = 500) -> Iterator[QuestionRecord]:
+        """
+        Streaming counterpart of get_questions_by_topic, ordered by question ID.
+        
+        Args:
+            topic_id (str): ID of the topic
+            only_approved (bool, optional): Whether to return only approved questions
+            projection (Iterable[str], optional): QuestionRecord fields to fetch
+            batch_size (int, optional): Number of documents fetched per round-trip
+            
+        Yields:
+            QuestionRecord: One record per question
+        """
+        query = {"topic_id": topic_id}
+        if only_approved:
+            query["is_approved"] = True
+        return self._stream_records(self.questions, query, QuestionRecord, projection, batch_size,
+                                    sort=[("question_id", 1)])
+
+    def count_questions_by_topic(self, topic_id: str, only_approved: bool = True,
+                                 before_question_id: str = None) -> int:
+        """
+        Count the questions of a topic, optionally only those ordered before a given question.
+        
+        Args:
+            topic_id (str): ID of the topic
+            only_approved (bool, optional): Whether to count only approved questions
+            before_question_id (str, optional): Only count questions whose ID sorts before this one
+            
+        Returns:
+            int: Number of matching questions
+        """
+        query = {"topic_id": topic_id}
+        if only_approved:
+            query["is_approved"] = True
+        if before_question_id is not None:
+            query["question_id"] = {"$lt": before_question_id}
+
+        return self.questions.count_documents(query)
+
+    def get_adjacent_question(self, topic_id: str, question_id: str = None, direction: str = "next",
+                              only_approved: bool = True) -> Dict[str, Any]:
+        """
+        Get the question next to (or before) a given question of a topic, ordered by question ID.
+        
+        Uses an indexed range query on question_id, so the cost does not depend on topic size.
+        The given question does not have to exist anymore (e.g. right after it was deleted).
+        
+        Args:
+            topic_id (str): ID of the topic
+            question_id (str, optional): Question to start from. If omitted, the first
+                (direction="next") or last (direction="prev") question is returned
+            direction (str, optional): "next" or "prev"
+            only_approved (bool, optional): Whether to consider only approved questions
+            
+        Returns:
+            Dict[str, Any]: Success status and question data if found
+        """
+        if direction not in ("next", "prev"):
+            raise ValueError("Direction must be either 'next' or 'prev'")
+
+        query = {"topic_id": topic_id}
+        if only_approved:
+            query["is_approved"] = True
+
+        operator, sort_order = ("$gt", 1) if direction == "next" else ("$lt", -1)
+        if question_id is not None:
+            query["question_id"] = {operator: question_id}
+
+        question = self.questions.find_one(query, sort=[("question_id", sort_order)])
+        if not question:
+            return {"status": "error", "message": "No more questions in this direction"}
+
+        return {"status": "success", "question": question}
+
+    def get_recent_question_ids(self, user_ids: List[Any], topic_id: str) -> set:
         """
-        Get all questions pending approval.
+        Get the questions of a topic that any of the given users played recently.
         
+        Args:
+            user_ids (List[Any]): IDs of the users
+            topic_id (str): ID of the topic
+            
+        Returns:
+            set: Question IDs recently seen by at least one of the users
+        """
+        if not user_ids:
+            return set()
+
+        variants = [variant for user_id in user_ids for variant in self._user_id_variants(user_id)]
+        field = f"recent_questions.{topic_id}"
+
+        seen = set()
+        for user in self.users.find({"user_id": {"$in": variants}}, {field: 1, "_id": 0}):
+            seen.update(user.get("recent_questions", {}).get(topic_id, []))
+        return seen
+
+    def mark_questions_seen(self, user_ids: List[Any], topic_id: str, question_ids: List[str]) -> Dict[str, Any]:
+        """
+        Remember that the given users played these questions.
+        
+        The per-topic list is capped at config.RECENT_QUESTIONS_LIMIT entries, oldest dropped first.
+        
+        Args:
+            user_ids (List[Any]): IDs of the users
+            topic_id (str): ID of the topic
+            question_ids (List[str]): IDs of the played questions
+            
+        Returns:
+            Dict[str, Any]: Status and message
+        """
+        if not user_ids or not question_ids:
+            return {"status": "success", "message": "Nothing to record"}
+
+        try:
+            variants = [variant for user_id in user_ids for variant in self._user_id_variants(user_id)]
+            self.users.update_many(
+                {"user_id": {"$in": variants}},
+                {"$push": {f"recent_questions.{topic_id}": {
+                    "$each": list(question_ids),
+                    "$slice": -config.RECENT_QUESTIONS_LIMIT
+                }}}
+            )
+            return {"status": "success", "message": "Seen questions recorded"}
+        except Exception as e:
+            logger.error(f"Error recording seen questions: {str(e)}")
+            return {"status": "error", "message": f"Failed to record seen questions: {str(e)}"}
+
+    def sample_questions(self, topic_id: str, count: int, user_ids: List[Any] = None,
+                         difficulty_weights: Dict[str, float] = None) -> Dict[str, Any]:
+        """
+        Draw random approved questions of a topic on the server with $sample.
+        
+        Questions that any of the given users played recently are excluded. If
+        that leaves too few questions, the rest is topped up from the recently
+        seen ones. With difficulty_weights, a larger candidate set is sampled and
+        narrowed down by weighted sampling without replacement on the question's
+        optional "difficulty" field (questions without one get weight 1).
+        
+        Args:
+            topic_id (str): ID of the topic
+            count (int): Number of questions to draw
+            user_ids (List[Any], optional): Participants whose recent questions should be avoided
+            difficulty_weights (Dict[str, float], optional): Weight per difficulty value
+            
+        Returns:
+            Dict[str, Any]: Success status and list of questions
+        """
+        projection = {"_id": 0, "question_id": 1, "topic_id": 1, "text": 1, "options": 1,
+                      "correct_option": 1, "difficulty": 1}
+
+        def draw(extra_match: Dict[str, Any], size: int) -> List[Dict[str, Any]]:
+            match = {"topic_id": topic_id, "is_approved": True, **extra_match}
+            return list(self.questions.aggregate([
+                {"$match": match},
+                {"$sample": {"size": size}},
+                {"$project": projection}
+            ]))
+
+        try:
+            # Questions of a topic being deleted are still there until the deletion job removes them
+            if not self.topics.find_one({"topic_id": topic_id, **NOT_DELETED}, {"_id": 1}):
+                return {"status": "error", "message": "Topic not found"}
+
+            seen = self.get_recent_question_ids(user_ids or [], topic_id)
+            size = count * config.QUESTION_SAMPLE_OVERSAMPLING if difficulty_weights else count
+
+            questions = draw({"question_id": {"$nin": list(seen)}} if seen else {}, size)
+            if difficulty_weights:
+                questions = self._weighted_sample(questions, count, difficulty_weights)
+
+            if len(questions) < count and seen:
+                picked = [question["question_id"] for question in questions]
+                questions += draw({"question_id": {"$in": list(seen), "$nin": picked}}, count - len(questions))
+
+            if not questions:
+                return {"status": "error", "message": "No questions found for this topic"}
+
+            return {"status": "success", "questions": questions[:count]}
+        except Exception as e:
+            logger.error(f"Error sampling questions: {str(e)}")
+            return {"status": "error", "message": f"Failed to sample questions: {str(e)}"}
+
+    @staticmethod
+    def _weighted_sample(questions: List[Dict[str, Any]], count: int,
+                         weights: Dict[str, float]) -> List[Dict[str, Any]]:
+        """
+        Weighted sampling without replacement (Efraimidis-Spirakis).
+        """
+        keyed = []
+        for question in questions:
+            weight = weights.get(question.get("difficulty"), 1.0)
+            if weight > 0:
+                keyed.append((random.random() ** (1.0 / weight), question))
+
+        keyed.sort(key=lambda item: item[0], reverse=True)
+        return [question for _, question in keyed[:count]]
+
+    def get_pending_questions(self, limit: int = None, after_question_id: str = None) -> Dict[str, Any]:
+        """
+        Get questions pending approval, ordered by question ID.
+        
+        Args:
+            limit (int, optional): Maximum number of questions to return (one page)
+            after_question_id (str, optional): Only return questions whose ID sorts after this one
+            
         Returns:
             Dict[str, Any]: Success status and list of pending questions
         """
-        questions = self.questions.find({"is_approved": False})
+        query = {"is_approved": False}
+        if after_question_id is not None:
+            query["question_id"] = {"$gt": after_question_id}
+
+        questions = self.questions.find(query).sort("question_id", 1)
+        if limit:
+            questions = questions.limit(limit)
         questions_list = list(questions)
 
         if not questions_list:
@@ -520,62 +1305,260 @@ class Database:
 
         return {"status": "success", "questions": questions_list}
 
-    def approve_question(self, question_id: str) -> Dict[str, Any]:
+    def iter_pending_questions(self, projection: Optional[Iterable[str]] = None,
+                               batch_size: int = 500) -> Iterator[QuestionRecord]:
         """
-        Approve a question.
+        Streaming counterpart of get_pending_questions, ordered by question ID.
         
         Args:
-            question_id (str): ID of the question to approve
+            projection (Iterable[str], optional): QuestionRecord fields to fetch
+            batch_size (int, optional): Number of documents fetched per round-trip
             
+        Yields:
+            QuestionRecord: One record per pending question
+        """
+        return self._stream_records(self.questions, {"is_approved": False}, QuestionRecord, projection,
+                                    batch_size, sort=[("question_id", 1)])
+
+    def get_count_of_pending_questions(self) -> int:
+        """
+        Get number of questions pending approval.
+        
         Returns:
-            Dict[str, Any]: Success status and message
+            int: Count of questions with is_approved=False
         """
-        question = self.questions.find_one({"question_id": question_id})
-        if not question:
-            return {"status": "error", "message": "Question not found"}
+        return self.questions.count_documents({"is_approved": False})
 
-        if question["is_approved"]:
-            return {"status": "error", "message": "Question is already approved"}
+    def get_topic_names(self, topic_ids: List[str]) -> Dict[str, str]:
+        """
+        Get the names of several topics with a single query.
+        
+        Args:
+            topic_ids (List[str]): IDs of the topics
+            
+        Returns:
+            Dict[str, str]: Topic names keyed by topic ID (missing topics are omitted)
+        """
+        topics = self.topics.find({"topic_id": {"$in": list(set(topic_ids))}}, {"topic_id": 1, "name": 1})
+        return {topic["topic_id"]: topic["name"] for topic in topics}
+
+    def moderate_questions(self, approve_ids: List[str] = None, reject_ids: List[str] = None) -> Dict[str, Any]:
+        """
+        Approve and reject a batch of pending questions.
+        
+        Only the questions this call actually changed are returned, so when
+        another admin moderates some of the same questions at the same time
+        nobody is notified twice or told the wrong outcome. Approvals go out
+        in one update_many that stamps the questions with a batch marker and
+        are read back by that marker. The pending questions to reject are
+        read in one find; a single bulk_write then deletes exactly those
+        that are still pending and removes the marker again. The topic
+        question counters follow in one more bulk_write.
+        
+        Args:
+            approve_ids (List[str], optional): IDs of the questions to approve
+            reject_ids (List[str], optional): IDs of the questions to reject and delete
+            
+        Returns:
+            Dict[str, Any]: Status and the approved and rejected question documents
+        """
+        approve_ids = list(approve_ids or [])
+        reject_ids = list(reject_ids or [])
+        if not approve_ids and not reject_ids:
+            return {"status": "error", "message": "No questions selected"}
 
         try:
-            self.questions.update_one(
-                {"question_id": question_id},
-                {"$set": {"is_approved": True, "updated_at": datetime.datetime.now()}}
-            )
+            approved = []
+            operations = []
+            if approve_ids:
+                moderation_id = uuid.uuid4().hex
+                self.questions.update_many(
+                    {"question_id": {"$in": approve_ids}, "is_approved": False},
+                    {"$set": {"is_approved": True, "updated_at": datetime.datetime.now(),
+                              "moderation_id": moderation_id}}
+                )
+                approved = list(self.questions.find({"moderation_id": moderation_id}, {"moderation_id": 0}))
+                if approved:
+                    operations.append(UpdateMany({"moderation_id": moderation_id}, {"$unset": {"moderation_id": ""}}))
+
+            rejected = []
+            if reject_ids:
+                rejected = list(self.questions.find({"question_id": {"$in": reject_ids}, "is_approved": False}))
+                if rejected:
+                    operations.append(DeleteMany({
+                        "_id": {"$in": [question["_id"] for question in rejected]},
+                        "is_approved": False
+                    }))
+
+            if operations:
+                result = self.questions.bulk_write(operations, ordered=False)
+                if result.deleted_count < len(rejected):
+                    # Approved or deleted by someone else between the find and the delete; one
+                    # deleted by a concurrent rejection can't be told apart and stays reported
+                    remaining = {
+                        question["_id"] for question in self.questions.find(
+                            {"_id": {"$in": [question["_id"] for question in rejected]}}, {"_id": 1}
+                        )
+                    }
+                    rejected = [question for question in rejected if question["_id"] not in remaining]
 
-            self.topics.update_one(
-                {"topic_id": question["topic_id"]},
-                {"$inc": {"question_count": 1}}
-            )
+            if not approved and not rejected:
+                return {"status": "error", "message": "Questions not found or already processed"}
+
+            topic_increments = {}
+            for question in approved:
+                topic_increments[question["topic_id"]] = topic_increments.get(question["topic_id"], 0) + 1
+
+            if topic_increments:
+                self.topics.bulk_write([
+                    UpdateOne({"topic_id": topic_id}, {"$inc": {"question_count": count}})
+                    for topic_id, count in topic_increments.items()
+                ], ordered=False)
+
+            for question in approved:
+                self._notify_change(ChangeEvent.QUESTION_APPROVED, question["topic_id"], question)
+
+            logger.debug(f"Moderated questions: {len(approved)} approved, {len(rejected)} rejected")
+            return {"status": "success", "approved": approved, "rejected": rejected}
+        except Exception as e:
+            logger.error(f"Error moderating questions: {str(e)}")
+            return {"status": "error", "message": f"Failed to moderate questions: {str(e)}"}
+
+    def _adjust_question_count(self, topic_id: str, delta: int) -> None:
+        """
+        Move the question counter of a topic after a question changed state.
+        
+        The question itself is updated atomically before this is called, so
+        only one caller ever adjusts the counter for a given change. If this
+        second write fails, reconcile_topic_question_counts repairs the counter.
+        """
+        try:
+            self.topics.update_one({"topic_id": topic_id}, {"$inc": {"question_count": delta}})
+        except Exception as e:
+            logger.error(f"Error updating question count of topic {topic_id}, "
+                         f"it will be fixed on the next reconciliation: {str(e)}")
+
+    def approve_question(self, question_id: str) -> Dict[str, Any]:
+        """
+        Approve a pending question.
+        
+        The state check and the update are a single find_one_and_update, so
+        when two admins approve the same question only one of them succeeds
+        and the topic counter is incremented once.
+        
+        Args:
+            question_id (str): ID of the question to approve
             
+        Returns:
+            Dict[str, Any]: Success status and the approved question. On error,
+                already_moderated tells whether the question exists but isn't pending anymore
+        """
+        try:
+            question = self.questions.find_one_and_update(
+                {"question_id": question_id, "is_approved": False},
+                {"$set": {"is_approved": True, "updated_at": datetime.datetime.now()}},
+                return_document=ReturnDocument.AFTER
+            )
+            if not question:
+                return self._moderation_miss(question_id)
+
+            self._adjust_question_count(question["topic_id"], 1)
             logger.debug(f"Question {question_id} approved for topic {question['topic_id']}")
-            return {"status": "success", "message": "Question approved successfully"}
+            self._notify_change(ChangeEvent.QUESTION_APPROVED, question["topic_id"], question)
+            return {"status": "success", "message": "Question approved successfully", "question": question}
         except Exception as e:
             logger.error(f"Error approving question: {str(e)}")
             return {"status": "error", "message": f"Failed to approve question: {str(e)}"}
 
-    def reject_question(self, question_id: str) -> Dict[str, Any]:
+    def reject_question(self, question_id: str, only_pending: bool = False) -> Dict[str, Any]:
         """
         Reject and delete a question.
         
+        Uses find_one_and_delete, so the question is read and removed in one
+        step and concurrent callers can't both act on it.
+        
         Args:
             question_id (str): ID of the question to reject
+            only_pending (bool, optional): Leave the question alone if it was approved meanwhile
             
         Returns:
-            Dict[str, Any]: Success status and message
+            Dict[str, Any]: Success status and the deleted question. On error,
+                already_moderated tells whether the question exists but isn't pending anymore
         """
-        question = self.questions.find_one({"question_id": question_id})
-        if not question:
-            return {"status": "error", "message": "Question not found"}
+        query = {"question_id": question_id}
+        if only_pending:
+            query["is_approved"] = False
 
         try:
-            self.questions.delete_one({"question_id": question_id})
+            question = self.questions.find_one_and_delete(query)
+            if not question:
+                return self._moderation_miss(question_id)
+
             logger.debug(f"Question {question_id} rejected and deleted")
-            return {"status": "success", "message": "Question rejected and deleted successfully"}
+            if question.get("is_approved"):
+                self._adjust_question_count(question["topic_id"], -1)
+                self._notify_change(ChangeEvent.QUESTION_REMOVED, question["topic_id"], question)
+            return {"status": "success", "message": "Question rejected and deleted successfully", "question": question}
         except Exception as e:
             logger.error(f"Error rejecting question: {str(e)}")
             return {"status": "error", "message": f"Failed to reject question: {str(e)}"}
-    
+
+    def _moderation_miss(self, question_id: str) -> Dict[str, Any]:
+        if self.questions.find_one({"question_id": question_id}, {"_id": 1}):
+            return {"status": "error", "message": "Question was already moderated", "already_moderated": True}
+        return {"status": "error", "message": "Question not found", "already_moderated": False}
+
+    def reconcile_topic_question_counts(self, topic_ids: Optional[Iterable[str]] = None) -> int:
+        """
+        Set the question counter of topics to their number of approved questions.
+        
+        Counters are maintained with $inc next to the question writes; this
+        repairs the drift left when one of those increments was lost. The
+        question write and its $inc are two steps, so a count taken between
+        them already includes a question whose $inc is still to come and the
+        counter ends up one off. Run it only while no question is being
+        moderated, i.e. at startup before polling begins. Each counter is
+        also only replaced if it still holds the value read before counting,
+        which keeps a maintenance script from racing another one.
+        
+        Args:
+            topic_ids (Iterable[str], optional): Topics to check. Defaults to all topics
+            
+        Returns:
+            int: Number of topics whose counter was corrected
+        """
+        topic_query = {"topic_id": {"$in": list(topic_ids)}} if topic_ids is not None else {}
+
+        corrected = []
+        try:
+            for topic in self._stream_records(self.topics, topic_query, TopicRecord, ("topic_id",), 500):
+                for _ in range(config.RECONCILE_MAX_ATTEMPTS):
+                    current = self.topics.find_one({"topic_id": topic.topic_id}, {"question_count": 1, "_id": 0})
+                    if current is None:
+                        break
+                    observed = current.get("question_count")
+                    expected = self.questions.count_documents({"topic_id": topic.topic_id, "is_approved": True})
+                    if observed == expected:
+                        break
+
+                    result = self.topics.update_one(
+                        {"topic_id": topic.topic_id, "question_count": observed},
+                        {"$set": {"question_count": expected}}
+                    )
+                    if result.modified_count:
+                        corrected.append(topic.topic_id)
+                        break
+                else:
+                    logger.warning(f"Question count of topic {topic.topic_id} kept changing, left for the next run")
+
+            for topic_id in corrected:
+                self._notify_change(ChangeEvent.TOPIC_CHANGED, topic_id)
+            if corrected:
+                logger.warning(f"Corrected the question count of {len(corrected)} topics")
+            return len(corrected)
+        except Exception as e:
+            logger.error(f"Error reconciling topic question counts: {str(e)}")
+            return len(corrected)
 
     def update_user_stats(self, user_id: str, correct_count: int, wrong_count: int, points: int) -> Dict[str, Any]:
         """
@@ -690,7 +1673,7 @@ class Database:
             Dict[str, Any]: Status and message
         """
         try:
-            topic = self.topics.find_one({"topic_id": topic_id})
+            topic = self.topics.find_one({"topic_id": topic_id, **NOT_DELETED})
             if not topic:
                 logger.warning(f"Topic not found for updating topic_played: {topic_id}")
                 return {"status": "warning", "message": "Topic not found"}
@@ -759,8 +1742,8 @@ class Database:
             started_users_count = self.get_count_of_started_users()
             today_users_count = self.get_count_today_users()
             
-            topics_count = self.topics.count_documents({})
-            active_topics_count = self.topics.count_documents({"is_active": True})
+            topics_count = self.topics.count_documents(NOT_DELETED)
+            active_topics_count = self.topics.count_documents({"is_active": True, **NOT_DELETED})
             
             total_questions = self.questions.count_documents({})
             approved_questions = self.questions.count_documents({"is_approved": True})
@@ -768,7 +1751,7 @@ class Database:
             
             popular_topics = []
             popular_topics_data = list(self.topics.find(
-                {}, 
+                NOT_DELETED,
                 {"topic_id": 1, "name": 1, "stats": 1}
             ).sort([("stats.topic_played", -1)]).limit(3))
             
@@ -842,16 +1825,15 @@ class Database:
                 })
             
             if not top_creators:
-                all_users = list(self.users.find())
                 users_with_quizzes = []
                 
-                for user in all_users:
-                    if "stats" in user and "quiz_created" in user["stats"] and user["stats"]["quiz_created"] > 0:
+                for user in self.iter_users(projection=("user_id", "full_name", "username", "stats")):
+                    if user.stats and user.stats.get("quiz_created", 0) > 0:
                         users_with_quizzes.append({
-                            "user_id": user["user_id"],
-                            "full_name": user.get("full_name"),
-                            "username": user.get("username"),
-                            "quiz_count": user["stats"]["quiz_created"]
+                            "user_id": user.user_id,
+                            "full_name": user.full_name,
+                            "username": user.username,
+                            "quiz_count": user.stats["quiz_created"]
                         })
                 
                 users_with_quizzes.sort(key=lambda x: x["quiz_count"], reverse=True)
@@ -876,18 +1858,25 @@ class Database:
             
             topic_counts = {}
             topic_names = {}
-            all_topics = list(self.topics.find({}, {"topic_id": 1, "name": 1}))
+            all_topics = list(self.topics.find(NOT_DELETED, {"topic_id": 1, "name": 1}))
             
             for topic in all_topics:
                 topic_id = topic["topic_id"]
                 topic_counts[topic_id] = 0
                 topic_names[topic_id] = topic["name"]
             
-            approved_questions_cursor = self.questions.find({"is_approved": True})
-            for question in approved_questions_cursor:
+            # Questions of deleted topics are waiting for the background purge, they aren't orphans
+            deleting_topics = {topic["topic_id"] for topic in self.get_topics_being_deleted()}
+            invalid_topics = []
+
+            for question in self.questions.find({"is_approved": True}, {"topic_id": 1, "question_id": 1, "_id": 0}):
                 topic_id = question.get("topic_id")
+                if topic_id in deleting_topics:
+                    continue
                 if topic_id in topic_counts:
                     topic_counts[topic_id] += 1
+                else:
+                    invalid_topics.append(question.get("question_id", "unknown"))
             
             for topic_id, count in topic_counts.items():
                 questions_per_topic.append({
@@ -898,16 +1887,6 @@ class Database:
             
             questions_per_topic.sort(key=lambda x: x["question_count"], reverse=True)
             
-            invalid_topics = []
-            topic_ids = set(topic_names.keys())
-            invalid_count = 0
-            
-            for question in self.questions.find({"is_approved": True}):
-                topic_id = question.get("topic_id")
-                if not topic_id or topic_id not in topic_ids:
-                    invalid_count += 1
-                    invalid_topics.append(question.get("question_id", "unknown"))
-            
             logger.info(f"Generated bot statistics: {users_count} users, {topics_count} topics, {total_questions} questions")
             
             return {
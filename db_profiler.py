@@ -0,0 +1,267 @@
+import contextvars
+import functools
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterator, Callable
+
+from pymongo import monitoring
+
+import config
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Commands whose filter is worth showing and explaining
+QUERY_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+
+# Latencies kept per method for the percentiles
+LATENCY_SAMPLES = 1000
+
+db_call_latency = registry.histogram(
+    "bot_db_call_latency_seconds", "Time spent in Database methods", ("method",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class MethodStats:
+    __slots__ = ("calls", "errors", "documents", "total_time", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.documents = 0
+        self.total_time = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CallTrace:
+    """
+    Commands sent to MongoDB while one Database method was running.
+    """
+    __slots__ = ("method", "commands", "documents")
+
+    def __init__(self, method: str):
+        self.method = method
+        self.commands: List[Dict[str, Any]] = []
+        self.documents = 0
+
+
+_current_trace: contextvars.ContextVar[Optional[CallTrace]] = contextvars.ContextVar("db_call_trace", default=None)
+
+
+def filter_shape(value: Any) -> Any:
+    """
+    Replace the values of a query with placeholders, keeping field names and operators.
+    """
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [filter_shape(item) for item in value]
+        return f"[{len(value)}]"
+    return "?"
+
+
+def _command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter", command.get("query"))
+    if command_name == "aggregate":
+        return [stage for stage in command.get("pipeline", []) if "$match" in stage or "$sample" in stage]
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return [statement.get("q") for statement in statements[:3]]
+    if command_name == "findAndModify":
+        return command.get("query")
+    return None
+
+
+class CommandTracer(monitoring.CommandListener):
+    """
+    Attributes MongoDB commands and returned documents to the Database method that issued them.
+    """
+
+    def __init__(self):
+        self._started: Dict[int, Dict[str, Any]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        trace = _current_trace.get()
+        if trace is None or event.command_name not in QUERY_COMMANDS:
+            return
+        entry = {
+            "command": event.command_name,
+            "collection": event.command.get(event.command_name),
+            "filter": filter_shape(_command_filter(event.command_name, event.command)),
+        }
+        if config.DB_PROFILE_EXPLAIN and event.command_name in EXPLAINABLE_COMMANDS:
+            entry["raw"] = {
+                key: value for key, value in event.command.items()
+                if not key.startswith("$") and key not in ("lsid", "txnNumber")
+            }
+        trace.commands.append(entry)
+        self._started[event.request_id] = entry
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        entry = self._started.pop(event.request_id, None)
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        if entry is not None:
+            entry["duration"] = event.duration_micros / 1e6
+
+        cursor = event.reply.get("cursor")
+        if cursor:
+            trace.documents += len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._started.pop(event.request_id, None)
+
+
+command_tracer = CommandTracer()
+
+
+class DatabaseProfiler:
+    """
+    Wraps the public methods of a Database instance to record call counts,
+    latency percentiles and documents returned per method.
+
+    Calls slower than config.DB_SLOW_CALL_THRESHOLD are logged with the shape
+    of the filters they sent; with config.DB_PROFILE_EXPLAIN set, the query
+    plans of those filters are logged as well. Methods returning iterators
+    are timed while they are being consumed.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.stats: Dict[str, MethodStats] = {}
+
+    def install(self) -> None:
+        for name, method in inspect.getmembers(self.db, inspect.ismethod):
+            if name.startswith("_") or name == "add_change_listener":
+                continue
+            self.stats[name] = MethodStats()
+            wrapper = self._wrap_generator(name, method) if inspect.isgeneratorfunction(method) else self._wrap(name, method)
+            setattr(self.db, name, wrapper)
+
+    def reset(self) -> None:
+        for name in self.stats:
+            self.stats[name] = MethodStats()
+
+    def top(self, limit: int = 10, key: str = "total_time") -> List[Dict[str, Any]]:
+        """
+        Methods ordered by the given statistic, most expensive first.
+        """
+        rows = [
+            {
+                "method": name,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "documents": stats.documents,
+                "total_time": stats.total_time,
+                "p50": stats.percentile(0.5),
+                "p95": stats.percentile(0.95),
+                "p99": stats.percentile(0.99),
+            }
+            for name, stats in self.stats.items() if stats.calls
+        ]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def _record(self, name: str, trace: CallTrace, elapsed: float, failed: bool) -> None:
+        stats = self.stats[name]
+        stats.calls += 1
+        stats.errors += failed
+        stats.documents += trace.documents
+        stats.total_time += elapsed
+        stats.latencies.append(elapsed)
+        db_call_latency.observe(name, value=elapsed)
+
+        if elapsed >= config.DB_SLOW_CALL_THRESHOLD:
+            self._log_slow_call(trace, elapsed)
+
+    def _log_slow_call(self, trace: CallTrace, elapsed: float) -> None:
+        shapes = [
+            f"{entry['command']} {entry['collection']} {entry['filter']} ({entry.get('duration', 0) * 1000:.1f} ms)"
+            for entry in trace.commands
+        ]
+        logger.warning(
+            f"Slow database call {trace.method} took {elapsed * 1000:.1f} ms, "
+            f"{trace.documents} documents: {'; '.join(shapes) or 'no queries'}"
+        )
+
+        if not config.DB_PROFILE_EXPLAIN:
+            return
+        for entry in trace.commands:
+            if "raw" not in entry:
+                continue
+            try:
+                plan = self.db.db.command("explain", entry["raw"], verbosity="queryPlanner")
+                logger.debug(f"Query plan of {trace.method}: {plan.get('queryPlanner', {}).get('winningPlan')}")
+            except Exception as e:
+                logger.debug(f"Could not explain {entry['command']} of {trace.method}: {e}")
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            trace = CallTrace(name)
+            token = _current_trace.set(trace)
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = isinstance(result, dict) and result.get("status") == "error"
+                return result
+            finally:
+                _current_trace.reset(token)
+                self._record(name, trace, time.perf_counter() - started, failed)
+
+        return wrapper
+
+    def _wrap_generator(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs) -> Iterator[Any]:
+            trace = CallTrace(name)
+            iterator = method(*args, **kwargs)
+            elapsed = 0.0
+            failed = True
+            try:
+                while True:
+                    token = _current_trace.set(trace)
+                    started = time.perf_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        failed = False
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - started
+                        _current_trace.reset(token)
+                    yield item
+            except GeneratorExit:
+                # The caller stopped early, e.g. after taking the first window
+                failed = False
+                raise
+            finally:
+                iterator.close()
+                self._record(name, trace, elapsed, failed)
+
+        return wrapper
+
+
+def profile_database(db) -> Optional[DatabaseProfiler]:
+    """
+    Install the profiler on a Database instance if profiling is enabled.
+    """
+    if not config.DB_PROFILING:
+        return None
+    profiler = DatabaseProfiler(db)
+    profiler.install()
+    return profiler
@@ -0,0 +1,127 @@
+import hashlib
+import random
+import re
+import unicodedata
+from typing import List, NamedTuple, FrozenSet
+
+import config
+
+# Arabic letter forms Persian keyboards mix in, mapped to their Persian forms
+CHARACTER_MAP = str.maketrans({
+    "ي": "ی",
+    "ى": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "أ": "ا",
+    "إ": "ا",
+    "آ": "ا",
+    "‌": " ",  # zero-width non-joiner
+    "ـ": None,  # tatweel
+    "ँ": "ं",  # Devanagari chandrabindu, written interchangeably with anusvara
+    "।": " ",  # Devanagari danda
+})
+WHITESPACE = re.compile(r"\s+")
+
+# Canonical combining classes of the nukta and the virama; in Indic scripts they change the letter
+# itself, unlike accents and Arabic harakat, so they survive normalization
+KEPT_COMBINING_CLASSES = frozenset((7, 9))
+
+# Stored with every question's text_hash and dedup_bands; bump it whenever normalize_text, the
+# shingles or the MinHash parameters change, so Database.backfill_question_fingerprints recomputes them
+FINGERPRINT_VERSION = 2
+
+# Mersenne prime for the MinHash permutations; keeps every value inside a signed 64-bit int
+MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(config.DEDUP_NUM_PERM)
+]
+ROWS_PER_BAND = config.DEDUP_NUM_PERM // config.DEDUP_BANDS
+
+
+class Fingerprint(NamedTuple):
+    """Duplicate-detection keys of a question text."""
+    text_hash: str
+    bands: List[str]
+    shingles: FrozenSet[str]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Reduce a text to what matters for comparing it: case, punctuation,
+    diacritics, digit scripts and Arabic/Persian letter variants are ignored.
+
+    Letters, digits and marks are kept; Devanagari vowel signs, the virama
+    and the nukta are marks, so Hindi words stay whole.
+    """
+    text = unicodedata.normalize("NFKC", text).translate(CHARACTER_MAP).casefold()
+    text = "".join(
+        char for char in text
+        if not unicodedata.combining(char) or unicodedata.combining(char) in KEPT_COMBINING_CLASSES
+    )
+    # Persian and Arabic-Indic digits become ASCII digits
+    text = "".join(str(unicodedata.digit(char)) if char.isdigit() else char for char in text)
+    text = "".join(char if unicodedata.category(char)[0] in "LNM" else " " for char in text)
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def _hash_normalized(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    return _hash_normalized(normalize_text(text))
+
+
+def shingles(normalized: str, size: int = config.DEDUP_SHINGLE_SIZE) -> FrozenSet[str]:
+    """
+    Character n-grams; questions are short, so characters beat word shingles.
+    """
+    if len(normalized) <= size:
+        return frozenset([normalized]) if normalized else frozenset()
+    return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+
+def minhash(shingle_set: FrozenSet[str]) -> List[int]:
+    values = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big") % MERSENNE_PRIME
+        for shingle in shingle_set
+    ] or [0]
+    return [min((a * value + b) % MERSENNE_PRIME for value in values) for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(signature: List[int]) -> List[str]:
+    """
+    Split a MinHash signature into bands and hash each one.
+
+    Two questions share at least one band key with a probability that rises
+    steeply around a Jaccard similarity of (1/bands) ** (1/rows), so looking
+    up the band keys finds the near duplicates without scanning the topic.
+    """
+    bands = []
+    for band in range(config.DEDUP_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(repr(rows).encode("ascii"), digest_size=6).hexdigest()
+        bands.append(f"{band}:{digest}")
+    return bands
+
+
+def fingerprint(text: str) -> Fingerprint:
+    normalized = normalize_text(text)
+    shingle_set = shingles(normalized)
+    return Fingerprint(
+        text_hash=_hash_normalized(normalized),
+        bands=lsh_bands(minhash(shingle_set)),
+        shingles=shingle_set
+    )
+
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """
+    Jaccard similarity of two shingle sets.
+    """
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
@@ -1,5 +1,5 @@
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -12,6 +12,7 @@ from bot import db, bot
 import logging
 from typing import Optional, Dict, Any, List, Union
 from .start_bot import main_menu_keyboard, welcome_message
+from .topic_picker import topic_picker
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,7 @@ MESSAGES = {
     "confirm_delete": "⚠️ آیا از حذف این سوال اطمینان دارید؟" + SPONSOR_FOOTER,
     "deleted": "✅ سوال با موفقیت حذف شد." + SPONSOR_FOOTER,
     "error": "❌ خطایی رخ داده است: {error}" + SPONSOR_FOOTER,
+    "no_more_questions": "📭 سوال دیگری در این جهت وجود ندارد.",
     "welcome_back": "👋 {full_name} عزیز، خوش آمدید!" + SPONSOR_FOOTER,
     
     "btn_prev": "◀️ قبلی",
@@ -82,44 +84,30 @@ async def safe_edit_message(message: Message, text: str, reply_markup: Optional[
         logger.error(f"Error editing message: {e}")
         return False
 
-def get_topics_keyboard() -> Optional[InlineKeyboardMarkup]:
+def get_topics_keyboard(name_filter: Optional[str] = None) -> Optional[InlineKeyboardMarkup]:
 
-    topics = db.get_all_topics()
-    if not topics:
-        return None
-        
-    kb = InlineKeyboardBuilder()
-    for topic in topics:
-        if topic.get("is_active", True):  # Only show active topics
-            kb.button(text=topic["name"], callback_data=f"delete_question_topic_{topic['topic_id']}")
-    
-    kb.button(text=MESSAGES["btn_cancel"], callback_data="delete_question_cancel")
-    kb.adjust(2)
-    return kb.as_markup()
+    return topic_picker.keyboard("delete_question_topic_", "delete_question_cancel",
+                                 only_active=True, name_filter=name_filter)
 
-def get_question_navigation_keyboard(current_idx: int, total_questions: int, question_id: str) -> InlineKeyboardMarkup:
+def get_question_navigation_keyboard(has_prev: bool, has_next: bool, question_id: str) -> InlineKeyboardMarkup:
   
     kb = InlineKeyboardBuilder()
     
-    if total_questions > 1:
-        if current_idx > 0:
-            kb.button(text=MESSAGES["btn_prev"], callback_data=f"delete_question_nav_prev_{current_idx}")
-        
-        if current_idx < total_questions - 1:
-            kb.button(text=MESSAGES["btn_next"], callback_data=f"delete_question_nav_next_{current_idx}")
+    if has_prev:
+        kb.button(text=MESSAGES["btn_prev"], callback_data=f"delete_question_nav_prev_{question_id}")
+    
+    if has_next:
+        kb.button(text=MESSAGES["btn_next"], callback_data=f"delete_question_nav_next_{question_id}")
     
     kb.button(text=MESSAGES["btn_delete"], callback_data=f"delete_question_confirm_{question_id}")
     
     kb.button(text=MESSAGES["btn_back_to_topics"], callback_data="delete_question_back_to_topics")
     kb.button(text=MESSAGES["btn_cancel"], callback_data="delete_question_cancel")
     
-    if total_questions > 1:
-        if current_idx > 0 and current_idx < total_questions - 1:
-            kb.adjust(2, 1, 1, 1)
-        else:
-            kb.adjust(1, 1, 1, 1)
+    if has_prev and has_next:
+        kb.adjust(2, 1, 1, 1)
     else:
-        kb.adjust(1, 1, 1)
+        kb.adjust(1, 1, 1, 1)
         
     return kb.as_markup()
 
@@ -132,12 +120,12 @@ def get_confirmation_keyboard(question_id: str) -> InlineKeyboardMarkup:
     return kb.as_markup()
 
 @delete_question_router.message(Command("delete_question"), F.from_user.id == config.ADMIN_ID)
-async def cmd_delete_question(message: Message, state: FSMContext) -> None:
+async def cmd_delete_question(message: Message, command: CommandObject, state: FSMContext) -> None:
 
     try:
         await state.clear()
         
-        keyboard = get_topics_keyboard()
+        keyboard = get_topics_keyboard(command.args)
         if not keyboard:
             await message.answer(
                 MESSAGES["no_topics"],
@@ -216,60 +204,75 @@ async def topic_selected(callback: CallbackQuery, state: FSMContext) -> None:
             await state.clear()
             return
             
-        topic = topic_response["topic"]
-        topic_name = topic["name"]
-        
+        topic_name = topic_response["topic"]["name"]
 
-        questions_response = db.get_questions_by_topic(topic_id)
-        if questions_response["status"] == "error":
+        question_response = db.get_adjacent_question(topic_id, direction="next")
+        if question_response["status"] == "error":
             await safe_edit_message(
                 callback.message,
                 MESSAGES["no_questions"]
             )
             await callback.answer()
             return
-            
-        questions = questions_response["questions"]
-        
-        await state.update_data(
-            topic_id=topic_id,
-            topic_name=topic_name,
-            current_idx=0,
-            questions=questions
-        )
         
+        await state.set_data({"topic_id": topic_id})
         await state.set_state(DeleteQuestionStates.viewing_questions)
-        await show_question(callback, state, 0)
-        logger.info(f"Admin {callback.from_user.id} selected topic {topic_id} ({topic_name}) with {len(questions)} questions")
+        await show_question(callback, state, question_response["question"], topic_name)
+        logger.info(f"Admin {callback.from_user.id} selected topic {topic_id} ({topic_name})")
     except Exception as e:
         logger.error(f"Error selecting topic: {e}")
         await callback.answer()
 
+async def navigate(callback: CallbackQuery, state: FSMContext, direction: str) -> None:
+
+    question_id = callback.data.split("_")[4]
+    
+    try:
+        data = await state.get_data()
+        topic_id = data.get("topic_id")
+        
+        response = db.get_adjacent_question(topic_id, question_id, direction)
+        if response["status"] == "error":
+            await callback.answer(MESSAGES["no_more_questions"])
+            return
+        
+        await show_question(callback, state, response["question"])
+        await callback.answer()
+        logger.info(f"Admin {callback.from_user.id} navigated to {direction} question from {question_id}")
+    except Exception as e:
+        logger.error(f"Error navigating questions: {e}")
+        await callback.answer()
+
 @delete_question_router.callback_query(F.data.startswith("delete_question_nav_prev_"))
 async def navigate_to_prev(callback: CallbackQuery, state: FSMContext) -> None:
 
-    current_idx = int(callback.data.split("_")[4])
-    await show_question(callback, state, current_idx - 1)
-    logger.info(f"Admin {callback.from_user.id} navigated to previous question (index {current_idx-1})")
+    await navigate(callback, state, "prev")
 
 @delete_question_router.callback_query(F.data.startswith("delete_question_nav_next_"))
 async def navigate_to_next(callback: CallbackQuery, state: FSMContext) -> None:
 
-    current_idx = int(callback.data.split("_")[4])
-    await show_question(callback, state, current_idx + 1)
-    logger.info(f"Admin {callback.from_user.id} navigated to next question (index {current_idx+1})")
+    await navigate(callback, state, "next")
 
 @delete_question_router.callback_query(F.data.startswith("delete_question_view_"))
 async def view_specific_question(callback: CallbackQuery, state: FSMContext) -> None:
 
+    question_id = callback.data.split("_")[3]
+
     try:
-        data = await state.get_data()
-        questions = data.get("questions", [])
-        current_idx = data.get("current_idx", 0)
+        response = db.get_question_by_id(question_id)
+        if response["status"] == "error":
+            await safe_edit_message(
+                callback.message,
+                MESSAGES["no_questions"]
+            )
+            await state.clear()
+            await callback.answer()
+            return
         
         await state.set_state(DeleteQuestionStates.viewing_questions)
         
-        await show_question(callback, state, current_idx)
+        await show_question(callback, state, response["question"])
+        await callback.answer()
         logger.info(f"Admin {callback.from_user.id} cancelled question deletion and returned to view")
     except Exception as e:
         logger.error(f"Error viewing specific question: {e}")
@@ -314,13 +317,14 @@ async def delete_question(callback: CallbackQuery, state: FSMContext) -> None:
         logger.info(f"Admin {callback.from_user.id} deleted question {question_id}")
         
         data = await state.get_data()
-        questions = data.get("questions", [])
-        current_idx = data.get("current_idx", 0)
         topic_id = data.get("topic_id")
         
-        updated_questions_response = db.get_questions_by_topic(topic_id)
+        # The deleted ID still works as a range boundary for finding its neighbours
+        neighbour_response = db.get_adjacent_question(topic_id, question_id, "next")
+        if neighbour_response["status"] == "error":
+            neighbour_response = db.get_adjacent_question(topic_id, question_id, "prev")
         
-        if updated_questions_response["status"] == "error":
+        if neighbour_response["status"] == "error":
             await safe_edit_message(
                 callback.message,
                 MESSAGES["no_questions"]
@@ -328,42 +332,30 @@ async def delete_question(callback: CallbackQuery, state: FSMContext) -> None:
             await state.clear()
             await callback.answer()
             return
-            
-        updated_questions = updated_questions_response["questions"]
-        
-        await state.update_data(questions=updated_questions)
-        
-        if current_idx >= len(updated_questions):
-            current_idx = max(0, len(updated_questions) - 1)
-            await state.update_data(current_idx=current_idx)
         
         await callback.answer(MESSAGES["deleted"])
         
-        await show_question(callback, state, current_idx)
+        await show_question(callback, state, neighbour_response["question"])
     except Exception as e:
         logger.error(f"Error deleting question: {e}")
         await callback.answer()
 
-async def show_question(callback: CallbackQuery, state: FSMContext, idx: int) -> None:
+async def show_question(callback: CallbackQuery, state: FSMContext, question: Dict[str, Any],
+                        topic_name: Optional[str] = None) -> None:
 
     try:
-        data = await state.get_data()
-        questions = data.get("questions", [])
-        topic_name = data.get("topic_name", "Unknown")
+        topic_id = question["topic_id"]
+        question_id = question["question_id"]
+        creator_id = question["created_by"]
         
-        if not questions or idx < 0 or idx >= len(questions):
-            await safe_edit_message(
-                callback.message,
-                MESSAGES["no_questions"]
-            )
-            await state.clear()
-            return
+        await state.update_data(topic_id=topic_id, question_id=question_id)
         
-        await state.update_data(current_idx=idx)
+        if topic_name is None:
+            topic_response = db.get_topic_by_id(topic_id)
+            topic_name = topic_response["topic"]["name"] if topic_response["status"] == "success" else "Unknown"
         
-        question = questions[idx]
-        question_id = question["question_id"]
-        creator_id = question["created_by"]
+        position = db.count_questions_by_topic(topic_id, before_question_id=question_id)
+        total = db.count_questions_by_topic(topic_id)
         
         creator_info = f"User ID {creator_id}"
         try:
@@ -383,8 +375,8 @@ async def show_question(callback: CallbackQuery, state: FSMContext, idx: int) ->
             logger.error(f"Error getting creator info: {e}")
         
         question_text = MESSAGES["view_question"].format(
-            current_idx=idx + 1,
-            total=len(questions),
+            current_idx=position + 1,
+            total=total,
             topic_name=topic_name,
             question_text=question["text"],
             option_1=question["options"][0],
@@ -398,7 +390,11 @@ async def show_question(callback: CallbackQuery, state: FSMContext, idx: int) ->
             is_approved=question["is_approved"]
         )
         
-        keyboard = get_question_navigation_keyboard(idx, len(questions), question_id)
+        keyboard = get_question_navigation_keyboard(
+            has_prev=position > 0,
+            has_next=position < total - 1,
+            question_id=question_id
+        )
         
         await safe_edit_message(
             callback.message,
@@ -1,5 +1,5 @@
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
@@ -8,10 +8,15 @@ from aiogram.exceptions import TelegramBadRequest
 from aiogram.enums import ParseMode
 
 import config
-from bot import db
+from bot import db, bot
+import asyncio
 import logging
+import time
+from html import escape
 from typing import Optional, Dict, Any, List
+from session_store import close_topic_lobbies
 from .start_bot import main_menu_keyboard, welcome_message
+from .topic_picker import topic_picker
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +48,14 @@ MESSAGES = {
 ⚠️ هشدار: این عملیات قابل بازگشت نیست!
 """ + SPONSOR_FOOTER,
     "deleted": "✅ موضوع '{name}' با موفقیت حذف شد." + SPONSOR_FOOTER,
+    "progress": """
+🗑️ <b>حذف موضوع '{name}' {status}</b>
+
+❓ سوالات حذف شده: <b>{deleted}/{total}</b>
+""" + SPONSOR_FOOTER,
+    "status_running": "در حال انجام...",
+    "status_done": "به پایان رسید",
+    "status_failed": "متوقف شد (خطا)، با راه‌اندازی مجدد ربات ادامه می‌یابد",
     "canceled": "❌ حذف موضوع لغو شد." + SPONSOR_FOOTER,
     "error": "❌ خطایی رخ داده است: {error}" + SPONSOR_FOOTER,
     "welcome_back": "👋 {full_name} عزیز، خوش آمدید!" + SPONSOR_FOOTER,
@@ -75,19 +88,9 @@ async def safe_edit_message(message: Message, text: str, reply_markup: Optional[
         return False
 
 
-def get_topics_list_keyboard() -> Optional[InlineKeyboardMarkup]:
+def get_topics_list_keyboard(name_filter: Optional[str] = None) -> Optional[InlineKeyboardMarkup]:
 
-    topics = db.get_all_topics()
-    if not topics:
-        return None
-
-    kb = InlineKeyboardBuilder()
-    for topic in topics:
-        kb.button(text=topic["name"], callback_data=f"delete_view_{topic['topic_id']}")
-
-    kb.button(text=MESSAGES["btn_cancel"], callback_data="delete_cancel")
-    kb.adjust(2)
-    return kb.as_markup()
+    return topic_picker.keyboard("delete_view_", "delete_cancel", name_filter=name_filter)
 
 
 def get_confirmation_keyboard(topic_id: str) -> InlineKeyboardMarkup:
@@ -100,11 +103,111 @@ def get_confirmation_keyboard(topic_id: str) -> InlineKeyboardMarkup:
 
 
 
+_deletion_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def report_deletion_progress(job: Dict[str, Any], status: str) -> None:
+
+    if not job.get("admin_chat_id") or not job.get("progress_message_id"):
+        return
+
+    try:
+        await bot.edit_message_text(
+            chat_id=job["admin_chat_id"],
+            message_id=job["progress_message_id"],
+            text=MESSAGES["progress"].format(
+                name=escape(job["name"]), status=MESSAGES[status], deleted=job["deleted"], total=job["total"]
+            ),
+            parse_mode=ParseMode.HTML
+        )
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e).lower():
+            logger.warning(f"Could not update topic deletion progress: {e}")
+    except Exception as e:
+        logger.warning(f"Could not update topic deletion progress: {e}")
+
+
+async def run_topic_deletion(topic_id: str, job: Dict[str, Any]) -> None:
+    """
+    Remove the questions of a topic marked as deleted, then the topic itself.
+
+    Questions go in chunks of config.TOPIC_DELETE_BATCH_SIZE with a pause
+    in between, each chunk in a worker thread, so neither the event loop
+    nor the database is held up by a big topic. Progress is recorded on the
+    topic document after every chunk; an interrupted deletion continues
+    on the next start (see resume_topic_deletions).
+    """
+    status = "status_done"
+    last_report = time.monotonic()
+    await report_deletion_progress(job, "status_running")
+
+    try:
+        while True:
+            deleted = await asyncio.to_thread(db.delete_topic_questions, topic_id, config.TOPIC_DELETE_BATCH_SIZE)
+            if not deleted:
+                break
+            job["deleted"] += deleted
+
+            now = time.monotonic()
+            if now - last_report >= config.TOPIC_DELETE_PROGRESS_INTERVAL:
+                last_report = now
+                await report_deletion_progress(job, "status_running")
+            await asyncio.sleep(config.TOPIC_DELETE_PAUSE)
+
+        await asyncio.to_thread(db.finish_topic_deletion, topic_id)
+    except asyncio.CancelledError:
+        logger.info(f"Deletion of topic {topic_id} interrupted, it resumes on the next start")
+        raise
+    except Exception as e:
+        status = "status_failed"
+        logger.error(f"Error deleting questions of topic {topic_id}: {e}")
+    finally:
+        _deletion_tasks.pop(topic_id, None)
+
+    # The total was counted before the deletion started; pending questions may have been added since
+    job["total"] = max(job["total"], job["deleted"])
+    await report_deletion_progress(job, status)
+    logger.info(f"Deletion of topic {topic_id} finished: {job['deleted']} questions removed")
+
+
+def start_topic_deletion(topic_id: str, job: Dict[str, Any]) -> None:
+
+    if topic_id not in _deletion_tasks:
+        _deletion_tasks[topic_id] = asyncio.create_task(run_topic_deletion(topic_id, job))
+
+
+def resume_topic_deletions() -> int:
+    """
+    Resume topic deletions interrupted by a restart or an error.
+
+    Returns:
+        int: Number of deletions resumed
+    """
+    try:
+        topics = db.get_topics_being_deleted()
+    except Exception as e:
+        logger.error(f"Error loading interrupted topic deletions: {e}")
+        return 0
+
+    for topic in topics:
+        deletion = topic.get("deletion") or {}
+        start_topic_deletion(topic["topic_id"], {
+            "name": topic.get("name", "Unknown"),
+            "admin_chat_id": deletion.get("admin_chat_id"),
+            "progress_message_id": deletion.get("progress_message_id"),
+            "total": deletion.get("total", 0),
+            "deleted": deletion.get("deleted", 0),
+        })
+    if topics:
+        logger.info(f"Resumed deletion of {len(topics)} topics")
+    return len(topics)
+
+
 @delete_topic_router.message(Command("delete_topic"), F.from_user.id == config.ADMIN_ID)
-async def cmd_delete_topic(message: Message) -> None:
+async def cmd_delete_topic(message: Message, command: CommandObject) -> None:
 
     try:
-        keyboard = get_topics_list_keyboard()
+        keyboard = get_topics_list_keyboard(command.args)
         if not keyboard:
             await message.answer(
                 MESSAGES["not_found"],
@@ -194,16 +297,31 @@ async def confirm_topic_deletion(callback: CallbackQuery, state: FSMContext) ->
         data = await state.get_data()
         topic_name = data.get("topic_name", "Unknown")
 
-        db.delete_topic(topic_id)
-        
-        logger.info(f"Admin {callback.from_user.id} deleted topic {topic_id} ({topic_name})")
+        # The confirmation message turns into the progress report of the deletion
+        progress_message = await callback.message.edit_text(
+            MESSAGES["progress"].format(name=escape(topic_name), status=MESSAGES["status_running"], deleted=0, total="?"),
+            parse_mode=ParseMode.HTML
+        )
 
-        await state.clear()
+        response = db.delete_topic(topic_id, callback.message.chat.id, progress_message.message_id)
+        if response["status"] != "success":
+            await safe_edit_message(callback.message, MESSAGES["not_found"])
+            await state.clear()
+            await callback.answer()
+            return
 
-        try:
-            await callback.message.delete()
-        except TelegramBadRequest:
-            logger.debug("Could not delete message, it might be too old")
+        closed = close_topic_lobbies(topic_id)
+        start_topic_deletion(topic_id, {
+            "name": topic_name,
+            "admin_chat_id": callback.message.chat.id,
+            "progress_message_id": progress_message.message_id,
+            "total": response["question_count"],
+            "deleted": 0,
+        })
+        logger.info(f"Admin {callback.from_user.id} deleted topic {topic_id} ({topic_name}), "
+                    f"{response['question_count']} questions queued for removal, {closed} open quizzes closed")
+
+        await state.clear()
 
         await callback.message.answer(
             text=welcome_message.format(full_name=callback.from_user.full_name, bot_name=config.BOT_NAME),
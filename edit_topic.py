@@ -1,5 +1,5 @@
 from aiogram import Router, F
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
@@ -12,6 +12,7 @@ import config
 import logging
 from typing import Optional, Dict, Any, Union, List
 from .start_bot import main_menu_keyboard, welcome_message
+from .topic_picker import topic_picker
 
 logger = logging.getLogger(__name__)
 
@@ -108,26 +109,16 @@ def get_topic_edit_keyboard(topic_id: str) -> InlineKeyboardMarkup:
     return kb.as_markup()
 
 
-def get_topics_list_keyboard() -> Optional[InlineKeyboardMarkup]:
+def get_topics_list_keyboard(name_filter: Optional[str] = None) -> Optional[InlineKeyboardMarkup]:
  
-    topics = db.get_all_topics()
-    if not topics:
-        return None
-
-    kb = InlineKeyboardBuilder()
-    for topic in topics:
-        kb.button(text=topic["name"], callback_data=f"view_{topic['topic_id']}")
-
-    kb.button(text=MESSAGES["btn_cancel"], callback_data="edit_cancel")
-    kb.adjust(2)
-    return kb.as_markup()
+    return topic_picker.keyboard("view_", "edit_cancel", name_filter=name_filter)
 
 
 @edit_topic_router.message(Command("edit_topic"), F.from_user.id == config.ADMIN_ID)
-async def cmd_edit_topic(message: Message) -> None:
+async def cmd_edit_topic(message: Message, command: CommandObject) -> None:
 
     try:
-        keyboard = get_topics_list_keyboard()
+        keyboard = get_topics_list_keyboard(command.args)
         if not keyboard:
             await message.answer(
                 MESSAGES["not_found"],
@@ -0,0 +1,274 @@
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, FSInputFile
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ParseMode
+
+import asyncio
+import csv
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Callable
+
+import config
+from bot import db
+from .topic_picker import topic_picker
+
+logger = logging.getLogger(__name__)
+
+export_data_router = Router(name="export_data")
+
+SPONSOR_FOOTER = f" "
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+USER_STATS_FIELDS = ("total_quiz", "total_correct", "total_wrong", "total_points", "quiz_created")
+USER_COLUMNS = ["user_id", "username", "full_name", "has_start"] + list(USER_STATS_FIELDS)
+# Same columns /import_questions reads, so an export can be imported again
+QUESTION_COLUMNS = ["question_id", "question"] + [f"option_{i + 1}" for i in range(config.OPTION_COUNT)] + \
+                   ["correct_option", "created_by", "is_approved"]
+
+MESSAGES = {
+    "select_topic": "📤 موضوعی که سوالات آن باید خروجی گرفته شود را انتخاب کنید ({format}):" + SPONSOR_FOOTER,
+    "no_topics": "📭 هیچ موضوعی یافت نشد." + SPONSOR_FOOTER,
+    "usage_questions": "ℹ️ استفاده: /export_questions [csv|jsonl]" + SPONSOR_FOOTER,
+    "usage_users": "ℹ️ استفاده: /export_users [csv|jsonl]" + SPONSOR_FOOTER,
+    "export_started": "⏳ در حال آماده‌سازی خروجی {name}..." + SPONSOR_FOOTER,
+    "export_progress": "⏳ خروجی {name}: {written} از {total} ردیف ({percent}٪)" + SPONSOR_FOOTER,
+    "export_done": "✅ خروجی {name} آماده شد: {written} ردیف" + SPONSOR_FOOTER,
+    "export_too_large": "⚠️ فایل خروجی ({size} مگابایت) برای ارسال در تلگرام بزرگ است." + SPONSOR_FOOTER,
+    "export_busy": "⚠️ یک خروجی دیگر در حال آماده‌سازی است. لطفاً صبر کنید." + SPONSOR_FOOTER,
+    "error": "❌ خطایی رخ داده است: {error}" + SPONSOR_FOOTER,
+
+    "btn_cancel": "❌ لغو",
+}
+
+# One export at a time: each holds a cursor and a worker thread for its whole run
+_export_lock = asyncio.Lock()
+
+
+class ExportProgress:
+    """
+    Row counter written by the export thread and read by the progress updates.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.written = 0
+
+
+def question_row(record) -> Dict[str, Any]:
+    row = {
+        "question_id": record.question_id,
+        "question": record.text,
+        "correct_option": record.correct_option + 1 if record.correct_option is not None else None,
+        "created_by": record.created_by,
+        "is_approved": record.is_approved,
+    }
+    for i, option in enumerate(record.options or []):
+        row[f"option_{i + 1}"] = option
+    return row
+
+
+def question_json(record) -> Dict[str, Any]:
+    return {
+        "question_id": record.question_id,
+        "question": record.text,
+        "options": record.options,
+        "correct_option": record.correct_option + 1 if record.correct_option is not None else None,
+        "created_by": record.created_by,
+        "is_approved": record.is_approved,
+    }
+
+
+def user_row(record) -> Dict[str, Any]:
+    stats = record.stats or {}
+    row = {
+        "user_id": record.user_id,
+        "username": record.username,
+        "full_name": record.full_name,
+        "has_start": record.has_start,
+    }
+    for field in USER_STATS_FIELDS:
+        row[field] = stats.get(field, 0)
+    return row
+
+
+def write_export(path: str, records: Iterable[Any], export_format: str, columns: List[str],
+                 to_row: Callable[[Any], Dict[str, Any]], progress: ExportProgress) -> None:
+    """
+    Write the records to a gzip-compressed CSV or JSONL file as they stream in.
+
+    Blocking, meant for asyncio.to_thread. gzip compresses as it goes, so
+    memory use doesn't depend on the number of records.
+    """
+    with gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=config.EXPORT_COMPRESS_LEVEL) as f:
+        if export_format == "csv":
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            for record in records:
+                writer.writerow(to_row(record))
+                progress.written += 1
+        else:
+            for record in records:
+                f.write(json.dumps(to_row(record), ensure_ascii=False, default=str))
+                f.write("\n")
+                progress.written += 1
+
+
+async def run_export(message: Message, name: str, filename: str, records: Iterator[Any], export_format: str,
+                     columns: List[str], to_row: Callable[[Any], Dict[str, Any]], total: int) -> None:
+    """
+    Stream an export to a temporary file, reporting progress, and send it as a document.
+    """
+    if _export_lock.locked():
+        await message.answer(MESSAGES["export_busy"], parse_mode=ParseMode.HTML)
+        return
+
+    async with _export_lock:
+        status = await message.answer(MESSAGES["export_started"].format(name=name), parse_mode=ParseMode.HTML)
+        progress = ExportProgress(total)
+
+        fd, path = tempfile.mkstemp(suffix=f".{export_format}.gz")
+        os.close(fd)
+        try:
+            task = asyncio.create_task(asyncio.to_thread(
+                write_export, path, records, export_format, columns, to_row, progress
+            ))
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=config.EXPORT_PROGRESS_INTERVAL)
+                if done:
+                    break
+                percent = int(progress.written * 100 / total) if total else 0
+                try:
+                    await status.edit_text(
+                        MESSAGES["export_progress"].format(name=name, written=progress.written,
+                                                           total=total, percent=percent),
+                        parse_mode=ParseMode.HTML
+                    )
+                except TelegramBadRequest:
+                    pass
+            task.result()
+
+            size = os.path.getsize(path)
+            if size > config.EXPORT_MAX_FILE_SIZE:
+                await status.edit_text(
+                    MESSAGES["export_too_large"].format(size=round(size / (1024 * 1024), 1)),
+                    parse_mode=ParseMode.HTML
+                )
+                return
+
+            await message.answer_document(FSInputFile(path, filename=filename))
+            await status.edit_text(
+                MESSAGES["export_done"].format(name=name, written=progress.written),
+                parse_mode=ParseMode.HTML
+            )
+            logger.info(f"Exported {progress.written} rows of {name} ({size} bytes)")
+        except Exception as e:
+            logger.error(f"Error exporting {name}: {e}")
+            await status.edit_text(MESSAGES["error"].format(error=str(e)), parse_mode=ParseMode.HTML)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def parse_format(command: CommandObject) -> Optional[str]:
+    export_format = (command.args or "csv").strip().lower()
+    return export_format if export_format in EXPORT_FORMATS else None
+
+
+def get_topics_keyboard(export_format: str) -> Optional[InlineKeyboardMarkup]:
+
+    return topic_picker.keyboard(f"export_questions_{export_format}_", "export_questions_cancel")
+
+
+@export_data_router.message(Command("export_questions"), F.from_user.id == config.ADMIN_ID)
+async def cmd_export_questions(message: Message, command: CommandObject) -> None:
+
+    export_format = parse_format(command)
+    if not export_format:
+        await message.answer(MESSAGES["usage_questions"], parse_mode=ParseMode.HTML)
+        return
+
+    keyboard = get_topics_keyboard(export_format)
+    if not keyboard:
+        await message.answer(MESSAGES["no_topics"], parse_mode=ParseMode.HTML)
+        return
+
+    await message.answer(
+        MESSAGES["select_topic"].format(format=export_format.upper()),
+        reply_markup=keyboard,
+        parse_mode=ParseMode.HTML
+    )
+
+
+@export_data_router.callback_query(F.data == "export_questions_cancel", F.from_user.id == config.ADMIN_ID)
+async def cancel_export_questions(callback: CallbackQuery) -> None:
+
+    await callback.answer()
+    try:
+        await callback.message.delete()
+    except TelegramBadRequest:
+        logger.debug("Could not delete message, it might be too old")
+
+
+@export_data_router.callback_query(F.data.startswith("export_questions_"), F.from_user.id == config.ADMIN_ID)
+async def export_topic_questions(callback: CallbackQuery) -> None:
+
+    await callback.answer()
+    _, _, export_format, topic_id = callback.data.split("_", 3)
+
+    response = db.get_topic_by_id(topic_id)
+    if response["status"] == "error":
+        await callback.message.edit_text(MESSAGES["error"].format(error=response["message"]), parse_mode=ParseMode.HTML)
+        return
+
+    topic_name = response["topic"]["name"]
+    records = db.iter_questions_by_topic(
+        topic_id,
+        only_approved=False,
+        projection=("question_id", "text", "options", "correct_option", "created_by", "is_approved"),
+        batch_size=config.EXPORT_BATCH_SIZE
+    )
+    date = datetime.now().strftime("%Y%m%d")
+    await run_export(
+        callback.message,
+        name=topic_name,
+        filename=f"questions_{topic_id}_{date}.{export_format}.gz",
+        records=records,
+        export_format=export_format,
+        columns=QUESTION_COLUMNS,
+        to_row=question_row if export_format == "csv" else question_json,
+        total=db.count_questions_by_topic(topic_id, only_approved=False)
+    )
+
+
+@export_data_router.message(Command("export_users"), F.from_user.id == config.ADMIN_ID)
+async def cmd_export_users(message: Message, command: CommandObject) -> None:
+
+    export_format = parse_format(command)
+    if not export_format:
+        await message.answer(MESSAGES["usage_users"], parse_mode=ParseMode.HTML)
+        return
+
+    records = db.iter_users(
+        projection=("user_id", "username", "full_name", "has_start", "stats"),
+        batch_size=config.EXPORT_BATCH_SIZE
+    )
+    date = datetime.now().strftime("%Y%m%d")
+    await run_export(
+        message,
+        name="users",
+        filename=f"users_{date}.{export_format}.gz",
+        records=records,
+        export_format=export_format,
+        columns=USER_COLUMNS,
+        to_row=user_row,
+        total=db.get_count_of_users()
+    )
@@ -0,0 +1,349 @@
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, BufferedInputFile
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ParseMode
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import tempfile
+from typing import Optional, Dict, Any, Iterator, TextIO
+
+import config
+from bot import db, bot
+from db import QuestionRow
+from .start_bot import main_menu_keyboard, welcome_message
+from .topic_picker import topic_picker
+
+logger = logging.getLogger(__name__)
+
+import_questions_router = Router(name="import_questions")
+
+
+class ImportQuestionsStates(StatesGroup):
+    selecting_topic = State()
+    waiting_for_file = State()
+
+
+SPONSOR_FOOTER = f" "
+
+OPTION_COLUMNS = [f"option_{i + 1}" for i in range(config.OPTION_COUNT)]
+CSV_COLUMNS = ["question"] + OPTION_COLUMNS + ["correct_option"]
+SUPPORTED_EXTENSIONS = (".csv", ".jsonl", ".json")
+
+MESSAGES = {
+    "select_topic": "📥 لطفاً موضوعی که سوالات باید به آن اضافه شوند را انتخاب کنید:" + SPONSOR_FOOTER,
+    "no_topics": "📭 هیچ موضوعی یافت نشد. لطفاً ابتدا با استفاده از دستور /add_topic موضوع اضافه کنید." + SPONSOR_FOOTER,
+    "send_file": f"""
+📄 فایل سوالات موضوع «{{topic_name}}» را ارسال کنید (CSV، JSONL یا JSON).
+
+🔹 CSV: ستون‌های <code>{",".join(CSV_COLUMNS)}</code>
+🔹 JSONL / JSON: <code>{{{{"question": "...", "options": [...], "correct_option": 1}}}}</code>
+
+✅ شماره گزینه صحیح از ۱ شروع می‌شود.
+""" + SPONSOR_FOOTER,
+    "unsupported_file": "⚠️ فقط فایل‌های CSV، JSONL و JSON پشتیبانی می‌شوند." + SPONSOR_FOOTER,
+    "file_too_large": f"⚠️ حجم فایل نباید بیشتر از {config.IMPORT_MAX_FILE_SIZE // (1024 * 1024)} مگابایت باشد." + SPONSOR_FOOTER,
+    "only_document": "⚠️ لطفاً سوالات را به صورت فایل ارسال کنید." + SPONSOR_FOOTER,
+    "importing": "⏳ در حال بررسی و وارد کردن سوالات..." + SPONSOR_FOOTER,
+    "import_report": """
+📥 نتیجه وارد کردن سوالات به «{topic_name}»:
+
+✅ اضافه شده: {inserted}
+♻️ تکراری: {duplicates}
+❌ نامعتبر: {error_count}
+""" + SPONSOR_FOOTER,
+    "import_errors_header": "\n🔎 خطاها:\n",
+    "import_error_line": "ردیف {row}: {message}\n",
+    "import_errors_more": "... و {count} خطای دیگر (فایل گزارش را ببینید)\n",
+    "error": "❌ خطایی رخ داده است: {error}" + SPONSOR_FOOTER,
+    "error_general": "❌ خطایی رخ داده است. لطفاً بعداً دوباره امتحان کنید." + SPONSOR_FOOTER,
+
+    "btn_cancel": "❌ لغو",
+}
+
+
+def _parse_correct_option(value: Any) -> Any:
+    """
+    Convert the 1-based correct option of an import file to the 0-based index stored in the database.
+    """
+    try:
+        return int(str(value).strip()) - 1
+    except (TypeError, ValueError):
+        return None
+
+
+def _row_from_object(row_number: int, item: Any) -> QuestionRow:
+    if not isinstance(item, dict):
+        return QuestionRow(row_number, error="Row is not an object")
+
+    options = item.get("options")
+    if isinstance(options, list):
+        options = [option.strip() if isinstance(option, str) else option for option in options]
+
+    text = item.get("question")
+    return QuestionRow(
+        row_number,
+        text=text.strip() if isinstance(text, str) else text,
+        options=options,
+        correct_option=_parse_correct_option(item.get("correct_option"))
+    )
+
+
+def iter_csv_rows(f: TextIO) -> Iterator[QuestionRow]:
+    reader = csv.DictReader(f)
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        yield QuestionRow(1, error=f"Missing columns: {', '.join(missing)}")
+        return
+
+    for record in reader:
+        yield QuestionRow(
+            reader.line_num,
+            text=(record["question"] or "").strip(),
+            options=[(record[column] or "").strip() for column in OPTION_COLUMNS],
+            correct_option=_parse_correct_option(record["correct_option"])
+        )
+
+
+def iter_jsonl_rows(f: TextIO) -> Iterator[QuestionRow]:
+    for row_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield QuestionRow(row_number, error=f"Invalid JSON: {e}")
+            continue
+        yield _row_from_object(row_number, item)
+
+
+def iter_json_rows(f: TextIO, chunk_size: int = 64 * 1024) -> Iterator[QuestionRow]:
+    """
+    Stream the objects of a top-level JSON array without loading the whole file.
+
+    Rows are numbered by their position in the array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+    row_number = 0
+
+    while True:
+        while position < len(buffer) and (buffer[position].isspace() or (started and buffer[position] == ",")):
+            position += 1
+
+        need_more = position >= len(buffer)
+        if not need_more:
+            if not started:
+                if buffer[position] != "[":
+                    yield QuestionRow(1, error="File must contain a JSON array")
+                    return
+                started = True
+                position += 1
+                continue
+            if buffer[position] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A value ending exactly at the buffer's end may continue in the next chunk
+                need_more = end == len(buffer) and not eof
+            except ValueError as e:
+                if eof:
+                    yield QuestionRow(row_number + 1, error=f"Invalid JSON: {e}")
+                    return
+                need_more = True
+
+        if need_more:
+            if eof:
+                yield QuestionRow(max(row_number, 1), error="Unexpected end of file")
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        row_number += 1
+        position = end
+        yield _row_from_object(row_number, item)
+
+
+ROW_READERS = {
+    ".csv": iter_csv_rows,
+    ".jsonl": iter_jsonl_rows,
+    ".json": iter_json_rows,
+}
+
+
+def import_file(path: str, extension: str, topic_id: str, created_by: str) -> Dict[str, Any]:
+    """
+    Parse an uploaded file and import its questions; blocking, meant for asyncio.to_thread.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return db.import_questions(topic_id, ROW_READERS[extension](f), created_by=created_by)
+
+
+def format_import_report(topic_name: str, result: Dict[str, Any]) -> str:
+    text = MESSAGES["import_report"].format(
+        topic_name=topic_name,
+        inserted=result["inserted"],
+        duplicates=result["duplicates"],
+        error_count=result["error_count"]
+    )
+    if result["errors"]:
+        text += MESSAGES["import_errors_header"]
+        for row, message in result["errors"][:config.IMPORT_ERRORS_IN_MESSAGE]:
+            text += MESSAGES["import_error_line"].format(row=row, message=message)
+        remaining = result["error_count"] - config.IMPORT_ERRORS_IN_MESSAGE
+        if remaining > 0:
+            text += MESSAGES["import_errors_more"].format(count=remaining)
+    return text
+
+
+def build_error_file(result: Dict[str, Any]) -> Optional[BufferedInputFile]:
+    if result["error_count"] <= config.IMPORT_ERRORS_IN_MESSAGE:
+        return None
+    lines = [f"{row}\t{message}" for row, message in result["errors"]]
+    if result["error_count"] > len(result["errors"]):
+        lines.append(f"... {result['error_count'] - len(result['errors'])} more")
+    return BufferedInputFile("\n".join(lines).encode("utf-8"), filename="import_errors.txt")
+
+
+def get_topics_keyboard() -> Optional[InlineKeyboardMarkup]:
+
+    return topic_picker.keyboard("import_questions_topic_", "import_questions_cancel")
+
+
+def get_cancel_keyboard() -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardBuilder()
+    kb.button(text=MESSAGES["btn_cancel"], callback_data="import_questions_cancel")
+    return kb.as_markup()
+
+
+@import_questions_router.message(Command("import_questions"), F.from_user.id == config.ADMIN_ID)
+async def cmd_import_questions(message: Message, state: FSMContext) -> None:
+
+    try:
+        await state.clear()
+
+        keyboard = get_topics_keyboard()
+        if not keyboard:
+            await message.answer(MESSAGES["no_topics"], parse_mode=ParseMode.HTML)
+            return
+
+        await state.set_state(ImportQuestionsStates.selecting_topic)
+        await message.answer(MESSAGES["select_topic"], reply_markup=keyboard, parse_mode=ParseMode.HTML)
+        logger.info(f"Admin {message.from_user.id} initiated question import")
+    except Exception as e:
+        logger.error(f"Error in import_questions command: {e}")
+
+
+@import_questions_router.callback_query(F.data == "import_questions_cancel")
+async def cancel_import_questions(callback: CallbackQuery, state: FSMContext) -> None:
+
+    await callback.answer()
+    await state.clear()
+    try:
+        await callback.message.delete()
+    except TelegramBadRequest:
+        logger.debug("Could not delete message, it might be too old")
+
+    try:
+        await callback.message.answer(
+            text=welcome_message.format(full_name=callback.from_user.full_name, bot_name=config.BOT_NAME),
+            reply_markup=main_menu_keyboard,
+            parse_mode=ParseMode.MARKDOWN
+        )
+    except Exception as e:
+        logger.error(f"Error returning to main menu: {e}")
+
+
+@import_questions_router.callback_query(
+    ImportQuestionsStates.selecting_topic, F.data.startswith("import_questions_topic_")
+)
+async def topic_selected(callback: CallbackQuery, state: FSMContext) -> None:
+
+    await callback.answer()
+    topic_id = callback.data.split("_")[3]
+
+    try:
+        response = db.get_topic_by_id(topic_id)
+        if response["status"] == "error":
+            await callback.message.edit_text(
+                MESSAGES["error"].format(error=response["message"]),
+                parse_mode=ParseMode.HTML
+            )
+            await state.clear()
+            return
+
+        topic_name = response["topic"]["name"]
+        await state.update_data(topic_id=topic_id, topic_name=topic_name)
+        await state.set_state(ImportQuestionsStates.waiting_for_file)
+        await callback.message.edit_text(
+            MESSAGES["send_file"].format(topic_name=topic_name),
+            reply_markup=get_cancel_keyboard(),
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error(f"Error selecting topic for import: {e}")
+
+
+@import_questions_router.message(ImportQuestionsStates.waiting_for_file, F.document)
+async def process_import_file(message: Message, state: FSMContext) -> None:
+
+    document = message.document
+    extension = os.path.splitext(document.file_name or "")[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        await message.answer(MESSAGES["unsupported_file"], reply_markup=get_cancel_keyboard(),
+                             parse_mode=ParseMode.HTML)
+        return
+    if document.file_size and document.file_size > config.IMPORT_MAX_FILE_SIZE:
+        await message.answer(MESSAGES["file_too_large"], reply_markup=get_cancel_keyboard(),
+                             parse_mode=ParseMode.HTML)
+        return
+
+    data = await state.get_data()
+    await state.clear()
+    progress = await message.answer(MESSAGES["importing"], parse_mode=ParseMode.HTML)
+
+    fd, path = tempfile.mkstemp(suffix=extension)
+    os.close(fd)
+    try:
+        # Streamed to disk in chunks, then parsed row by row off the event loop
+        await bot.download(document, destination=path)
+        result = await asyncio.to_thread(import_file, path, extension, data["topic_id"], str(message.from_user.id))
+
+        if result["status"] == "error":
+            await progress.edit_text(MESSAGES["error"].format(error=result["message"]), parse_mode=ParseMode.HTML)
+            return
+
+        await progress.edit_text(format_import_report(data["topic_name"], result))
+        error_file = build_error_file(result)
+        if error_file:
+            await message.answer_document(error_file)
+        logger.info(f"Admin {message.from_user.id} imported {result['inserted']} questions "
+                    f"into topic {data['topic_id']} from {document.file_name}")
+    except Exception as e:
+        logger.error(f"Error importing questions: {e}")
+        await progress.edit_text(MESSAGES["error_general"], parse_mode=ParseMode.HTML)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@import_questions_router.message(ImportQuestionsStates.waiting_for_file)
+async def invalid_import_file(message: Message) -> None:
+    await message.answer(MESSAGES["only_document"], reply_markup=get_cancel_keyboard(), parse_mode=ParseMode.HTML)
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.enums import ParseMode
+from aiogram.types import InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+import config
+from bot import db
+from db import Database
+from dedup import normalize_text
+from search import search_index, SearchIndex, TopicEntry
+from utils import create_quiz_message
+
+MESSAGES = {
+    "inline_description": "{question_count} سوال • {description}",
+    "btn_prepare": "🎮 آماده‌سازی کوییز",
+}
+
+# Prefix of the placeholder button a shared quiz carries until its lobby keyboard is attached
+PREPARE_CALLBACK_PREFIX = "quiz_prepare_"
+
+
+def inline_quiz_id(inline_message_id: str) -> str:
+    """
+    Quiz ID of a shared inline message; the same message always maps to the same quiz.
+    """
+    return hashlib.blake2b(inline_message_id.encode("utf-8"), digest_size=6).hexdigest()
+
+
+class InlineResultCache:
+    """
+    Answers inline queries from prebuilt articles and cached result lists.
+
+    Each active topic has one InlineQueryResultArticle, built the first time
+    it is shown from the topic's search index entry and rebuilt once the
+    index swaps in a new entry for it (see SearchIndex._refresh). The
+    article is the same for every user: it carries a placeholder button
+    instead of a per-user quiz token, and the real lobby keyboard is attached
+    when the result is chosen (see search_quiz). That makes the answers
+    cacheable both here, per normalized query string and offset, and on
+    Telegram's side through cache_time.
+    """
+
+    def __init__(self, db: Database, index: SearchIndex, max_queries: int = config.INLINE_CACHE_SIZE,
+                 ttl: float = config.INLINE_CACHE_TTL):
+        self.index = index
+        self.max_queries = max_queries
+        self.ttl = ttl
+        # Topic ID -> (index entry the article was built from, article)
+        self._articles: Dict[str, Tuple[TopicEntry, InlineQueryResultArticle]] = {}
+        self._queries: "OrderedDict[Tuple[str, int], Tuple[List[str], Optional[int], float]]" = OrderedDict()
+        db.add_change_listener(self.handle_change)
+
+    def handle_change(self, event: str, topic_id: str, question: Optional[Dict]) -> None:
+        # Question counts are updated in the current entry, right before this listener runs
+        self._articles.pop(topic_id, None)
+        # Any change can reorder results, and changes are rare next to queries
+        self._queries.clear()
+
+    def _article(self, entry: TopicEntry) -> InlineQueryResultArticle:
+        cached = self._articles.get(entry.topic_id)
+        # A refresh swaps in a new entry after the change event already went by, so
+        # the article is only current while it was built from the same entry object
+        if cached is not None and cached[0] is entry:
+            return cached[1]
+
+        question_count = config.QUIZ_COUNT_OF_QUESTIONS_LIST[0]
+        time_limit = config.QUIZ_TIME_LIMIT_LIST[0]
+        article = InlineQueryResultArticle(
+            id=entry.topic_id,
+            title=entry.name,
+            description=MESSAGES["inline_description"].format(
+                question_count=entry.question_count, description=entry.description[:100]
+            ),
+            input_message_content=InputTextMessageContent(
+                message_text=create_quiz_message(entry.name, entry.description, question_count, time_limit),
+                parse_mode=ParseMode.HTML
+            ),
+            reply_markup=self.placeholder_keyboard(entry.topic_id)
+        )
+        self._articles[entry.topic_id] = (entry, article)
+        return article
+
+    @staticmethod
+    def placeholder_keyboard(topic_id: str) -> InlineKeyboardMarkup:
+        kb = InlineKeyboardBuilder()
+        kb.button(text=MESSAGES["btn_prepare"], callback_data=f"{PREPARE_CALLBACK_PREFIX}{topic_id}")
+        return kb.as_markup()
+
+    def answer(self, query: str, offset: int = 0) -> Tuple[List[InlineQueryResultArticle], Optional[int]]:
+        """
+        Articles for an inline query and the offset of the next page.
+        """
+        if not self.index.ready:
+            return [], None
+
+        key = (normalize_text(query), offset)
+        cached = self._queries.get(key)
+        now = time.monotonic()
+
+        if cached is not None and cached[2] > now:
+            self._queries.move_to_end(key)
+            topic_ids, next_offset, _ = cached
+        else:
+            page = self.index.search(query, offset=offset, limit=config.SEARCH_INLINE_RESULTS, prefix=True)
+            topic_ids = [result.topic_id for result in page.results]
+            next_offset = page.next_offset
+            self._queries[key] = (topic_ids, next_offset, now + self.ttl)
+            self._queries.move_to_end(key)
+            if len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+
+        articles = []
+        for topic_id in topic_ids:
+            entry = self.index.get_topic(topic_id)
+            if entry is not None:
+                articles.append(self._article(entry))
+        return articles, next_offset
+
+
+inline_results = InlineResultCache(db, search_index)
@@ -1,15 +1,17 @@
 from aiogram import Router, F
-from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
 import logging
-from html import escape
 import config
 from aiogram.fsm.storage.memory import MemoryStorage
 from bot import db, bot
-from datetime import datetime
 from aiogram.enums import ParseMode
-from utils import limit_user_requests, active_quizzes, quiz_settings, SPONSOR_FOOTER, format_participants_list, COMMON_MESSAGES
+from utils import limit_user_requests, active_quizzes, quiz_settings, SPONSOR_FOOTER, COMMON_MESSAGES, create_quiz_keyboard_for_existing
 from typing import Dict, List, Any, Optional, Union, Tuple
-from plugins.search_quiz import update_quiz_settings
+from lobby import Lobby
+from session_store import save_lobby, load_lobby, resolve_quiz_token, forget_quiz_token, QuizRef
+from render import lobby_renderer
+from question_pool import draw_quiz_questions
+from callbacks import QuizAction, QuizCallback, QuizCallbackFilter
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,7 @@ MESSAGES = {
     "creator_message": "👑 شما سازنده این کوئیز هستید و در حال حاضر در آن شرکت دارید!" + SPONSOR_FOOTER,
     "sponsor_required": "🔒 ابتدا در کانال اسپانسر عضو شوید سپس مجددا برای عضویت در کوییز تلاش",
     "invalid_quiz_data": "❌ اطلاعات کوئیز نامعتبر است",
+    "quiz_expired": "⌛ این کوئیز منقضی شده است! لطفاً یک کوئیز جدید بسازید.",
     "no_participants": "👥 هنوز شرکت‌کننده‌ای وجود ندارد",
     "other_participants": "... و {count} نفر دیگر",
     "creator_label": "{name} 👑 (سازنده)"
@@ -43,55 +46,16 @@ def get_quiz_keyboard(creator_id: Union[int, str], topic_id: str, quiz_id: str)
     time_limit = config.QUIZ_TIME_LIMIT_LIST[0]
     
     if quiz_id in active_quizzes:
-        question_count = active_quizzes[quiz_id].get("question_count", question_count)
-        time_limit = active_quizzes[quiz_id].get("time_limit", time_limit)
-        
+        question_count = active_quizzes[quiz_id].question_count
+        time_limit = active_quizzes[quiz_id].time_limit
 
-    buttons = [
-        [
-            InlineKeyboardButton(
-                text=MESSAGES["start_quiz"],
-                callback_data=f"quiz_start:{topic_id}:{creator_id}:{quiz_id}:{question_count}:{time_limit}"
-            ),
-            InlineKeyboardButton(
-                text=MESSAGES["join_quiz"],
-                callback_data=f"quiz_join:{topic_id}:{creator_id}:{quiz_id}"
-            )
-        ]
-    ]
-    
-    question_count_buttons = []
-    for count in config.QUIZ_COUNT_OF_QUESTIONS_LIST:
-        selected = "✅" if count == question_count else ""
-        button = InlineKeyboardButton(
-            text=COMMON_MESSAGES["question_count_btn"].format(count=count, selected=selected),
-            callback_data=f"quiz_qcount:{topic_id}:{creator_id}:{quiz_id}:{count}"
-        )
-        question_count_buttons.append(button)
-    
-    if question_count_buttons:
-        buttons.append(question_count_buttons)
-    
-    time_limit_buttons = []
-    for limit in config.QUIZ_TIME_LIMIT_LIST:
-        selected = "✅" if limit == time_limit else ""
-        button = InlineKeyboardButton(
-            text=COMMON_MESSAGES["time_limit_btn"].format(limit=limit, selected=selected),
-            callback_data=f"quiz_tlimit:{topic_id}:{creator_id}:{quiz_id}:{limit}"
-        )
-        time_limit_buttons.append(button)
-    
-    if time_limit_buttons:
-        buttons.append(time_limit_buttons)
-    
-    buttons.append([
-        InlineKeyboardButton(
-            text=MESSAGES["sponsor_channel"],
-            url=f"{config.SPONSOR_CHANNEL_URL}"
-        )
-    ])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
+    return create_quiz_keyboard_for_existing(
+        topic_id=topic_id,
+        user_id=creator_id,
+        quiz_id=quiz_id,
+        question_count=question_count,
+        time_limit=time_limit
+    )
 
 
 def get_topic_info(topic_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
@@ -110,87 +74,103 @@ def get_topic_info(topic_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[st
     return topic, topic_name
 
 
+def get_quiz_ref(quiz_callback: QuizCallback) -> Optional[QuizRef]:
+    """
+    Resolve the quiz a button belongs to; None if its token expired.
+
+    Buttons sent before quiz tokens carry the IDs themselves. Those are
+    client-supplied, so they are only honoured for a lobby that already
+    exists with the same topic and creator, and never open a new one.
+    """
+    if quiz_callback.token:
+        return resolve_quiz_token(quiz_callback.token)
+
+    lobby = get_lobby(quiz_callback.quiz_id)
+    if lobby is None or lobby.topic_id != quiz_callback.topic_id or lobby.creator_id != quiz_callback.creator_id:
+        return None
+    return QuizRef(
+        quiz_id=lobby.quiz_id,
+        topic_id=lobby.topic_id,
+        creator_id=lobby.creator_id,
+        topic_name=lobby.topic_name
+    )
+
+
+def get_lobby(quiz_id: str) -> Optional[Lobby]:
+    """
+    Get an active lobby, restoring it from Redis if it isn't in memory (e.g. after a restart).
+    """
+    lobby = active_quizzes.get(quiz_id)
+    if lobby is None:
+        lobby = load_lobby(quiz_id)
+        if lobby is not None:
+            active_quizzes[quiz_id] = lobby
+    return lobby
+
+
+async def begin_quiz(lobby: Lobby) -> List[Dict[str, Any]]:
+    """
+    Close a lobby for joining and draw the questions of its quiz.
+
+    The start handler calls this before the first question. Dropping the
+    token invalidates the lobby buttons, and it is also how
+    session_store.close_topic_lobbies tells a running quiz from an open one.
+    The questions avoid what the participants played recently (see
+    question_pool.draw_quiz_questions).
+    """
+    forget_quiz_token(lobby.quiz_id)
+    lobby_renderer.forget(lobby.quiz_id)
+    return await draw_quiz_questions(lobby.topic_id, lobby.question_count, list(lobby.participants))
+
+
 async def update_quiz_message(callback: CallbackQuery, quiz_id: str, topic_name: str, creator_id: Union[int, str]) -> None:
 
     try:
-        quiz_data = active_quizzes[quiz_id]
-
-        
-        question_count = quiz_data.get("question_count", config.QUIZ_COUNT_OF_QUESTIONS_LIST[0])
-        time_limit = quiz_data.get("time_limit", config.QUIZ_TIME_LIMIT_LIST[0])
-        
-        participants_count = len(quiz_data["participants"])
-        participants_list = format_participants_list(quiz_data["participants"], creator_id)
-        
-        message_text = COMMON_MESSAGES["quiz_info_with_participants"].format(
-            topic_name=escape(topic_name),
-            question_count=question_count,
-            time_limit=time_limit,
-            participant_count=participants_count,
-            participants_list=participants_list
-        )
-        
-        current_time = datetime.now().strftime("%H:%M:%S")
-        message_text += MESSAGES["last_updated"].format(update_time=current_time)
-        
-        reply_markup = get_quiz_keyboard(creator_id, quiz_data["topic_id"], quiz_id)
-        
-        try:
-            if hasattr(callback, 'message') and callback.message:
-                await callback.bot.edit_message_text(
-                    chat_id=callback.message.chat.id,
-                    message_id=callback.message.message_id,
-                    text=message_text,
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif hasattr(callback, 'inline_message_id') and callback.inline_message_id:
-                await callback.bot.edit_message_text(
-                    inline_message_id=callback.inline_message_id,
-                    text=message_text,
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif hasattr(callback, 'from_user'):
-                user_id = callback.from_user.id
-                await callback.bot.send_message(
-                    chat_id=user_id,
-                    text=message_text,
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-        except Exception as edit_error:
-            logger.error(f"Failed to update message: {edit_error}")
-            
+        if hasattr(callback, 'message') and callback.message:
+            lobby_renderer.schedule(
+                callback.bot, quiz_id,
+                chat_id=callback.message.chat.id,
+                message_id=callback.message.message_id
+            )
+        elif hasattr(callback, 'inline_message_id') and callback.inline_message_id:
+            lobby_renderer.schedule(callback.bot, quiz_id, inline_message_id=callback.inline_message_id)
+        elif hasattr(callback, 'from_user'):
+            lobby = active_quizzes[quiz_id]
+            await callback.bot.send_message(
+                chat_id=callback.from_user.id,
+                text=lobby_renderer.render_text(lobby),
+                reply_markup=lobby_renderer.render_keyboard(lobby),
+                parse_mode=ParseMode.HTML
+            )
     except Exception as e:
         logger.error(f"Error updating quiz message: {e}")
 
 
-@join_quiz_router.callback_query(F.data.startswith("quiz_join:"))
+@join_quiz_router.callback_query(QuizCallbackFilter(QuizAction.JOIN))
 @limit_user_requests(seconds=2)
-async def join_quiz(callback: CallbackQuery) -> None:
+async def join_quiz(callback: CallbackQuery, quiz_callback: QuizCallback) -> None:
 
     success_message = MESSAGES["join_success"]
     
     try:
-        data = callback.data.split(":")
-        if len(data) < 4:
-            await callback.answer(MESSAGES["invalid_quiz_data"], show_alert=True)
+        quiz_ref = get_quiz_ref(quiz_callback)
+        if quiz_ref is None:
+            await callback.answer(MESSAGES["quiz_expired"], show_alert=True)
             return
-
+        
         is_member = await check_user_membership(callback.from_user.id)
         if not is_member:
             await callback.answer(MESSAGES["sponsor_required"], show_alert=True)
             return
         
-        topic_id = data[1]
-        creator_id = int(data[2])
-        quiz_id = data[3]
+        topic_id = quiz_ref.topic_id
+        creator_id = quiz_ref.creator_id
+        quiz_id = quiz_ref.quiz_id
 
-        if quiz_id in active_quizzes:
-            if callback.from_user.id in active_quizzes[quiz_id]["participants"]:
-                await callback.answer(MESSAGES["already_joined"], show_alert=True)
-                return
+        lobby = get_lobby(quiz_id)
+        if lobby is not None and lobby.has_participant(callback.from_user.id):
+            await callback.answer(MESSAGES["already_joined"], show_alert=True)
+            return
         
         await callback.answer(success_message, show_alert=True)
         
@@ -205,27 +185,25 @@ async def join_quiz(callback: CallbackQuery) -> None:
         
         is_creator = current_user_id == creator_id
         
-        if quiz_id in active_quizzes:
+        if lobby is not None:
             if is_creator:
-                creator_info = active_quizzes[quiz_id]["participants"].get(creator_id, {})
-                if creator_info.get("full_name") == f"User {creator_id}" or creator_info.get("full_name") == "Quiz Creator":
-                    active_quizzes[quiz_id]["participants"][creator_id]["full_name"] = current_user_full_name
-                
-                await update_quiz_message(callback, quiz_id, active_quizzes[quiz_id]["topic_name"], creator_id)
-                return
+                creator = lobby.get_participant(creator_id)
+                if creator is not None and creator.full_name in (f"User {creator_id}", "Quiz Creator"):
+                    creator.full_name = current_user_full_name
+                    lobby_renderer.invalidate(quiz_id)
+                    save_lobby(lobby)
                 
-            if current_user_id in active_quizzes[quiz_id]["participants"]:
-                await update_quiz_message(callback, quiz_id, active_quizzes[quiz_id]["topic_name"], creator_id)
+                await update_quiz_message(callback, quiz_id, lobby.topic_name, creator_id)
                 return
                 
-            topic_name = active_quizzes[quiz_id]["topic_name"]
-            if not topic_name or topic_name == "Unknown Topic":
+            if not lobby.topic_name or lobby.topic_name == "Unknown Topic":
                 _, new_topic_name = get_topic_info(topic_id)
                 if new_topic_name:
-                    active_quizzes[quiz_id]["topic_name"] = new_topic_name
-                    topic_name = new_topic_name
+                    lobby.topic_name = new_topic_name
         else:
-            _, topic_name = get_topic_info(topic_id)
+            topic_name = quiz_ref.topic_name
+            if not topic_name:
+                _, topic_name = get_topic_info(topic_id)
             if topic_name is None:
                 logger.error(f"Topic {topic_id} not found when creating new quiz")
                 return
@@ -242,42 +220,41 @@ async def join_quiz(callback: CallbackQuery) -> None:
                 question_count = default_question_count
                 time_limit = default_time_limit
             
-            active_quizzes[quiz_id] = {
-                "creator_id": creator_id,
-                "topic_id": topic_id,
-                "topic_name": topic_name,
-                "creator_telegram_id": current_user_id if is_creator else creator_id,
-                "question_count": question_count,
-                "time_limit": time_limit,
-                "participants": {
-                    creator_id: {
-                        "full_name": creator_full_name,
-                        "total_correct": 0,
-                        "total_wrong": 0,
-                        "total_points": 0,
-                    }
-                }
-            }
+            lobby = Lobby(
+                quiz_id=quiz_id,
+                creator_id=creator_id,
+                topic_id=topic_id,
+                topic_name=topic_name,
+                creator_telegram_id=current_user_id if is_creator else creator_id,
+                question_count=question_count,
+                time_limit=time_limit
+            )
+            lobby.add_participant(creator_id, creator_full_name)
+            active_quizzes[quiz_id] = lobby
             
             if is_creator:
+                save_lobby(lobby)
                 await update_quiz_message(callback, quiz_id, topic_name, creator_id)
                 return
         
-        active_quizzes[quiz_id]["participants"][current_user_id] = {
-            "full_name": current_user_full_name,
-            "total_correct": 0,
-            "total_wrong": 0,
-            "total_points": 0,
-        }
+        lobby.add_participant(current_user_id, current_user_full_name)
+        save_lobby(lobby)
         
-        logger.debug(f"Added user to quiz: {active_quizzes[quiz_id]}")
+        logger.debug("Added user %s to quiz %s", current_user_id, quiz_id,
+                     extra={"user_id": current_user_id, "quiz_id": quiz_id})
         
-        await update_quiz_message(callback, quiz_id, active_quizzes[quiz_id]["topic_name"], creator_id)
+        await update_quiz_message(callback, quiz_id, lobby.topic_name, creator_id)
         
     except Exception as e:
         logger.error(f"Error in join_quiz: {e}")
 
 
+@join_quiz_router.callback_query(F.data.startswith("quiz_join:") | F.data.startswith("qj"))
+async def invalid_join_quiz(callback: CallbackQuery) -> None:
+
+    await callback.answer(MESSAGES["invalid_quiz_data"], show_alert=True)
+
+
 async def check_bot_is_admin(channel_id=config.SPONSOR_CHANNEL_ID) -> bool:
 
     try:
@@ -285,7 +262,7 @@ async def check_bot_is_admin(channel_id=config.SPONSOR_CHANNEL_ID) -> bool:
         if bot_is_admin.status in ["administrator", "creator"]:
             return True
         else:
-            logger.warning(f"Bot is not admin in channel {channel_id}")
+            logger.warning("Bot is not admin in channel %s", channel_id, extra={"channel_id": channel_id})
             return False
     except Exception as e:
         logger.error(f"Error checking bot admin status: {e}")
@@ -298,13 +275,16 @@ async def check_user_membership(user_id: int, channel_id=config.SPONSOR_CHANNEL_
         if await check_bot_is_admin(channel_id):
             user_status = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
             if user_status.status in ["member", "administrator", "creator"]:
-                logger.info(f"User {user_id} is a member of channel {channel_id}")
+                logger.info("User %s is a member of channel %s", user_id, channel_id,
+                            extra={"user_id": user_id, "channel_id": channel_id})
                 return True
             else:
-                logger.info(f"User {user_id} is NOT a member of channel {channel_id}")
+                logger.info("User %s is NOT a member of channel %s", user_id, channel_id,
+                            extra={"user_id": user_id, "channel_id": channel_id})
                 return False
         else:
-            logger.warning(f"Cannot check membership of user {user_id} because bot is not admin")
+            logger.warning("Cannot check membership of user %s because bot is not admin", user_id,
+                           extra={"user_id": user_id})
             return True
     except Exception as e:
         logger.error(f"Error checking user membership: {e}")
@@ -76,15 +76,13 @@ def calculate_user_score(user_stats: Dict[str, Any]) -> float:
 def calculate_user_rank(user_id: Union[str, int]) -> int:
 
     try:
-        all_users = db.get_all_users()
-        
         users_with_scores = []
-        for user in all_users:
-            if "stats" in user:
-                score = calculate_user_score(user["stats"])
+        for user in db.iter_users(projection=("user_id", "stats")):
+            if user.stats:
+                score = calculate_user_score(user.stats)
                 if score > 0:
                     users_with_scores.append({
-                        "user_id": user["user_id"],
+                        "user_id": user.user_id,
                         "score": score
                     })
         
@@ -104,18 +102,16 @@ def calculate_user_rank(user_id: Union[str, int]) -> int:
 def get_top_users(limit: int = 20) -> Dict[str, Any]:
 
     try:
-        all_users = db.get_all_users()
-        
         users_with_scores = []
-        for user in all_users:
-            if "stats" in user:
-                score = calculate_user_score(user["stats"])
+        for user in db.iter_users(projection=("user_id", "full_name", "stats")):
+            if user.stats:
+                score = calculate_user_score(user.stats)
                 if score > 0:
                     users_with_scores.append({
-                        "user_id": user["user_id"],
-                        "full_name": user.get("full_name", "User"),
+                        "user_id": user.user_id,
+                        "full_name": user.full_name if user.full_name is not None else "User",
                         "score": score,
-                        "stats": user["stats"]
+                        "stats": user.stats
                     })
         
         sorted_users = sorted(users_with_scores, key=lambda x: x["score"], reverse=True)
@@ -207,7 +203,7 @@ async def show_personal_stats(message: Message) -> None:
             reply_markup=get_back_keyboard(),
             parse_mode=ParseMode.HTML
         )
-        logger.info(f"User {user_id} viewed personal stats")
+        logger.info("User %s viewed personal stats", user_id, extra={"user_id": user_id})
     except Exception as e:
         logger.error(f"Error displaying personal stats: {e}")
 
@@ -260,7 +256,8 @@ async def show_global_leaderboard(message: Message) -> None:
             reply_markup=get_back_keyboard(),
             parse_mode=ParseMode.HTML
         )
-        logger.info(f"User {message.from_user.id} viewed global leaderboard")
+        logger.info("User %s viewed global leaderboard", message.from_user.id,
+                    extra={"user_id": message.from_user.id})
     except Exception as e:
         logger.error(f"Error displaying global leaderboard: {e}")
 
@@ -281,6 +278,7 @@ async def back_to_menu(callback: CallbackQuery) -> None:
             parse_mode=ParseMode.HTML
         )
         await callback.answer()
-        logger.info(f"User {callback.from_user.id} returned to main menu")
+        logger.info("User %s returned to main menu", callback.from_user.id,
+                    extra={"user_id": callback.from_user.id})
     except Exception as e:
         logger.error(f"Error returning to main menu: {e}")
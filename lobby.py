@@ -0,0 +1,127 @@
+import json
+from dataclasses import dataclass, field, fields, asdict
+from typing import Dict, List, Any, Optional, Union
+
+
+@dataclass(slots=True)
+class Participant:
+    """
+    One player of a quiz lobby and their running score.
+    """
+    user_id: int
+    full_name: str
+    total_correct: int = 0
+    total_wrong: int = 0
+    total_points: int = 0
+
+    def record_answer(self, is_correct: bool, points: int = 0) -> None:
+        if is_correct:
+            self.total_correct += 1
+            self.total_points += points
+        else:
+            self.total_wrong += 1
+
+    # Dict-style access for code that still treats participants as plain dicts
+    def __getitem__(self, key: str) -> Any:
+        if key not in PARTICIPANT_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in PARTICIPANT_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in PARTICIPANT_FIELDS else default
+
+
+PARTICIPANT_FIELDS = frozenset(f.name for f in fields(Participant))
+
+
+@dataclass(slots=True)
+class Lobby:
+    """
+    An open or running quiz and its participants.
+
+    Participants are keyed by Telegram user ID; the dict keeps join order,
+    which is also the display order.
+    """
+    quiz_id: str
+    creator_id: int
+    topic_id: str
+    topic_name: str
+    creator_telegram_id: int
+    question_count: int
+    time_limit: int
+    participants: Dict[int, Participant] = field(default_factory=dict)
+
+    def has_participant(self, user_id: Union[int, str]) -> bool:
+        return int(user_id) in self.participants
+
+    def get_participant(self, user_id: Union[int, str]) -> Optional[Participant]:
+        return self.participants.get(int(user_id))
+
+    def add_participant(self, user_id: Union[int, str], full_name: str) -> Participant:
+        """
+        Add a participant, or return the existing one if they already joined.
+        """
+        user_id = int(user_id)
+        participant = self.participants.get(user_id)
+        if participant is None:
+            participant = Participant(user_id=user_id, full_name=full_name)
+            self.participants[user_id] = participant
+        return participant
+
+    def record_answer(self, user_id: Union[int, str], is_correct: bool, points: int = 0) -> None:
+        participant = self.get_participant(user_id)
+        if participant is not None:
+            participant.record_answer(is_correct, points)
+
+    def ranking(self) -> List[Participant]:
+        """
+        Participants ordered by points, then correct answers; ties keep join order.
+        """
+        return sorted(
+            self.participants.values(),
+            key=lambda participant: (participant.total_points, participant.total_correct),
+            reverse=True
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["participants"] = [asdict(participant) for participant in self.participants.values()]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Lobby":
+        data = dict(data)
+        participants = data.pop("participants", [])
+        lobby = cls(**data)
+        for participant in participants:
+            lobby.participants[int(participant["user_id"])] = Participant(**participant)
+        return lobby
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Lobby":
+        return cls.from_dict(json.loads(payload))
+
+    # Dict-style access for code that still treats lobbies as plain dicts
+    def __getitem__(self, key: str) -> Any:
+        if key not in LOBBY_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in LOBBY_FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in LOBBY_FIELDS else default
+
+
+LOBBY_FIELDS = frozenset(f.name for f in fields(Lobby))
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import RotatingFileHandler
+from types import FrameType
+from typing import List, Optional, Tuple
+
+import config
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Project frames that wrap handlers rather than being one
+WRAPPER_MODULES = {"metrics.py", "loop_monitor.py", "db_profiler.py"}
+WRAPPER_FUNCTIONS = {"wrapper", "__call__"}
+
+loop_lag = registry.histogram(
+    "bot_event_loop_lag_seconds", "Delay of the event loop heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+loop_stalls = registry.counter(
+    "bot_event_loop_stalls", "Times the event loop was blocked longer than the threshold",
+    ("handler", "call")
+)
+
+report_logger = logging.getLogger("loop_monitor.report")
+report_logger.propagate = False
+
+
+def describe_stack(frame: Optional[FrameType]) -> Tuple[str, str]:
+    """
+    Find the handler and the blocking Database/Redis call in a stack.
+
+    Returns:
+        Tuple[str, str]: (handler, call), "unknown" where they can't be told
+    """
+    frames: List[FrameType] = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()  # outermost first
+
+    handler = "unknown"
+    call = "unknown"
+    for current in frames:
+        filename = current.f_code.co_filename
+        function = current.f_code.co_name
+        basename = os.path.basename(filename)
+
+        if call == "unknown":
+            if basename == "db.py" and filename.startswith(PROJECT_DIR):
+                call = f"Database.{function}"
+            elif f"{os.sep}redis{os.sep}" in filename:
+                call = f"redis.{function}"
+            elif f"{os.sep}pymongo{os.sep}" in filename:
+                call = f"pymongo.{function}"
+
+        if (handler == "unknown" and filename.startswith(PROJECT_DIR)
+                and basename not in WRAPPER_MODULES and function not in WRAPPER_FUNCTIONS):
+            handler = f"{basename[:-3]}.{function}"
+
+    return handler, call
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and reports what blocked the loop.
+
+    A heartbeat coroutine wakes up every `interval` seconds and records how
+    late it was. A watchdog thread checks the heartbeat; if the loop has not
+    beaten for longer than `threshold`, it samples the loop thread's stack
+    while the blocking call is still running, so the report names the
+    handler and the Database or Redis method responsible. Stalls are counted
+    in the metrics and written to a rotating report file.
+    """
+
+    def __init__(self, interval: float = config.LOOP_MONITOR_INTERVAL,
+                 threshold: float = config.LOOP_BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        if config.LOOP_MONITOR_REPORT_PATH and not report_logger.handlers:
+            handler = RotatingFileHandler(
+                config.LOOP_MONITOR_REPORT_PATH,
+                maxBytes=config.LOOP_MONITOR_REPORT_MAX_BYTES,
+                backupCount=config.LOOP_MONITOR_REPORT_BACKUPS,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            report_logger.addHandler(handler)
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (block threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _beat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            loop_lag.observe(value=max(0.0, loop.time() - expected))
+            self._last_beat = time.monotonic()
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for < self.threshold or last_beat == reported_beat:
+                continue
+
+            # Report each stall once, from inside it
+            reported_beat = last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            handler, call = describe_stack(frame)
+            loop_stalls.inc(handler, call)
+
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            logger.warning(f"Event loop blocked for {blocked_for * 1000:.0f} ms in {handler} ({call})")
+            report_logger.warning(
+                f"blocked_for_ms={blocked_for * 1000:.0f} handler={handler} call={call}\n{stack}"
+            )
+
+
+loop_monitor = LoopMonitor()
@@ -0,0 +1,293 @@
+import asyncio
+import bisect
+import logging
+import os
+import time
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from aiohttp import web
+
+import config
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Handler latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base class of the labelled metrics; values are kept per tuple of label values.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Fixed-bucket histogram; an observation is a bisect and two additions.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._values[labels] = state
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in.
+        """
+        state = self._values.get(labels)
+        if not state or not state[2]:
+            return None
+        rank = q * state[2]
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[0]):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def label_values(self) -> List[LabelValues]:
+        return list(self._values)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, metric_type: type, name: str, *args, **kwargs) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = metric_type(name, *args, **kwargs)
+            self._metrics[name] = metric
+        elif not isinstance(metric, metric_type):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HANDLER_LABELS = ("router", "handler")
+
+handler_latency = registry.histogram(
+    "bot_handler_latency_seconds", "Time spent in update handlers", HANDLER_LABELS
+)
+handler_errors = registry.counter(
+    "bot_handler_errors", "Exceptions raised by update handlers", HANDLER_LABELS
+)
+handler_in_flight = registry.gauge(
+    "bot_handler_in_flight", "Updates currently being handled", HANDLER_LABELS
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Records latency, errors and in-flight count of every handler, labelled by router and handler name.
+
+    Register it as an inner middleware on the dispatcher's observers; inner
+    middlewares of a router also run for the handlers of its sub-routers,
+    and only at that point is it known which router and handler were chosen.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        router = data.get("event_router")
+        handler_object = data.get("handler")
+        labels = (
+            router.name if router is not None else "unknown",
+            getattr(handler_object.callback, "__name__", "unknown") if handler_object is not None else "unknown",
+        )
+
+        handler_in_flight.inc(*labels)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors.inc(*labels)
+            raise
+        finally:
+            handler_latency.observe(*labels, value=time.perf_counter() - started)
+            handler_in_flight.dec(*labels)
+
+
+def setup_handler_metrics(dispatcher) -> None:
+    middleware = HandlerMetricsMiddleware()
+    dispatcher.message.middleware(middleware)
+    dispatcher.callback_query.middleware(middleware)
+    dispatcher.inline_query.middleware(middleware)
+    dispatcher.chosen_inline_result.middleware(middleware)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+def dump_metrics(path: str = config.METRICS_DUMP_PATH) -> None:
+    """
+    Write the current metrics to a file, replacing it atomically.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(temp_path, path)
+
+
+class MetricsExporter:
+    """
+    Serves /metrics over HTTP and/or dumps the metrics to a file periodically, depending on config.
+    """
+
+    def __init__(self):
+        self._runner: Optional[web.AppRunner] = None
+        self._dump_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if config.METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", _handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, config.METRICS_HOST, config.METRICS_PORT).start()
+            logger.info(f"Metrics endpoint listening on {config.METRICS_HOST}:{config.METRICS_PORT}")
+
+        if config.METRICS_DUMP_PATH:
+            self._dump_task = asyncio.create_task(self._dump_periodically())
+
+    async def stop(self) -> None:
+        if self._dump_task:
+            self._dump_task.cancel()
+            self._dump_task = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if config.METRICS_DUMP_PATH:
+            await asyncio.to_thread(dump_metrics)
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(config.METRICS_DUMP_INTERVAL)
+            try:
+                await asyncio.to_thread(dump_metrics)
+            except Exception as e:
+                logger.warning(f"Could not dump metrics: {e}")
+
+
+metrics_exporter = MetricsExporter()
@@ -0,0 +1,382 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Union
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup
+
+import config
+from utils import redis_client
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "outbound:pending"
+
+
+class Priority:
+    HIGH = 0      # admin notifications and replies users are waiting for
+    NORMAL = 1    # creator notifications and other one-off messages
+    LOW = 2       # broadcasts and other bulk traffic
+
+
+class DeliveryStatus:
+    SENT = "sent"
+    BLOCKED = "blocked"
+    FAILED = "failed"
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity` tokens.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Take one token if available.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def delay(self) -> float:
+        """
+        Seconds until a token is available, without taking it.
+        """
+        tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    @property
+    def is_full(self) -> bool:
+        elapsed = time.monotonic() - self.updated
+        return self.tokens + elapsed * self.rate >= self.capacity
+
+
+@dataclass(order=True)
+class OutboundMessage:
+    priority: int
+    seq: int
+    job_id: str = field(compare=False)
+    chat_id: Union[int, str] = field(compare=False)
+    text: str = field(compare=False)
+    parse_mode: Optional[str] = field(default=None, compare=False)
+    reply_markup: Optional[str] = field(default=None, compare=False)
+    attempts: int = field(default=0, compare=False)
+    future: Optional[asyncio.Future] = field(default=None, compare=False, repr=False)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "priority": self.priority,
+            "chat_id": self.chat_id,
+            "text": self.text,
+            "parse_mode": self.parse_mode,
+            "reply_markup": self.reply_markup,
+        })
+
+    def markup(self) -> Optional[InlineKeyboardMarkup]:
+        if not self.reply_markup:
+            return None
+        return InlineKeyboardMarkup.model_validate_json(self.reply_markup)
+
+
+class OutboundQueue:
+    """
+    Central queue for outgoing messages.
+
+    Every message passes a global token bucket and a per-chat token bucket
+    before it is handed to Telegram, so bursts are smoothed out instead of
+    ending in 429 errors. Lower priority values are sent first. When Telegram
+    still answers with `retry_after`, the whole queue pauses for that long and
+    the message is retried. Pending messages are mirrored in Redis and
+    re-queued on the next start, so a restart does not lose them. The
+    mirror is written in batches from a worker thread, so queueing and
+    delivering a message never waits on Redis.
+    """
+
+    def __init__(self,
+                 global_rate: float = config.OUTBOUND_GLOBAL_RATE,
+                 private_chat_rate: float = config.OUTBOUND_PRIVATE_CHAT_RATE,
+                 group_chat_rate: float = config.OUTBOUND_GROUP_CHAT_RATE,
+                 concurrency: int = config.OUTBOUND_CONCURRENCY,
+                 max_retries: int = config.OUTBOUND_MAX_RETRIES):
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.private_chat_rate = private_chat_rate
+        self.group_chat_rate = group_chat_rate
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+        self._bot: Optional[Bot] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._paused_until = 0.0
+        self._seq = itertools.count()
+        # Job ID -> payload to store in Redis, or None to remove it
+        self._pending_writes: Dict[str, Optional[str]] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def start(self, bot: Bot) -> None:
+        """
+        Start the delivery worker and re-queue messages left over from a previous run.
+        """
+        self._bot = bot
+        self._queue = asyncio.PriorityQueue()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._restore_pending()
+        self._worker = asyncio.create_task(self._run())
+        logger.info("Outbound message queue started")
+
+    async def stop(self) -> None:
+        """
+        Stop the worker and wait for messages that are already being sent.
+
+        Queued messages stay persisted and are delivered after the next start.
+        """
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._in_flight:
+            await asyncio.wait(self._in_flight, timeout=10)
+
+        if self._sync_task:
+            self._sync_task.cancel()
+        writes, self._pending_writes = self._pending_writes, {}
+        await asyncio.to_thread(self._write_pending, writes)
+        logger.info("Outbound message queue stopped")
+
+    @property
+    def size(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def is_idle(self) -> bool:
+        """Nothing queued and nothing being sent (messages waiting on a chat limit are not counted)."""
+        return self.size == 0 and not self._in_flight
+
+    def enqueue(self, chat_id: Union[int, str], text: str,
+                reply_markup: Optional[InlineKeyboardMarkup] = None,
+                parse_mode: Optional[str] = None,
+                priority: int = Priority.NORMAL) -> str:
+        """
+        Queue a message for delivery without waiting for it.
+
+        Args:
+            chat_id: Target chat
+            text: Message text
+            reply_markup: Optional inline keyboard
+            parse_mode: Optional parse mode
+            priority: One of the Priority lanes
+
+        Returns:
+            str: ID of the queued job
+        """
+        job = self._create_job(chat_id, text, reply_markup, parse_mode, priority)
+        self._submit(job)
+        return job.job_id
+
+    async def send(self, chat_id: Union[int, str], text: str,
+                   reply_markup: Optional[InlineKeyboardMarkup] = None,
+                   parse_mode: Optional[str] = None,
+                   priority: int = Priority.NORMAL) -> str:
+        """
+        Queue a message and wait until it was delivered or given up on.
+
+        Returns:
+            str: One of the DeliveryStatus values
+        """
+        job = self._create_job(chat_id, text, reply_markup, parse_mode, priority)
+        job.future = asyncio.get_running_loop().create_future()
+        self._submit(job)
+        return await job.future
+
+    def _create_job(self, chat_id, text, reply_markup, parse_mode, priority) -> OutboundMessage:
+        return OutboundMessage(
+            priority=priority,
+            seq=next(self._seq),
+            job_id=uuid.uuid4().hex,
+            chat_id=chat_id,
+            text=text,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup.model_dump_json(exclude_none=True) if reply_markup else None,
+        )
+
+    def _submit(self, job: OutboundMessage) -> None:
+        if self._queue is None:
+            raise RuntimeError("Outbound queue is not started")
+
+        self._persist(job.job_id, job.to_json())
+        self._queue.put_nowait(job)
+
+    def _restore_pending(self) -> None:
+        try:
+            pending = redis_client.hgetall(PENDING_KEY)
+        except Exception as e:
+            logger.warning(f"Could not restore pending outbound messages: {e}")
+            return
+
+        for job_id, payload in pending.items():
+            try:
+                data = json.loads(payload)
+                self._queue.put_nowait(OutboundMessage(
+                    priority=data["priority"],
+                    seq=next(self._seq),
+                    job_id=job_id,
+                    chat_id=data["chat_id"],
+                    text=data["text"],
+                    parse_mode=data.get("parse_mode"),
+                    reply_markup=data.get("reply_markup"),
+                ))
+            except Exception as e:
+                logger.error(f"Dropping unreadable outbound message {job_id}: {e}")
+                self._persist(job_id, None)
+
+        if pending:
+            logger.info(f"Restored {len(pending)} pending outbound messages")
+
+    def _persist(self, job_id: str, payload: Optional[str]) -> None:
+        self._pending_writes[job_id] = payload
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_pending())
+
+    async def _sync_pending(self) -> None:
+        try:
+            while self._pending_writes:
+                await asyncio.sleep(config.OUTBOUND_PERSIST_DELAY)
+                writes, self._pending_writes = self._pending_writes, {}
+                await asyncio.to_thread(self._write_pending, writes)
+        finally:
+            self._sync_task = None
+
+    @staticmethod
+    def _write_pending(writes: Dict[str, Optional[str]]) -> None:
+        """
+        Apply queued mirror updates in one pipeline; blocking, runs in a worker thread.
+        """
+        if not writes:
+            return
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for job_id, payload in writes.items():
+                if payload is None:
+                    pipe.hdel(PENDING_KEY, job_id)
+                else:
+                    pipe.hset(PENDING_KEY, job_id, payload)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not update {len(writes)} pending outbound messages: {e}")
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > config.OUTBOUND_MAX_TRACKED_CHATS:
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items() if not value.is_full
+                }
+            is_group = str(chat_id).startswith("-")
+            bucket = TokenBucket(self.group_chat_rate if is_group else self.private_chat_rate)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _requeue_later(self, job: OutboundMessage, delay: float) -> None:
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._queue.get()
+
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            # A busy chat must not hold up messages to other chats
+            chat_wait = self._chat_bucket(job.chat_id).reserve()
+            if chat_wait > 0:
+                self._requeue_later(job, chat_wait)
+                continue
+
+            global_wait = self.global_bucket.reserve()
+            while global_wait > 0:
+                await asyncio.sleep(global_wait)
+                global_wait = self.global_bucket.reserve()
+
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._deliver(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _deliver(self, job: OutboundMessage) -> None:
+        status = DeliveryStatus.FAILED
+        try:
+            await self._bot.send_message(
+                chat_id=job.chat_id,
+                text=job.text,
+                reply_markup=job.markup(),
+                parse_mode=job.parse_mode
+            )
+            status = DeliveryStatus.SENT
+        except TelegramRetryAfter as e:
+            self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+            logger.warning("Flood limit hit, pausing outbound queue for %ss", e.retry_after,
+                           extra={"retry_after": e.retry_after})
+            self._queue.put_nowait(job)
+            return
+        except TelegramForbiddenError:
+            status = DeliveryStatus.BLOCKED
+            logger.info("Chat %s blocked the bot, dropping message %s", job.chat_id, job.job_id,
+                        extra={"chat_id": job.chat_id, "job_id": job.job_id})
+        except (TelegramNetworkError, TelegramServerError) as e:
+            job.attempts += 1
+            if job.attempts <= self.max_retries:
+                logger.warning("Retrying message %s to %s (attempt %s): %s", job.job_id, job.chat_id, job.attempts, e,
+                               extra={"chat_id": job.chat_id, "job_id": job.job_id, "attempt": job.attempts})
+                self._requeue_later(job, 2 ** job.attempts)
+                return
+            logger.error(f"Giving up on message {job.job_id} to {job.chat_id}: {e}")
+        except Exception as e:
+            logger.error(f"Error sending message {job.job_id} to {job.chat_id}: {e}")
+        finally:
+            self._semaphore.release()
+
+        self._finish(job, status)
+
+    def _finish(self, job: OutboundMessage, status: str) -> None:
+        self._persist(job.job_id, None)
+
+        if job.future is not None and not job.future.done():
+            job.future.set_result(status)
+
+
+outbound_queue = OutboundQueue()
@@ -0,0 +1,337 @@
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ParseMode
+
+import config
+from bot import db
+import logging
+from html import escape
+from typing import Optional, Dict, Any, List, Tuple
+from outbound import outbound_queue
+from .start_bot import main_menu_keyboard, welcome_message
+
+logger = logging.getLogger(__name__)
+
+pending_questions_router = Router(name="pending_questions")
+
+
+class PendingQuestionsStates(StatesGroup):
+    reviewing = State()
+
+
+SPONSOR_FOOTER = f" "
+
+MESSAGES = {
+    "no_pending": "📭 هیچ سوالی در انتظار تأیید نیست." + SPONSOR_FOOTER,
+    "page_title": "📋 <b>سوالات در انتظار تأیید</b> ({total} سوال، صفحه {page})\n",
+    "question_row": """
+<b>{number}.</b> {selected} 🔖 {topic_name}
+❓ {question_text}
+🔢 {options}
+✅ گزینه صحیح: {correct_option} | 👤 {created_by}
+""",
+    "nothing_selected": "⚠️ هیچ سوالی انتخاب نشده است.",
+    "batch_done": "✅ {approved} سوال تأیید و {rejected} سوال رد شد.",
+    "error": "❌ خطایی رخ داده است: {error}" + SPONSOR_FOOTER,
+    "creator_result_title": "📬 <b>نتیجه بررسی سوالات شما:</b>\n",
+    "creator_approved_title": "\n✅ <b>تأیید و به آزمون اضافه شد:</b>\n",
+    "creator_rejected_title": "\n❌ <b>رد شد:</b>\n",
+    "creator_result_row": "• {question_text} (🔖 {topic_name})\n",
+    "creator_result_footer": "\nبا تشکر از مشارکت شما!" + SPONSOR_FOOTER,
+
+    "btn_approve_selected": "✅ تأیید انتخاب‌شده‌ها",
+    "btn_reject_selected": "❌ رد انتخاب‌شده‌ها",
+    "btn_select_all": "☑️ انتخاب همه",
+    "btn_clear_selection": "🔲 لغو انتخاب",
+    "btn_prev": "◀️ قبلی",
+    "btn_next": "بعدی ▶️",
+    "btn_close": "🔙 بستن",
+}
+
+SELECTED_MARK = "✅"
+UNSELECTED_MARK = "⬜"
+
+
+async def safe_edit_message(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> bool:
+
+    try:
+        await message.edit_text(
+            text=text,
+            reply_markup=reply_markup,
+            parse_mode=ParseMode.HTML
+        )
+        return True
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e).lower():
+            logger.debug("Message not modified, content is the same")
+            return True
+        else:
+            logger.error(f"Error editing message: {e}")
+            return False
+    except Exception as e:
+        logger.error(f"Error editing message: {e}")
+        return False
+
+
+def get_page_keyboard(question_ids: List[str], selected: List[str], has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardBuilder()
+    for number, question_id in enumerate(question_ids, 1):
+        mark = SELECTED_MARK if question_id in selected else UNSELECTED_MARK
+        kb.button(text=f"{mark} {number}", callback_data=f"pending_toggle_{question_id}")
+
+    kb.button(text=MESSAGES["btn_approve_selected"], callback_data="pending_approve")
+    kb.button(text=MESSAGES["btn_reject_selected"], callback_data="pending_reject")
+
+    if len(selected) < len(question_ids):
+        kb.button(text=MESSAGES["btn_select_all"], callback_data="pending_select_all")
+    else:
+        kb.button(text=MESSAGES["btn_clear_selection"], callback_data="pending_clear_selection")
+
+    nav_buttons = 0
+    if has_prev:
+        kb.button(text=MESSAGES["btn_prev"], callback_data="pending_page_prev")
+        nav_buttons += 1
+    if has_next:
+        kb.button(text=MESSAGES["btn_next"], callback_data="pending_page_next")
+        nav_buttons += 1
+
+    kb.button(text=MESSAGES["btn_close"], callback_data="pending_close")
+
+    sizes = [len(question_ids), 2, 1]
+    if nav_buttons:
+        sizes.append(nav_buttons)
+    sizes.append(1)
+    kb.adjust(*sizes)
+    return kb.as_markup()
+
+
+def format_page(questions: List[Dict[str, Any]], selected: List[str], page: int, total: int) -> str:
+
+    topic_names = db.get_topic_names([question["topic_id"] for question in questions])
+
+    text = MESSAGES["page_title"].format(total=total, page=page)
+    for number, question in enumerate(questions, 1):
+        text += MESSAGES["question_row"].format(
+            number=number,
+            selected=SELECTED_MARK if question["question_id"] in selected else "",
+            topic_name=escape(topic_names.get(question["topic_id"], "Unknown")),
+            question_text=escape(question["text"]),
+            options=" | ".join(escape(option) for option in question["options"]),
+            correct_option=question["correct_option"] + 1,
+            created_by=question["created_by"]
+        )
+
+    return text + SPONSOR_FOOTER
+
+
+async def render_page(message: Message, state: FSMContext, edit: bool = True) -> None:
+    """
+    Render the current page of the moderation queue.
+
+    The FSM state only holds the page cursors and the selected question IDs;
+    the questions themselves are re-read one page at a time.
+    """
+    data = await state.get_data()
+    page_starts: List[Optional[str]] = data.get("page_starts", [None])
+    selected: List[str] = data.get("selected", [])
+    page_size = config.PENDING_QUESTIONS_PAGE_SIZE
+
+    response = db.get_pending_questions(limit=page_size + 1, after_question_id=page_starts[-1])
+
+    # The page became empty (e.g. everything on it was moderated); step back if we can
+    while response["status"] == "error" and len(page_starts) > 1:
+        page_starts.pop()
+        response = db.get_pending_questions(limit=page_size + 1, after_question_id=page_starts[-1])
+
+    if response["status"] == "error":
+        await state.clear()
+        if edit:
+            await safe_edit_message(message, MESSAGES["no_pending"])
+        else:
+            await message.answer(MESSAGES["no_pending"], parse_mode=ParseMode.HTML)
+        return
+
+    questions = response["questions"][:page_size]
+    has_next = len(response["questions"]) > page_size
+    question_ids = [question["question_id"] for question in questions]
+    selected = [question_id for question_id in selected if question_id in question_ids]
+
+    await state.update_data(page_starts=page_starts, page_ids=question_ids, selected=selected)
+
+    text = format_page(questions, selected, len(page_starts), db.get_count_of_pending_questions())
+    keyboard = get_page_keyboard(question_ids, selected, len(page_starts) > 1, has_next)
+
+    if edit:
+        await safe_edit_message(message, text, keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+
+
+async def notify_creators(approved: List[Dict[str, Any]], rejected: List[Dict[str, Any]]) -> None:
+    """
+    Send each creator a single message summarising all of their moderated questions.
+    """
+    topic_names = db.get_topic_names([question["topic_id"] for question in approved + rejected])
+
+    results: Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+    for question in approved:
+        results.setdefault(question["created_by"], ([], []))[0].append(question)
+    for question in rejected:
+        results.setdefault(question["created_by"], ([], []))[1].append(question)
+
+    for user_id, (user_approved, user_rejected) in results.items():
+        text = MESSAGES["creator_result_title"]
+        for title, questions in (("creator_approved_title", user_approved), ("creator_rejected_title", user_rejected)):
+            if not questions:
+                continue
+            text += MESSAGES[title]
+            for question in questions:
+                text += MESSAGES["creator_result_row"].format(
+                    question_text=escape(question["text"]),
+                    topic_name=escape(topic_names.get(question["topic_id"], "Unknown"))
+                )
+        text += MESSAGES["creator_result_footer"]
+
+        try:
+            outbound_queue.enqueue(
+                chat_id=int(user_id),
+                text=text,
+                parse_mode=ParseMode.HTML
+            )
+            logger.info(f"Queued moderation summary to user {user_id}")
+        except Exception as e:
+            logger.error(f"Error notifying user {user_id} about moderated questions: {e}")
+
+
+@pending_questions_router.message(Command("pending_questions", "pending"), F.from_user.id == config.ADMIN_ID)
+async def cmd_pending_questions(message: Message, state: FSMContext) -> None:
+
+    try:
+        await state.clear()
+        await state.set_state(PendingQuestionsStates.reviewing)
+        await state.update_data(page_starts=[None], selected=[])
+        await render_page(message, state, edit=False)
+        logger.info(f"Admin {message.from_user.id} opened the moderation queue")
+    except Exception as e:
+        logger.error(f"Error in pending_questions command: {e}")
+
+
+@pending_questions_router.callback_query(F.data.startswith("pending_toggle_"))
+async def toggle_question(callback: CallbackQuery, state: FSMContext) -> None:
+
+    question_id = callback.data.split("_")[2]
+
+    try:
+        data = await state.get_data()
+        selected = data.get("selected", [])
+        if question_id in selected:
+            selected.remove(question_id)
+        else:
+            selected.append(question_id)
+
+        await state.update_data(selected=selected)
+        await render_page(callback.message, state)
+        await callback.answer()
+    except Exception as e:
+        logger.error(f"Error toggling pending question: {e}")
+        await callback.answer()
+
+
+@pending_questions_router.callback_query(F.data.in_({"pending_select_all", "pending_clear_selection"}))
+async def change_selection(callback: CallbackQuery, state: FSMContext) -> None:
+
+    try:
+        data = await state.get_data()
+        selected = list(data.get("page_ids", [])) if callback.data == "pending_select_all" else []
+
+        await state.update_data(selected=selected)
+        await render_page(callback.message, state)
+        await callback.answer()
+    except Exception as e:
+        logger.error(f"Error changing pending selection: {e}")
+        await callback.answer()
+
+
+@pending_questions_router.callback_query(F.data.in_({"pending_page_next", "pending_page_prev"}))
+async def change_page(callback: CallbackQuery, state: FSMContext) -> None:
+
+    try:
+        data = await state.get_data()
+        page_starts = data.get("page_starts", [None])
+        page_ids = data.get("page_ids", [])
+
+        if callback.data == "pending_page_next" and page_ids:
+            page_starts.append(page_ids[-1])
+        elif callback.data == "pending_page_prev" and len(page_starts) > 1:
+            page_starts.pop()
+
+        await state.update_data(page_starts=page_starts, selected=[])
+        await render_page(callback.message, state)
+        await callback.answer()
+    except Exception as e:
+        logger.error(f"Error changing pending questions page: {e}")
+        await callback.answer()
+
+
+@pending_questions_router.callback_query(F.data.in_({"pending_approve", "pending_reject"}))
+async def moderate_selected(callback: CallbackQuery, state: FSMContext) -> None:
+
+    is_approve = callback.data == "pending_approve"
+
+    try:
+        data = await state.get_data()
+        selected = data.get("selected", [])
+        if not selected:
+            await callback.answer(MESSAGES["nothing_selected"], show_alert=True)
+            return
+
+        if is_approve:
+            response = db.moderate_questions(approve_ids=selected)
+        else:
+            response = db.moderate_questions(reject_ids=selected)
+
+        if response["status"] == "error":
+            logger.error(f"Database error during batch moderation: {response['message']}")
+            await callback.answer(MESSAGES["error"].format(error=response["message"]), show_alert=True)
+            await state.update_data(selected=[])
+            await render_page(callback.message, state)
+            return
+
+        approved, rejected = response["approved"], response["rejected"]
+        await callback.answer(MESSAGES["batch_done"].format(approved=len(approved), rejected=len(rejected)))
+        logger.info(f"Admin {callback.from_user.id} moderated {len(approved)} approved / {len(rejected)} rejected questions")
+
+        await state.update_data(selected=[])
+        await render_page(callback.message, state)
+
+        await notify_creators(approved, rejected)
+    except Exception as e:
+        logger.error(f"Error moderating selected questions: {e}")
+        await callback.answer()
+
+
+@pending_questions_router.callback_query(F.data == "pending_close")
+async def close_pending_questions(callback: CallbackQuery, state: FSMContext) -> None:
+
+    await state.clear()
+    try:
+        await callback.message.delete()
+    except TelegramBadRequest:
+        logger.debug("Could not delete message, it might be too old")
+
+    try:
+        await callback.message.answer(
+            text=welcome_message.format(full_name=callback.from_user.full_name, bot_name=config.BOT_NAME),
+            reply_markup=main_menu_keyboard,
+            parse_mode=ParseMode.MARKDOWN
+        )
+        await callback.answer()
+        logger.info(f"Admin {callback.from_user.id} closed the moderation queue")
+    except Exception as e:
+        logger.error(f"Error returning to main menu: {e}")
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import config
+from bot import db
+from db import Database, ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+# (text, options, correct_option) - kept as tuples to keep the per-question footprint small
+CompactQuestion = Tuple[str, Tuple[str, ...], int]
+
+
+class TopicPool:
+    """
+    Approved questions of one topic, held in memory.
+    """
+
+    __slots__ = ("topic_id", "questions", "popularity", "last_used")
+
+    def __init__(self, topic_id: str, questions: Dict[str, CompactQuestion], popularity: int):
+        self.topic_id = topic_id
+        self.questions = questions
+        self.popularity = popularity
+        self.last_used = time.monotonic()
+
+
+class QuestionPoolCache:
+    """
+    Per-topic cache of approved questions so a quiz can start without a database round-trip.
+
+    Pools are loaded lazily on first use and kept in sync through the
+    Database change listener: approved questions are added, rejected or
+    deleted ones removed, and deleted topics dropped. When the total number
+    of cached questions exceeds the cap, the least popular pools
+    (stats.topic_played, then least recently used) are evicted first.
+
+    Like the other listener caches it is owned by the event loop: only the
+    database reads of load_pool run in a worker thread.
+    """
+
+    def __init__(self, db: Database, max_questions: int = config.QUESTION_POOL_MAX_QUESTIONS):
+        self.db = db
+        self.max_questions = max_questions
+        self._pools: Dict[str, TopicPool] = {}
+        self._size = 0
+        # Counts change events, so a load can tell whether it raced one
+        self._changes = 0
+        db.add_change_listener(self.handle_change)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    async def load_pool(self, topic_id: str) -> Optional[TopicPool]:
+        """
+        Get the pool of a topic, reading it from the database in a worker thread on a miss.
+
+        A pool read while a change event came in is not kept, since the
+        event had no pool to update; changes are rare next to quiz starts.
+
+        Returns:
+            Optional[TopicPool]: The pool, or None if the topic doesn't exist or changed meanwhile
+        """
+        pool = self._pools.get(topic_id)
+        if pool is None:
+            changes = self._changes
+            loaded = await asyncio.to_thread(self._read, topic_id)
+
+            pool = self._pools.get(topic_id)
+            if pool is None:
+                if loaded is None or self._changes != changes:
+                    return None
+                pool = self._install(topic_id, *loaded)
+
+        pool.last_used = time.monotonic()
+        return pool
+
+    def draw(self, pool: TopicPool, count: int, exclude: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Draw random questions from the pool of a topic.
+
+        Args:
+            pool: Pool of the topic, see load_pool
+            count: Number of questions to draw
+            exclude: Question IDs to avoid if enough others are available
+
+        Returns:
+            List[Dict[str, Any]]: Questions in the same shape as Database.sample_questions
+        """
+        if not pool.questions:
+            return []
+
+        pool.popularity += 1
+
+        excluded = set(exclude or ())
+        candidates = [question_id for question_id in pool.questions if question_id not in excluded]
+        picked = random.sample(candidates, min(count, len(candidates)))
+
+        if len(picked) < count and excluded:
+            seen = [question_id for question_id in pool.questions if question_id in excluded]
+            picked += random.sample(seen, min(count - len(picked), len(seen)))
+
+        return [self._expand(pool.topic_id, question_id, pool.questions[question_id]) for question_id in picked]
+
+    def invalidate(self, topic_id: str) -> None:
+        pool = self._pools.pop(topic_id, None)
+        if pool is not None:
+            self._size -= len(pool.questions)
+
+    def handle_change(self, event: str, topic_id: str, question: Optional[Dict[str, Any]]) -> None:
+        if event == ChangeEvent.TOPIC_CHANGED:
+            return
+        self._changes += 1
+        if event == ChangeEvent.TOPIC_DELETED:
+            self.invalidate(topic_id)
+            return
+
+        pool = self._pools.get(topic_id)
+        if pool is None:
+            return
+
+        if question is None:
+            self.invalidate(topic_id)
+        elif event == ChangeEvent.QUESTION_APPROVED and question["question_id"] not in pool.questions:
+            pool.questions[question["question_id"]] = self._compact(question)
+            self._size += 1
+            self._evict(keep=topic_id)
+        elif event == ChangeEvent.QUESTION_REMOVED and question["question_id"] in pool.questions:
+            del pool.questions[question["question_id"]]
+            self._size -= 1
+
+    def _read(self, topic_id: str) -> Optional[Tuple[Dict[str, CompactQuestion], int]]:
+        """
+        Read the approved questions and popularity of a topic; blocking, runs in a worker thread.
+        """
+        topic_response = self.db.get_topic_by_id(topic_id)
+        if topic_response["status"] != "success":
+            return None
+
+        popularity = topic_response["topic"].get("stats", {}).get("topic_played", 0)
+        questions = {
+            record.question_id: (record.text, tuple(record.options), record.correct_option)
+            for record in self.db.iter_questions_by_topic(
+                topic_id, projection=("question_id", "text", "options", "correct_option")
+            )
+        }
+        return questions, popularity
+
+    def _install(self, topic_id: str, questions: Dict[str, CompactQuestion], popularity: int) -> TopicPool:
+        pool = TopicPool(topic_id, questions, popularity)
+        self._pools[topic_id] = pool
+        self._size += len(questions)
+        self._evict(keep=topic_id)
+        logger.debug("Loaded question pool for topic %s with %s questions", topic_id, len(questions),
+                     extra={"topic_id": topic_id})
+        return pool
+
+    def _evict(self, keep: str) -> None:
+        while self._size > self.max_questions and len(self._pools) > 1:
+            victim = min(
+                (pool for pool in self._pools.values() if pool.topic_id != keep),
+                key=lambda pool: (pool.popularity, pool.last_used)
+            )
+            self.invalidate(victim.topic_id)
+            logger.debug("Evicted question pool for topic %s", victim.topic_id)
+
+    @staticmethod
+    def _compact(question: Dict[str, Any]) -> CompactQuestion:
+        return question["text"], tuple(question["options"]), question["correct_option"]
+
+    @staticmethod
+    def _expand(topic_id: str, question_id: str, question: CompactQuestion) -> Dict[str, Any]:
+        text, options, correct_option = question
+        return {
+            "question_id": question_id,
+            "topic_id": topic_id,
+            "text": text,
+            "options": list(options),
+            "correct_option": correct_option,
+        }
+
+
+async def draw_quiz_questions(topic_id: str, count: int, user_ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Pick the questions for a quiz, from the pool if possible, otherwise with server-side sampling.
+
+    Questions any of the participants played recently are avoided when
+    enough others are left, and the drawn ones are recorded as seen for all
+    of them. That history lives in the users collection, so a quiz with
+    participants costs one read before the draw and one write after it,
+    both in worker threads; a pool miss adds the read of the pool itself.
+
+    Args:
+        topic_id: ID of the topic
+        count: Number of questions
+        user_ids: Participants of the quiz
+    """
+    db = question_pools.db
+    seen = await asyncio.to_thread(db.get_recent_question_ids, user_ids, topic_id) if user_ids else set()
+
+    pool = await question_pools.load_pool(topic_id)
+    questions = question_pools.draw(pool, count, seen) if pool is not None else []
+    if not questions:
+        response = await asyncio.to_thread(db.sample_questions, topic_id, count, user_ids)
+        questions = response["questions"] if response["status"] == "success" else []
+
+    if user_ids and questions:
+        await asyncio.to_thread(
+            db.mark_questions_seen, user_ids, topic_id, [question["question_id"] for question in questions]
+        )
+    return questions
+
+
+question_pools = QuestionPoolCache(db)
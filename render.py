@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from html import escape
+from itertools import islice
+from typing import Dict, List, Any, Optional
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
+
+import config
+from lobby import Lobby
+from utils import (
+    active_quizzes,
+    COMMON_MESSAGES,
+    MAX_DISPLAYED_PARTICIPANTS,
+    format_participant_line,
+    join_participant_lines,
+    create_quiz_keyboard_for_existing,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on lobbies whose rendered participant lines are kept
+MAX_CACHED_LOBBIES = 5000
+
+
+class LobbyRenderer:
+    """
+    Renders lobby messages and folds bursts of joins into one edit per lobby.
+
+    Participants only ever join at the end, so the displayed lines of a
+    lobby are formatted once and extended as people join; only the first
+    MAX_DISPLAYED_PARTICIPANTS lines are ever formatted. Keyboards come from
+    the memoized quiz keyboard builder. When a lobby changes,
+    schedule() waits config.LOBBY_RENDER_DEBOUNCE seconds and then edits the
+    message once with the latest state, however many joins happened meanwhile.
+    """
+
+    def __init__(self, delay: float = config.LOBBY_RENDER_DEBOUNCE):
+        self.delay = delay
+        self._lines: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._targets: Dict[str, Dict[str, Any]] = {}
+
+    def participants_text(self, lobby: Lobby) -> str:
+        lines = self._lines.get(lobby.quiz_id)
+        if lines is None:
+            lines = []
+            self._lines[lobby.quiz_id] = lines
+            if len(self._lines) > MAX_CACHED_LOBBIES:
+                self._lines.popitem(last=False)
+        else:
+            self._lines.move_to_end(lobby.quiz_id)
+
+        shown = min(len(lobby.participants), MAX_DISPLAYED_PARTICIPANTS)
+        if len(lines) < shown:
+            new_participants = islice(lobby.participants.values(), len(lines), shown)
+            for position, participant in enumerate(new_participants, start=len(lines) + 1):
+                lines.append(format_participant_line(position, participant, lobby.creator_id))
+
+        return join_participant_lines(lines, len(lobby.participants))
+
+    def render_text(self, lobby: Lobby) -> str:
+        """
+        Build the HTML text of a lobby message.
+        """
+        message_text = COMMON_MESSAGES["quiz_info_with_participants"].format(
+            topic_name=escape(lobby.topic_name),
+            question_count=lobby.question_count,
+            time_limit=lobby.time_limit,
+            participant_count=len(lobby.participants),
+            participants_list=self.participants_text(lobby)
+        )
+        current_time = datetime.now().strftime("%H:%M:%S")
+        return message_text + COMMON_MESSAGES["last_updated"].format(update_time=current_time)
+
+    def render_keyboard(self, lobby: Lobby):
+        return create_quiz_keyboard_for_existing(
+            topic_id=lobby.topic_id,
+            user_id=lobby.creator_id,
+            quiz_id=lobby.quiz_id,
+            question_count=lobby.question_count,
+            time_limit=lobby.time_limit,
+            topic_name=lobby.topic_name
+        )
+
+    def invalidate(self, quiz_id: str) -> None:
+        """
+        Drop the rendered lines of a lobby, e.g. after a participant was renamed.
+        """
+        self._lines.pop(quiz_id, None)
+
+    def forget(self, quiz_id: str) -> None:
+        """
+        Drop everything held for a lobby that has started or was closed.
+        """
+        self.invalidate(quiz_id)
+        self._targets.pop(quiz_id, None)
+        task = self._pending.pop(quiz_id, None)
+        if task is not None:
+            task.cancel()
+
+    def schedule(self, bot: Bot, quiz_id: str,
+                 chat_id: Optional[int] = None,
+                 message_id: Optional[int] = None,
+                 inline_message_id: Optional[str] = None) -> None:
+        """
+        Schedule an edit of a lobby message; repeated calls within the debounce window are merged.
+
+        Args:
+            bot: Bot used for the edit
+            quiz_id: Quiz ID
+            chat_id, message_id: Target of a regular message
+            inline_message_id: Target of an inline message
+        """
+        if inline_message_id:
+            self._targets[quiz_id] = {"inline_message_id": inline_message_id}
+        else:
+            self._targets[quiz_id] = {"chat_id": chat_id, "message_id": message_id}
+
+        if quiz_id not in self._pending:
+            self._pending[quiz_id] = asyncio.create_task(self._flush_later(bot, quiz_id))
+
+    async def _flush_later(self, bot: Bot, quiz_id: str) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._pending.pop(quiz_id, None)
+
+        target = self._targets.pop(quiz_id, None)
+        lobby = active_quizzes.get(quiz_id)
+        if target is None or lobby is None:
+            return
+
+        try:
+            await bot.edit_message_text(
+                text=self.render_text(lobby),
+                reply_markup=self.render_keyboard(lobby),
+                parse_mode=ParseMode.HTML,
+                **target
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e).lower():
+                logger.error(f"Failed to update lobby message of quiz {quiz_id}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to update lobby message of quiz {quiz_id}: {e}")
+
+
+lobby_renderer = LobbyRenderer()
@@ -0,0 +1,377 @@
+import asyncio
+import bisect
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, NamedTuple, Set, Tuple
+
+import config
+from bot import db
+from db import Database, ChangeEvent
+from dedup import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Function words that would match nearly every topic
+STOPWORDS = frozenset(normalize_text(word) for word in (
+    # Persian
+    "و", "در", "به", "از", "که", "را", "با", "این", "آن", "است", "برای", "یا", "تا", "هم", "کدام", "چه",
+    # Hindi
+    "का", "की", "के", "है", "में", "और", "से", "को", "पर", "एक", "यह", "वह", "क्या", "कौन",
+    # English
+    "the", "of", "and", "in", "to", "a", "an", "is", "for", "on", "what", "which",
+))
+
+# Score factor of terms that only match the typed prefix
+PREFIX_MATCH_FACTOR = 0.7
+
+
+class SearchResult(NamedTuple):
+    topic_id: str
+    name: str
+    description: str
+    question_count: int
+    score: float
+
+
+class SearchPage(NamedTuple):
+    results: List[SearchResult]
+    total: int
+    next_offset: Optional[int]
+    # False while the index is still being built at startup
+    ready: bool = True
+
+
+class TopicEntry:
+    """
+    Indexed state of one topic: what search results show and the weight of each of its terms.
+
+    text_terms holds the weights from the name and description,
+    question_terms the number of questions containing each term; terms is
+    their combination, the weights found in the postings.
+    """
+
+    __slots__ = ("topic_id", "name", "description", "is_active", "question_count",
+                 "text_terms", "question_terms", "terms")
+
+    def __init__(self, topic_id: str, name: str, description: str, is_active: bool,
+                 question_count: int, question_terms: Counter):
+        self.topic_id = topic_id
+        self.name = name
+        self.description = description
+        self.is_active = is_active
+        self.question_count = question_count
+        self.text_terms: Dict[str, float] = {}
+        for term in tokenize(name):
+            self.text_terms[term] = self.text_terms.get(term, 0.0) + config.SEARCH_NAME_WEIGHT
+        for term in tokenize(description):
+            self.text_terms[term] = self.text_terms.get(term, 0.0) + config.SEARCH_DESCRIPTION_WEIGHT
+        self.question_terms = question_terms
+        self.terms = {term: self.weight(term) for term in set(self.text_terms) | set(question_terms)}
+
+    def weight(self, term: str) -> float:
+        count = self.question_terms.get(term, 0)
+        question_weight = config.SEARCH_QUESTION_WEIGHT * (1 + math.log(count)) if count > 0 else 0.0
+        return self.text_terms.get(term, 0.0) + question_weight
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Normalized search terms of a text (see dedup.normalize_text), without stopwords.
+    """
+    if not text:
+        return []
+    return [term for term in normalize_text(text).split() if term not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    In-process inverted index over topic names, descriptions and question texts.
+
+    Every term maps to the topics containing it, with a weight that favours
+    names over descriptions over question texts. Queries are ranked by the
+    number of query terms a topic matches, then by weight times inverse
+    document frequency. With prefix=True the last query term also matches
+    longer terms, found by bisecting the sorted term list, so inline queries
+    give results while the user is still typing.
+
+    Searching never touches the database. The index is built once in a
+    worker thread (see start); until then searches return an empty page
+    that isn't ready. Afterwards it follows the Database change listener:
+    an approved or removed question only updates the terms of that
+    question, other changes mark the topic dirty and a background task
+    re-reads it in a worker thread and swaps the new entry in.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._topics: Dict[str, TopicEntry] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+        # Topic ID -> whether its questions have to be re-read too
+        self._dirty_topics: Dict[str, bool] = {}
+        self._loading: Set[str] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._built = False
+        self._build_lock = threading.Lock()
+        db.add_change_listener(self.handle_change)
+
+    @property
+    def ready(self) -> bool:
+        return self._built
+
+    def handle_change(self, event: str, topic_id: str, question: Optional[Dict]) -> None:
+        if event == ChangeEvent.TOPIC_DELETED:
+            self._dirty_topics.pop(topic_id, None)
+            if self._built:
+                self._remove_topic(topic_id)
+            if topic_id in self._loading:
+                # Don't let a load started before the deletion bring it back
+                self._mark_dirty(topic_id, True)
+            return
+
+        entry = self._topics.get(topic_id) if self._built else None
+        if (entry is not None and question is not None and topic_id not in self._loading
+                and event in (ChangeEvent.QUESTION_APPROVED, ChangeEvent.QUESTION_REMOVED)):
+            self._apply_question(entry, question.get("text"), 1 if event == ChangeEvent.QUESTION_APPROVED else -1)
+            return
+
+        # Name, description or active flag changed (only the topic document is re-read),
+        # or questions were added in bulk (the whole topic is)
+        self._mark_dirty(topic_id, event != ChangeEvent.TOPIC_CHANGED or entry is None)
+
+    def _mark_dirty(self, topic_id: str, with_questions: bool) -> None:
+        self._dirty_topics[topic_id] = self._dirty_topics.get(topic_id, False) or with_questions
+        self._schedule_refresh()
+
+    async def start(self) -> None:
+        """
+        Build the index in a worker thread, then re-index what changed meanwhile.
+        """
+        await asyncio.to_thread(self.build)
+        self._schedule_refresh()
+
+    def build(self) -> None:
+        """
+        Index all topics; blocking, use start() from the event loop.
+        """
+        with self._build_lock:
+            if self._built:
+                return
+
+            topics = {}
+            for record in self.db.iter_topics(
+                projection=("topic_id", "name", "description", "is_active", "question_count")
+            ):
+                topics[record.topic_id] = TopicEntry(
+                    record.topic_id, record.name or "", record.description or "", record.is_active is not False,
+                    record.question_count or 0, self._load_question_terms(record.topic_id)
+                )
+
+            postings: Dict[str, Dict[str, float]] = {}
+            for entry in topics.values():
+                for term, weight in entry.terms.items():
+                    postings.setdefault(term, {})[entry.topic_id] = weight
+
+            self._topics = topics
+            self._postings = postings
+            self._terms_dirty = True
+            self._built = True
+            logger.info(f"Search index built: {len(topics)} topics, {len(postings)} terms")
+
+    def _load_question_terms(self, topic_id: str) -> Counter:
+        question_terms: Counter = Counter()
+        for record in self.db.iter_questions_by_topic(topic_id, projection=("text",)):
+            question_terms.update(set(tokenize(record.text)))
+        return question_terms
+
+    def _load_topics(self, dirty: Dict[str, bool]) -> Dict[str, Optional[Tuple[Dict, Optional[Counter]]]]:
+        """
+        Read dirty topics in a worker thread; the index itself is only changed back on the loop.
+        """
+        loaded = {}
+        for topic_id, with_questions in dirty.items():
+            response = self.db.get_topic_by_id(topic_id)
+            if response["status"] != "success":
+                loaded[topic_id] = None
+                continue
+            question_terms = self._load_question_terms(topic_id) if with_questions else None
+            loaded[topic_id] = (response["topic"], question_terms)
+        return loaded
+
+    def _schedule_refresh(self) -> None:
+        if not self._built or self._refresh_task is not None or not self._dirty_topics:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. a maintenance script): left for the next refresh
+            return
+        self._refresh_task = loop.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        try:
+            while self._dirty_topics:
+                dirty, self._dirty_topics = self._dirty_topics, {}
+                self._loading = set(dirty)
+                loaded = await asyncio.to_thread(self._load_topics, dirty)
+                self._loading = set()
+
+                for topic_id, result in loaded.items():
+                    current = self._topics.get(topic_id)
+                    self._remove_topic(topic_id)
+                    if result is None:
+                        continue
+
+                    topic, question_terms = result
+                    if question_terms is None:
+                        question_terms = current.question_terms if current is not None else Counter()
+                    self._add_topic(TopicEntry(
+                        topic_id, topic.get("name") or "", topic.get("description") or "",
+                        topic.get("is_active") is not False, topic.get("question_count") or 0, question_terms
+                    ))
+        except Exception as e:
+            logger.error(f"Error refreshing search index: {e}")
+        finally:
+            self._loading = set()
+            self._refresh_task = None
+
+    def _set_posting(self, term: str, topic_id: str, weight: float) -> None:
+        topics = self._postings.get(term)
+        if topics is None:
+            topics = self._postings[term] = {}
+            if not self._terms_dirty:
+                bisect.insort(self._sorted_terms, term)
+        topics[topic_id] = weight
+
+    def _remove_posting(self, term: str, topic_id: str) -> None:
+        topics = self._postings.get(term)
+        if topics is not None:
+            topics.pop(topic_id, None)
+            if not topics:
+                # Left in the sorted term list; _expand_prefix skips it
+                del self._postings[term]
+
+    def _add_topic(self, entry: TopicEntry) -> None:
+        self._topics[entry.topic_id] = entry
+        for term, weight in entry.terms.items():
+            self._set_posting(term, entry.topic_id, weight)
+
+    def _remove_topic(self, topic_id: str) -> None:
+        entry = self._topics.pop(topic_id, None)
+        if entry is None:
+            return
+        for term in entry.terms:
+            self._remove_posting(term, topic_id)
+
+    def _apply_question(self, entry: TopicEntry, text: Optional[str], delta: int) -> None:
+        entry.question_count = max(0, entry.question_count + delta)
+        for term in set(tokenize(text)):
+            count = entry.question_terms.get(term, 0) + delta
+            if count > 0:
+                entry.question_terms[term] = count
+            else:
+                entry.question_terms.pop(term, None)
+
+            weight = entry.weight(term)
+            if weight > 0:
+                entry.terms[term] = weight
+                self._set_posting(term, entry.topic_id, weight)
+            else:
+                entry.terms.pop(term, None)
+                self._remove_posting(term, entry.topic_id)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._terms_dirty or len(self._sorted_terms) > 2 * len(self._postings) + 1000:
+            # After the build, or once removed terms make up most of the list
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        terms = []
+        index = bisect.bisect_left(self._sorted_terms, prefix)
+        while index < len(self._sorted_terms) and len(terms) < config.SEARCH_PREFIX_EXPANSIONS:
+            term = self._sorted_terms[index]
+            if not term.startswith(prefix):
+                break
+            if term in self._postings:
+                terms.append(term)
+            index += 1
+        return terms
+
+    def get_topic(self, topic_id: str) -> Optional[TopicEntry]:
+        """
+        Indexed entry of an active topic, or None.
+        """
+        entry = self._topics.get(topic_id)
+        return entry if entry is not None and entry.is_active else None
+
+    def search(self, query: str, offset: int = 0, limit: int = config.SEARCH_PAGE_SIZE,
+               prefix: bool = False) -> SearchPage:
+        """
+        Find active topics matching a query.
+
+        Args:
+            query: Text typed by the user
+            offset: Number of results to skip
+            limit: Page size
+            prefix: Whether the last term may be an unfinished word
+
+        Returns:
+            SearchPage: The page of results, the total and the offset of the next page
+        """
+        if not self._built:
+            return SearchPage(results=[], total=0, next_offset=None, ready=False)
+
+        terms = tokenize(query)
+        active = [entry for entry in self._topics.values() if entry.is_active]
+        if not terms:
+            # Nothing to match yet (e.g. an empty inline query): the biggest topics first
+            ranked = sorted(active, key=lambda entry: entry.question_count, reverse=True)
+            scored = [(entry, 0.0) for entry in ranked]
+        else:
+            topic_count = max(len(self._topics), 1)
+            matched: Counter = Counter()
+            scores: Dict[str, float] = {}
+
+            for position, term in enumerate(terms):
+                candidates: List[Tuple[str, float]] = [(term, 1.0)]
+                if prefix and position == len(terms) - 1:
+                    candidates += [(expanded, PREFIX_MATCH_FACTOR) for expanded in self._expand_prefix(term)
+                                   if expanded != term]
+
+                best: Dict[str, float] = {}
+                for candidate, factor in candidates:
+                    topics = self._postings.get(candidate)
+                    if not topics:
+                        continue
+                    idf = math.log(1 + topic_count / len(topics))
+                    for topic_id, weight in topics.items():
+                        score = weight * idf * factor
+                        if score > best.get(topic_id, 0.0):
+                            best[topic_id] = score
+
+                for topic_id, score in best.items():
+                    matched[topic_id] += 1
+                    scores[topic_id] = scores.get(topic_id, 0.0) + score
+
+            scored = [
+                (self._topics[topic_id], score) for topic_id, score in scores.items()
+                if self._topics[topic_id].is_active
+            ]
+            scored.sort(key=lambda item: (matched[item[0].topic_id], item[1]), reverse=True)
+
+        page = scored[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(scored) else None
+        return SearchPage(
+            results=[
+                SearchResult(entry.topic_id, entry.name, entry.description, entry.question_count, round(score, 3))
+                for entry, score in page
+            ],
+            total=len(scored),
+            next_offset=next_offset
+        )
+
+
+search_index = SearchIndex(db)
@@ -0,0 +1,244 @@
+from aiogram import Bot, Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import (
+    Message, CallbackQuery, InlineQuery, ChosenInlineResult, InlineKeyboardMarkup
+)
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.enums import ParseMode
+
+import logging
+from html import escape
+
+import config
+from inline_results import inline_results, inline_quiz_id, PREPARE_CALLBACK_PREFIX
+from search import search_index, SearchPage
+from utils import create_quiz_message, create_quiz_keyboard_for_existing
+
+logger = logging.getLogger(__name__)
+
+search_quiz_router = Router(name="search_quiz")
+
+
+class SearchStates(StatesGroup):
+    waiting_for_query = State()
+
+
+SPONSOR_FOOTER = f" "
+
+MESSAGES = {
+    "enter_query": "🔍 نام یا موضوع کوییز مورد نظر را بنویسید:" + SPONSOR_FOOTER,
+    "no_results": "📭 کوییزی برای «{query}» پیدا نشد. عبارت دیگری را امتحان کنید." + SPONSOR_FOOTER,
+    "results_title": "🔍 نتایج جستجو برای «{query}» ({total} مورد)، صفحه {page} از {pages}:" + SPONSOR_FOOTER,
+    "topic_not_found": "❌ این موضوع دیگر در دسترس نیست." + SPONSOR_FOOTER,
+    "warming_up": "⏳ فهرست کوییزها در حال آماده‌سازی است. لطفاً چند لحظه دیگر دوباره جستجو کنید." + SPONSOR_FOOTER,
+    "search_expired": "⌛ این جستجو منقضی شده است. لطفاً دوباره /search را بزنید.",
+
+    "btn_result": "📚 {name} ({question_count})",
+    "btn_prev": "◀️ قبلی",
+    "btn_next": "بعدی ▶️",
+    "btn_share": "📤 ارسال کوییز به گروه",
+    "btn_back": "🔙 بازگشت به نتایج",
+}
+
+
+def get_results_keyboard(page: SearchPage, offset: int) -> InlineKeyboardMarkup:
+
+    kb = InlineKeyboardBuilder()
+    for result in page.results:
+        kb.button(
+            text=MESSAGES["btn_result"].format(name=result.name, question_count=result.question_count),
+            callback_data=f"search_topic_{result.topic_id}"
+        )
+
+    navigation = 0
+    if offset > 0:
+        kb.button(text=MESSAGES["btn_prev"], callback_data=f"search_page_{max(0, offset - config.SEARCH_PAGE_SIZE)}")
+        navigation += 1
+    if page.next_offset is not None:
+        kb.button(text=MESSAGES["btn_next"], callback_data=f"search_page_{page.next_offset}")
+        navigation += 1
+
+    kb.adjust(*([1] * len(page.results)), navigation or 1)
+    return kb.as_markup()
+
+
+def format_results_title(query: str, page: SearchPage, offset: int) -> str:
+    pages = (page.total + config.SEARCH_PAGE_SIZE - 1) // config.SEARCH_PAGE_SIZE
+    return MESSAGES["results_title"].format(
+        query=escape(query),
+        total=page.total,
+        page=offset // config.SEARCH_PAGE_SIZE + 1,
+        pages=pages
+    )
+
+
+async def show_results(message: Message, query: str, offset: int = 0, edit: bool = False) -> None:
+
+    page = search_index.search(query, offset=offset)
+    if not page.ready:
+        text, keyboard = MESSAGES["warming_up"], None
+    elif not page.results:
+        text, keyboard = MESSAGES["no_results"].format(query=escape(query)), None
+    else:
+        text, keyboard = format_results_title(query, page, offset), get_results_keyboard(page, offset)
+
+    if edit:
+        try:
+            await message.edit_text(text, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e).lower():
+                raise
+    else:
+        await message.answer(text, reply_markup=keyboard, parse_mode=ParseMode.HTML)
+
+
+@search_quiz_router.message(Command("search"))
+async def cmd_search(message: Message, command: CommandObject, state: FSMContext) -> None:
+
+    try:
+        query = (command.args or "").strip()
+        if not query:
+            await state.set_state(SearchStates.waiting_for_query)
+            await message.answer(MESSAGES["enter_query"], parse_mode=ParseMode.HTML)
+            return
+
+        await state.clear()
+        await state.update_data(search_query=query)
+        await show_results(message, query)
+        logger.info("User %s searched for %r", message.from_user.id, query, extra={"user_id": message.from_user.id})
+    except Exception as e:
+        logger.error(f"Error in search command: {e}")
+
+
+@search_quiz_router.message(SearchStates.waiting_for_query, F.text)
+async def process_search_query(message: Message, state: FSMContext) -> None:
+
+    try:
+        query = message.text.strip()
+        await state.clear()
+        await state.update_data(search_query=query)
+        await show_results(message, query)
+        logger.info("User %s searched for %r", message.from_user.id, query, extra={"user_id": message.from_user.id})
+    except Exception as e:
+        logger.error(f"Error processing search query: {e}")
+
+
+@search_quiz_router.callback_query(F.data.startswith("search_page_"))
+async def change_results_page(callback: CallbackQuery, state: FSMContext) -> None:
+
+    query = (await state.get_data()).get("search_query")
+    if not query:
+        await callback.answer(MESSAGES["search_expired"], show_alert=True)
+        return
+
+    await callback.answer()
+    try:
+        await show_results(callback.message, query, offset=int(callback.data.split("_")[2]), edit=True)
+    except Exception as e:
+        logger.error(f"Error changing search page: {e}")
+
+
+@search_quiz_router.callback_query(F.data.startswith("search_topic_"))
+async def show_search_result(callback: CallbackQuery, state: FSMContext) -> None:
+
+    await callback.answer()
+    topic_id = callback.data.split("_", 2)[2]
+
+    try:
+        entry = search_index.get_topic(topic_id)
+        if entry is None:
+            await callback.message.edit_text(MESSAGES["topic_not_found"], parse_mode=ParseMode.HTML)
+            return
+
+        kb = InlineKeyboardBuilder()
+        kb.button(text=MESSAGES["btn_share"], switch_inline_query=entry.name)
+        if (await state.get_data()).get("search_query"):
+            kb.button(text=MESSAGES["btn_back"], callback_data="search_page_0")
+        kb.adjust(1)
+
+        await callback.message.edit_text(
+            create_quiz_message(entry.name, entry.description),
+            reply_markup=kb.as_markup(),
+            parse_mode=ParseMode.HTML
+        )
+    except Exception as e:
+        logger.error(f"Error showing search result: {e}")
+
+
+async def attach_quiz_keyboard(bot: Bot, inline_message_id: str, topic_id: str, user_id: int) -> bool:
+    """
+    Replace the placeholder button of a shared quiz with its lobby keyboard.
+
+    The quiz ID is derived from the inline message, so the chosen result and
+    a press on the placeholder end up with the same quiz and token.
+    """
+    entry = search_index.get_topic(topic_id)
+    if entry is None:
+        return False
+
+    keyboard = create_quiz_keyboard_for_existing(
+        topic_id, user_id, inline_quiz_id(inline_message_id),
+        config.QUIZ_COUNT_OF_QUESTIONS_LIST[0], config.QUIZ_TIME_LIMIT_LIST[0], topic_name=entry.name
+    )
+    try:
+        await bot.edit_message_reply_markup(inline_message_id=inline_message_id, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e).lower():
+            raise
+    return True
+
+
+@search_quiz_router.inline_query()
+async def inline_search(inline_query: InlineQuery) -> None:
+
+    try:
+        offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+        articles, next_offset = inline_results.answer(inline_query.query, offset)
+        # Articles carry no per-user data, so Telegram may serve them to everyone from its cache,
+        # but not the empty answers given while the index is still being built
+        await inline_query.answer(
+            articles,
+            cache_time=config.INLINE_CACHE_TIME if search_index.ready else 0,
+            is_personal=False,
+            next_offset=str(next_offset) if next_offset is not None else ""
+        )
+    except Exception as e:
+        logger.error(f"Error answering inline query: {e}")
+
+
+@search_quiz_router.chosen_inline_result()
+async def inline_result_chosen(chosen: ChosenInlineResult) -> None:
+
+    if not chosen.inline_message_id:
+        # Only sent for results with a keyboard; without one there is nothing to attach
+        return
+
+    try:
+        await attach_quiz_keyboard(chosen.bot, chosen.inline_message_id, chosen.result_id, chosen.from_user.id)
+        logger.info("User %s shared topic %s", chosen.from_user.id, chosen.result_id,
+                    extra={"user_id": chosen.from_user.id, "topic_id": chosen.result_id})
+    except Exception as e:
+        logger.error(f"Error attaching quiz keyboard: {e}")
+
+
+@search_quiz_router.callback_query(F.data.startswith(PREPARE_CALLBACK_PREFIX))
+async def prepare_shared_quiz(callback: CallbackQuery) -> None:
+    """
+    Fallback for bots without inline feedback: the first press attaches the lobby keyboard.
+    """
+    if not callback.inline_message_id:
+        await callback.answer()
+        return
+
+    topic_id = callback.data[len(PREPARE_CALLBACK_PREFIX):]
+    try:
+        if await attach_quiz_keyboard(callback.bot, callback.inline_message_id, topic_id, callback.from_user.id):
+            await callback.answer()
+        else:
+            await callback.answer(MESSAGES["topic_not_found"], show_alert=True)
+    except Exception as e:
+        logger.error(f"Error preparing shared quiz: {e}")
+        await callback.answer()
@@ -0,0 +1,222 @@
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union, NamedTuple
+
+import config
+from lobby import Lobby
+from utils import redis_client, active_quizzes
+
+logger = logging.getLogger(__name__)
+
+LOBBY_KEY = "lobby:{quiz_id}"
+QUIZ_TOKEN_KEY = "quiz_token:{token}"
+# Tokens issued for the quizzes of a topic, so they can all be revoked when it is deleted
+TOPIC_QUIZZES_KEY = "topic_quizzes:{topic_id}"
+
+# Upper bound on tokens resolved from memory before falling back to Redis
+MAX_CACHED_TOKENS = 10000
+
+
+class QuizRef(NamedTuple):
+    """
+    What a quiz token stands for.
+    """
+    quiz_id: str
+    topic_id: str
+    creator_id: int
+    topic_name: Optional[str] = None
+
+
+_token_of_quiz: Dict[str, str] = {}
+_token_cache: "OrderedDict[str, Tuple[QuizRef, float]]" = OrderedDict()
+
+
+def save_lobby(lobby: Lobby) -> None:
+    """
+    Persist a lobby to Redis so it survives a restart.
+
+    Args:
+        lobby: Lobby to store; it expires after config.LOBBY_TTL seconds without updates
+    """
+    try:
+        pipe = redis_client.pipeline()
+        pipe.setex(LOBBY_KEY.format(quiz_id=lobby.quiz_id), config.LOBBY_TTL, lobby.to_json())
+        token = _token_of_quiz.get(lobby.quiz_id)
+        if token:
+            # Buttons of a lobby stay valid as long as the lobby itself
+            pipe.expire(QUIZ_TOKEN_KEY.format(token=token), config.LOBBY_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error saving lobby {lobby.quiz_id}: {e}")
+
+
+def load_lobby(quiz_id: str) -> Optional[Lobby]:
+    """
+    Load a lobby from Redis.
+
+    Args:
+        quiz_id: Quiz ID
+
+    Returns:
+        Optional[Lobby]: The stored lobby, or None if it doesn't exist or expired
+    """
+    try:
+        payload = redis_client.get(LOBBY_KEY.format(quiz_id=quiz_id))
+        return Lobby.from_json(payload) if payload else None
+    except Exception as e:
+        logger.error(f"Error loading lobby {quiz_id}: {e}")
+        return None
+
+
+def delete_lobby(quiz_id: str) -> None:
+    try:
+        redis_client.delete(LOBBY_KEY.format(quiz_id=quiz_id))
+    except Exception as e:
+        logger.error(f"Error deleting lobby {quiz_id}: {e}")
+
+
+def issue_quiz_token(quiz_id: str, topic_id: str, creator_id: Union[int, str],
+                     topic_name: Optional[str] = None) -> str:
+    """
+    Get the token that quiz buttons carry instead of the quiz, topic and creator IDs.
+
+    A quiz keeps its token for the lifetime of the process; the mapping is
+    stored in Redis and expires after config.LOBBY_TTL seconds without updates.
+
+    Args:
+        quiz_id: Quiz ID
+        topic_id: Topic ID
+        creator_id: Telegram ID of the quiz creator
+        topic_name: Topic name, so joins don't have to look it up
+
+    Returns:
+        str: Short opaque token
+    """
+    token = _token_of_quiz.get(quiz_id)
+    cached = _token_cache.get(token) if token else None
+    if cached is not None and (topic_name is None or cached[0].topic_name == topic_name):
+        return token
+
+    token = token or secrets.token_urlsafe(6)
+    ref = QuizRef(quiz_id=quiz_id, topic_id=topic_id, creator_id=int(creator_id), topic_name=topic_name)
+    try:
+        mapping = {"quiz_id": quiz_id, "topic_id": topic_id, "creator_id": ref.creator_id}
+        if topic_name:
+            mapping["topic_name"] = topic_name
+        pipe = redis_client.pipeline()
+        pipe.hset(QUIZ_TOKEN_KEY.format(token=token), mapping=mapping)
+        pipe.expire(QUIZ_TOKEN_KEY.format(token=token), config.LOBBY_TTL)
+        pipe.sadd(TOPIC_QUIZZES_KEY.format(topic_id=topic_id), token)
+        pipe.expire(TOPIC_QUIZZES_KEY.format(topic_id=topic_id), config.LOBBY_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error storing token of quiz {quiz_id}: {e}")
+
+    _token_of_quiz[quiz_id] = token
+    _cache_token(token, ref)
+    return token
+
+
+def resolve_quiz_token(token: str) -> Optional[QuizRef]:
+    """
+    Resolve a quiz token, from memory if possible, otherwise from Redis.
+
+    Returns:
+        Optional[QuizRef]: What the token stands for, or None if it is unknown or expired
+    """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        ref, expires_at = cached
+        if expires_at > time.monotonic():
+            _token_cache.move_to_end(token)
+            return ref
+        del _token_cache[token]
+
+    try:
+        data = redis_client.hgetall(QUIZ_TOKEN_KEY.format(token=token))
+    except Exception as e:
+        logger.error(f"Error resolving quiz token {token}: {e}")
+        return None
+    if not data:
+        return None
+
+    ref = QuizRef(
+        quiz_id=data["quiz_id"],
+        topic_id=data["topic_id"],
+        creator_id=int(data["creator_id"]),
+        topic_name=data.get("topic_name")
+    )
+    _token_of_quiz.setdefault(ref.quiz_id, token)
+    _cache_token(token, ref)
+    return ref
+
+
+def forget_quiz_token(quiz_id: str) -> None:
+    """
+    Invalidate the token of a quiz that has started or was closed.
+    """
+    token = _token_of_quiz.pop(quiz_id, None)
+    if token is None:
+        return
+    _token_cache.pop(token, None)
+    try:
+        redis_client.delete(QUIZ_TOKEN_KEY.format(token=token))
+    except Exception as e:
+        logger.error(f"Error deleting token of quiz {quiz_id}: {e}")
+
+
+def close_topic_lobbies(topic_id: str) -> int:
+    """
+    Close the quizzes of a deleted topic that haven't started yet.
+
+    Open quizzes are the ones that still have a token; join_quiz.begin_quiz
+    drops it when a quiz starts. Every token issued for the topic is listed
+    in Redis (TOPIC_QUIZZES_KEY), so this also reaches quizzes this process
+    no longer holds in memory, e.g. after a restart. Their lobbies and tokens are dropped so nobody can join or
+    start them anymore. Quizzes that already started keep running with
+    the questions they drew.
+
+    Returns:
+        int: Number of quizzes closed
+    """
+    quiz_ids = {ref.quiz_id for ref, _ in _token_cache.values() if ref.topic_id == topic_id}
+    quiz_ids.update(
+        quiz_id for quiz_id, lobby in active_quizzes.items()
+        if lobby.topic_id == topic_id and quiz_id in _token_of_quiz
+    )
+
+    stored_tokens = set()
+    try:
+        topic_key = TOPIC_QUIZZES_KEY.format(topic_id=topic_id)
+        stored_tokens = redis_client.smembers(topic_key)
+        pipe = redis_client.pipeline()
+        for token in stored_tokens:
+            pipe.hget(QUIZ_TOKEN_KEY.format(token=token), "quiz_id")
+        quiz_ids.update(quiz_id for quiz_id in pipe.execute() if quiz_id)
+
+        pipe = redis_client.pipeline()
+        for token in stored_tokens:
+            pipe.delete(QUIZ_TOKEN_KEY.format(token=token))
+        pipe.delete(topic_key)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Error closing stored quizzes of topic {topic_id}: {e}")
+
+    for token in stored_tokens:
+        _token_cache.pop(token, None)
+    for quiz_id in quiz_ids:
+        active_quizzes.pop(quiz_id, None)
+        delete_lobby(quiz_id)
+        forget_quiz_token(quiz_id)
+    return len(quiz_ids)
+
+
+def _cache_token(token: str, ref: QuizRef) -> None:
+    _token_cache[token] = (ref, time.monotonic() + config.LOBBY_TTL)
+    _token_cache.move_to_end(token)
+    while len(_token_cache) > MAX_CACHED_TOKENS:
+        evicted_token, (evicted_ref, _) = _token_cache.popitem(last=False)
+        if _token_of_quiz.get(evicted_ref.quiz_id) == evicted_token:
+            del _token_of_quiz[evicted_ref.quiz_id]
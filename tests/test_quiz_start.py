@@ -0,0 +1,75 @@
+"""
+Quiz start against the in-memory stand-ins of the benchmark harness (needs benchmarks/requirements-bench.txt).
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import harness  # noqa: E402  (must come before any bot module)
+
+from question_pool import draw_quiz_questions, question_pools  # noqa: E402
+
+db = harness.bot_module.db
+ids = harness.seed(users=3, topics=3, questions_per_topic=6, pending_questions=0, rng=random.Random(7))
+
+
+def test_draw_avoids_and_records_recent_questions():
+    topic_id = ids["topic_ids"][0]
+    players = ids["user_ids"][:2]
+
+    first = asyncio.run(draw_quiz_questions(topic_id, 3, players))
+    second = asyncio.run(draw_quiz_questions(topic_id, 3, players))
+
+    first_ids = {question["question_id"] for question in first}
+    second_ids = {question["question_id"] for question in second}
+    assert len(first_ids) == len(second_ids) == 3
+    assert not first_ids & second_ids
+    assert db.get_recent_question_ids([players[1]], topic_id) == first_ids | second_ids
+    assert db.get_recent_question_ids([ids["user_ids"][2]], topic_id) == set()
+
+
+def test_draw_tops_up_from_recent_questions():
+    topic_id = ids["topic_ids"][1]
+    player = ids["user_ids"][2]
+
+    asyncio.run(draw_quiz_questions(topic_id, 5, [player]))
+    questions = asyncio.run(draw_quiz_questions(topic_id, 4, [player]))
+
+    assert len({question["question_id"] for question in questions}) == 4
+
+
+def test_pool_follows_removed_questions():
+    topic_id = ids["topic_ids"][0]
+    pool = asyncio.run(question_pools.load_pool(topic_id))
+    question_id = next(iter(pool.questions))
+
+    db.reject_question(question_id)
+
+    assert question_id not in pool.questions
+    drawn = asyncio.run(draw_quiz_questions(topic_id, 10))
+    assert question_id not in {question["question_id"] for question in drawn}
+
+
+def test_sample_questions_skips_recent_questions():
+    topic_id = ids["topic_ids"][2]
+    player = ids["user_ids"][0]
+    recent = [question["question_id"] for question in db.sample_questions(topic_id, 4)["questions"]]
+    db.mark_questions_seen([player], topic_id, recent)
+
+    response = db.sample_questions(topic_id, 2, [player])
+    assert response["status"] == "success"
+    assert not {question["question_id"] for question in response["questions"]} & set(recent)
+
+    response = db.sample_questions(topic_id, 6, [player])
+    assert len({question["question_id"] for question in response["questions"]}) == 6
+
+
+def test_sample_questions_ignores_deleted_topics():
+    db.topics.update_one({"topic_id": ids["topic_ids"][2]}, {"$set": {"is_deleted": True}})
+    try:
+        assert db.sample_questions(ids["topic_ids"][2], 1)["status"] == "error"
+    finally:
+        db.topics.update_one({"topic_id": ids["topic_ids"][2]}, {"$unset": {"is_deleted": ""}})
@@ -0,0 +1,172 @@
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram.exceptions import TelegramBadRequest
+
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import config
+from bot import db
+from db import Database, ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+topic_picker_router = Router(name="topic_picker")
+
+MESSAGES = {
+    "page_expired": "⌛ این فهرست دیگر معتبر نیست. لطفاً دستور را دوباره اجرا کنید.",
+
+    "btn_prev": "◀️ قبلی",
+    "btn_next": "بعدی ▶️",
+    "btn_cancel": "❌ لغو",
+}
+
+PAGE_CALLBACK_PREFIX = "topics_page_"
+
+
+class PickerView(NamedTuple):
+    """One page of a topic picker: which topics it lists and where the page starts."""
+    select_prefix: str
+    cancel_data: str
+    only_active: bool
+    name_filter: Optional[str]
+    anchor: Optional[Tuple[str, str]]
+    direction: str
+
+
+class TopicPicker:
+    """
+    Paginated topic keyboards shared by the admin and user topic selections.
+
+    Each page reads only its own topics with keyset pagination on
+    (name, topic_id) (see Database.get_topics_page). Page buttons carry a
+    short token of the page they lead to instead of the page itself, which
+    wouldn't fit in callback data. Rendered pages are cached per token,
+    together with the views their page buttons lead to, and dropped
+    whenever a topic is created, renamed, toggled or deleted.
+    """
+
+    def __init__(self, db: Database, page_size: int = config.TOPIC_PICKER_PAGE_SIZE,
+                 max_views: int = config.TOPIC_PICKER_MAX_VIEWS):
+        self.db = db
+        self.page_size = page_size
+        self.max_views = max_views
+        self._views: "OrderedDict[str, PickerView]" = OrderedDict()
+        # Token -> (keyboard, views of its page buttons)
+        self._pages: Dict[str, Tuple[Optional[InlineKeyboardMarkup], Tuple[PickerView, ...]]] = {}
+        db.add_change_listener(self.handle_change)
+
+    def handle_change(self, event: str, topic_id: str, question: Optional[Dict]) -> None:
+        if event in (ChangeEvent.TOPIC_CHANGED, ChangeEvent.TOPIC_DELETED):
+            self._pages.clear()
+
+    def keyboard(self, select_prefix: str, cancel_data: str, only_active: bool = False,
+                 name_filter: Optional[str] = None) -> Optional[InlineKeyboardMarkup]:
+        """
+        First page of a topic picker.
+
+        Args:
+            select_prefix: Callback data of a topic button, followed by the topic ID
+            cancel_data: Callback data of the cancel button
+            only_active: Skip deactivated topics
+            name_filter: Only list topics whose name contains this text
+
+        Returns:
+            Optional[InlineKeyboardMarkup]: The keyboard, or None if no topic matches
+        """
+        return self._render(PickerView(select_prefix, cancel_data, only_active, name_filter or None, None, "next"))
+
+    def page(self, token: str) -> Optional[InlineKeyboardMarkup]:
+        """
+        Page a page button leads to, or None if the token expired or no topic is left.
+        """
+        view = self._views.get(token)
+        return self._render(view) if view is not None else None
+
+    def _remember(self, view: PickerView) -> str:
+        token = hashlib.blake2b(repr(view).encode("utf-8"), digest_size=6).hexdigest()
+        self._views[token] = view
+        self._views.move_to_end(token)
+        while len(self._views) > self.max_views:
+            expired, _ = self._views.popitem(last=False)
+            self._pages.pop(expired, None)
+        return token
+
+    def _render(self, view: PickerView) -> Optional[InlineKeyboardMarkup]:
+        token = self._remember(view)
+        cached = self._pages.get(token)
+        if cached is not None:
+            markup, neighbours = cached
+            # Keep the views behind its buttons as fresh as the page, or they'd expire under it
+            for neighbour in neighbours:
+                self._remember(neighbour)
+            return markup
+
+        topics = self.db.get_topics_page(self.page_size + 1, view.anchor, view.direction,
+                                         view.only_active, view.name_filter)
+        has_more = len(topics) > self.page_size
+        if has_more:
+            topics = topics[1:] if view.direction == "prev" else topics[:self.page_size]
+
+        if not topics and view.anchor is not None:
+            # Everything past the anchor was deleted meanwhile
+            return self._render(view._replace(anchor=None, direction="next"))
+
+        markup = None
+        neighbours = []
+        if topics:
+            has_prev = has_more if view.direction == "prev" else view.anchor is not None
+            has_next = has_more if view.direction == "next" else view.anchor is not None
+
+            kb = InlineKeyboardBuilder()
+            for topic in topics:
+                kb.button(text=topic.name, callback_data=f"{view.select_prefix}{topic.topic_id}")
+            kb.adjust(2)
+
+            navigation = []
+            if has_prev:
+                first = topics[0]
+                neighbours.append(view._replace(anchor=(first.name, first.topic_id), direction="prev"))
+                prev_token = self._remember(neighbours[-1])
+                navigation.append(InlineKeyboardButton(
+                    text=MESSAGES["btn_prev"], callback_data=f"{PAGE_CALLBACK_PREFIX}{prev_token}"
+                ))
+            if has_next:
+                last = topics[-1]
+                neighbours.append(view._replace(anchor=(last.name, last.topic_id), direction="next"))
+                next_token = self._remember(neighbours[-1])
+                navigation.append(InlineKeyboardButton(
+                    text=MESSAGES["btn_next"], callback_data=f"{PAGE_CALLBACK_PREFIX}{next_token}"
+                ))
+            if navigation:
+                kb.row(*navigation)
+
+            kb.row(InlineKeyboardButton(text=MESSAGES["btn_cancel"], callback_data=view.cancel_data))
+            markup = kb.as_markup()
+
+        self._pages[token] = (markup, tuple(neighbours))
+        return markup
+
+
+topic_picker = TopicPicker(db)
+
+
+@topic_picker_router.callback_query(F.data.startswith(PAGE_CALLBACK_PREFIX))
+async def change_topics_page(callback: CallbackQuery) -> None:
+
+    try:
+        keyboard = topic_picker.page(callback.data[len(PAGE_CALLBACK_PREFIX):])
+        if keyboard is None:
+            await callback.answer(MESSAGES["page_expired"], show_alert=True)
+            return
+
+        await callback.answer()
+        await callback.message.edit_reply_markup(reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e).lower():
+            logger.error(f"Error changing topics page: {e}")
+    except Exception as e:
+        logger.error(f"Error changing topics page: {e}")
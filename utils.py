@@ -1,15 +1,18 @@
 
 import logging
-from functools import wraps
+from functools import wraps, lru_cache
 from html import escape
 from datetime import datetime
-from typing import Callable, Any, Union, Dict, List, Optional
+from itertools import islice
+from typing import Callable, Any, Union, Dict, List, Optional, Tuple
 
 import redis
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.enums import ParseMode
 
 import config
+from callbacks import QuizAction, encode_quiz_callback
+from lobby import Lobby, Participant
 
 logger = logging.getLogger(__name__)
 
@@ -47,14 +50,15 @@ def limit_user_requests(seconds: int = 1):
                 redis_client.setex(name=rate_limit_key, value=1, time=seconds)
                 return await func(event, *args, **kwargs)
             else:
-                logger.info(f"User {user_id} is rate limited for function {func.__name__}")
+                logger.info("User %s is rate limited for function %s", user_id, func.__name__,
+                            extra={"user_id": user_id, "function": func.__name__})
                 return None
 
         return wrapper
     return decorator
 
 
-active_quizzes = {}
+active_quizzes: Dict[str, Lobby] = {}
 
 quiz_settings = {}
 
@@ -90,13 +94,15 @@ NO_PARTICIPANTS_MESSAGE = "هنوز شرکت‌کننده‌ای وجود ندا
 ADDITIONAL_PARTICIPANTS_MESSAGE = "\n... و {} نفر دیگر"
 
 SELECTED_INDICATOR = "✅"
+# Stands for the quiz token in the cached keyboard layouts; can't appear in a real token
+TOKEN_PLACEHOLDER = "{token}"
 
 
 class ButtonType:
-    START = "quiz_start"
-    JOIN = "quiz_join"
-    QUESTION_COUNT = "quiz_qcount"
-    TIME_LIMIT = "quiz_tlimit"
+    START = QuizAction.START
+    JOIN = QuizAction.JOIN
+    QUESTION_COUNT = QuizAction.QUESTION_COUNT
+    TIME_LIMIT = QuizAction.TIME_LIMIT
 
 
 def create_button_row(text1: str, callback_data1: str, text2: str, callback_data2: str) -> List[InlineKeyboardButton]:
@@ -107,23 +113,32 @@ def create_button_row(text1: str, callback_data1: str, text2: str, callback_data
     ]
 
 
+@lru_cache(maxsize=64)
+def option_button_texts(
+    values: Tuple[int, ...],
+    selected_value: int,
+    format_func: Callable[[int, bool], str]
+) -> Tuple[str, ...]:
+    """Button texts of an option row; there are only a handful of distinct selections"""
+    return tuple(format_func(value, value == selected_value) for value in values)
+
+
 def create_option_buttons(
     values: List[int], 
     prefix: str, 
-    topic_id: str, 
-    user_id: Union[int, str], 
-    quiz_id: str, 
+    token: str, 
     selected_value: int,
     format_func: Callable[[int, bool], str]
 ) -> List[InlineKeyboardButton]:
     """Helper function to create option buttons with selected indicator"""
-    buttons = []
-    for value in values:
-        is_selected = value == selected_value
-        text = format_func(value, is_selected)
-        callback_data = f"{prefix}:{topic_id}:{user_id}:{quiz_id}:{value}"
-        buttons.append(InlineKeyboardButton(text=text, callback_data=callback_data))
-    return buttons
+    texts = option_button_texts(tuple(values), selected_value, format_func)
+    return [
+        InlineKeyboardButton(
+            text=text,
+            callback_data=encode_quiz_callback(prefix, token, question_count=value, time_limit=value)
+        )
+        for value, text in zip(values, texts)
+    ]
 
 
 def format_count_button(count: int, is_selected: bool) -> str:
@@ -138,41 +153,43 @@ def format_time_button(seconds: int, is_selected: bool) -> str:
     return f"{seconds} ثانیه {indicator}".strip()
 
 
-def format_participants_list(participants: Dict[Union[int, str], Dict[str, Any]], creator_id: Union[int, str]) -> str:
+def format_participant_line(position: int, participant: Participant, creator_id: int) -> str:
+    """Format one numbered, HTML-escaped line of the participant list"""
+    name = escape(participant.full_name or f"کاربر {participant.user_id}")
+    if participant.user_id == creator_id:
+        name = f"{name} {CREATOR_ICON} {CREATOR_SUFFIX}"
+    return f"{position}. {name}"
+
+
+def join_participant_lines(lines: List[str], participant_count: int) -> str:
+    """Join formatted participant lines and append the count of those not shown"""
+    if not lines:
+        return NO_PARTICIPANTS_MESSAGE
+    
+    text = '\n'.join(lines)
+    remaining_count = participant_count - MAX_DISPLAYED_PARTICIPANTS
+    if remaining_count > 0:
+        text += ADDITIONAL_PARTICIPANTS_MESSAGE.format(remaining_count)
+    return text
+
+
+def format_participants_list(lobby: Lobby) -> str:
     """
-    Format a list of participants for display in a message.
+    Format the participants of a lobby for display in a message, in join order.
     
     Args:
-        participants: Dictionary of participant data keyed by user ID
-        creator_id: ID of the quiz creator
+        lobby: Quiz lobby
         
     Returns:
         str: Formatted text with participant list
     """
-    if not participants:
-        return NO_PARTICIPANTS_MESSAGE
-        
-    creator_id = int(creator_id) if isinstance(creator_id, str) else creator_id
-    
-    formatted_entries = []
-    for user_id, user_data in participants.items():
-        user_id = int(user_id) if isinstance(user_id, str) else user_id
-        
-        name = user_data.get('full_name', '')
-        if not name:
-            name = f"کاربر {user_id}"
-            
-        if user_id == creator_id:
-            formatted_entries.append(f"{name} {CREATOR_ICON} {CREATOR_SUFFIX}")
-        else:
-            formatted_entries.append(name)
-    
-    if len(formatted_entries) <= MAX_DISPLAYED_PARTICIPANTS:
-        return '\n'.join(f"{i+1}. {entry}" for i, entry in enumerate(formatted_entries))
-    else:
-        visible_entries = [f"{i+1}. {entry}" for i, entry in enumerate(formatted_entries[:MAX_DISPLAYED_PARTICIPANTS])]
-        remaining_count = len(formatted_entries) - MAX_DISPLAYED_PARTICIPANTS
-        return '\n'.join(visible_entries) + ADDITIONAL_PARTICIPANTS_MESSAGE.format(remaining_count)
+    lines = [
+        format_participant_line(position, participant, lobby.creator_id)
+        for position, participant in enumerate(
+            islice(lobby.participants.values(), MAX_DISPLAYED_PARTICIPANTS), start=1
+        )
+    ]
+    return join_participant_lines(lines, len(lobby.participants))
 
 
 QUIZ_INFO_TEMPLATE = """
@@ -225,25 +242,58 @@ def create_quiz_keyboard_for_existing(
     user_id: Union[int, str], 
     quiz_id: str, 
     question_count: int, 
-    time_limit: int
+    time_limit: int,
+    topic_name: Optional[str] = None
 ) -> InlineKeyboardMarkup:
     """
     Create quiz keyboard for an existing quiz with selected options.
     
+    The buttons carry only the quiz token, not the IDs.
+    
     Args:
         topic_id: Topic ID
         user_id: User ID
         quiz_id: Quiz ID
         question_count: Selected question count
         time_limit: Selected time limit
+        topic_name: Topic name to remember with the token, if known
         
     Returns:
         InlineKeyboardMarkup: Updated keyboard
     """
+    from session_store import issue_quiz_token  # Lazy import to avoid circular imports
+    
+    token = issue_quiz_token(quiz_id, topic_id, user_id, topic_name)
+    return build_quiz_keyboard(token, question_count, time_limit)
+
+
+def build_quiz_keyboard(token: str, question_count: int, time_limit: int) -> InlineKeyboardMarkup:
+    """
+    Build the lobby keyboard of a quiz token from the layout of its selection.
+    """
+    layout = quiz_keyboard_layout(question_count, time_limit)
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            button.model_copy(update={"callback_data": button.callback_data.replace(TOKEN_PLACEHOLDER, token)})
+            if button.callback_data else button
+            for button in row
+        ]
+        for row in layout.inline_keyboard
+    ])
+
+
+@lru_cache(maxsize=config.QUIZ_KEYBOARD_CACHE_SIZE)
+def quiz_keyboard_layout(question_count: int, time_limit: int) -> InlineKeyboardMarkup:
+    """
+    Lobby keyboard of a selection with TOKEN_PLACEHOLDER in place of the token; shared, must not be modified.
+    """
+    token = TOKEN_PLACEHOLDER
     buttons = []
     
-    start_data = f"{ButtonType.START}:{topic_id}:{user_id}:{quiz_id}:{question_count}:{time_limit}"
-    join_data = f"{ButtonType.JOIN}:{topic_id}:{user_id}:{quiz_id}"
+    start_data = encode_quiz_callback(
+        ButtonType.START, token, question_count=question_count, time_limit=time_limit
+    )
+    join_data = encode_quiz_callback(ButtonType.JOIN, token)
     buttons.append(create_button_row(
         COMMON_MESSAGES["start_quiz"], start_data,
         COMMON_MESSAGES["join_quiz"], join_data
@@ -253,7 +303,7 @@ def create_quiz_keyboard_for_existing(
         count_buttons = create_option_buttons(
             config.QUIZ_COUNT_OF_QUESTIONS_LIST,
             ButtonType.QUESTION_COUNT,
-            topic_id, user_id, quiz_id,
+            token,
             question_count,
             format_count_button
         )
@@ -263,7 +313,7 @@ def create_quiz_keyboard_for_existing(
         time_buttons = create_option_buttons(
             config.QUIZ_TIME_LIMIT_LIST,
             ButtonType.TIME_LIMIT,
-            topic_id, user_id, quiz_id,
+            token,
             time_limit,
             format_time_button
         )
@@ -323,8 +373,9 @@ def get_message_for_active_quiz(
     Returns:
         str: Formatted message with participants list
     """
-    participants_count = len(active_quizzes[quiz_id]["participants"])
-    participants_list = format_participants_list(active_quizzes[quiz_id]["participants"], user_id)
+    lobby = active_quizzes[quiz_id]
+    participants_count = len(lobby.participants)
+    participants_list = format_participants_list(lobby)
     
     message_text = COMMON_MESSAGES["quiz_info_with_participants"].format(
         topic_name=escape(topic_name),
@@ -374,8 +425,11 @@ async def update_quiz_settings(
         }
         
         if quiz_id in active_quizzes:
-            active_quizzes[quiz_id]["question_count"] = question_count
-            active_quizzes[quiz_id]["time_limit"] = time_limit
+            active_quizzes[quiz_id].question_count = question_count
+            active_quizzes[quiz_id].time_limit = time_limit
+            # session_store depends on this module for the Redis client
+            from session_store import save_lobby
+            save_lobby(active_quizzes[quiz_id])
             
             message_text = get_message_for_active_quiz(
                 quiz_id, user_id, topic_name, question_count, time_limit
@@ -393,7 +447,8 @@ async def update_quiz_settings(
             user_id=user_id,
             quiz_id=quiz_id,
             question_count=question_count,
-            time_limit=time_limit
+            time_limit=time_limit,
+            topic_name=topic_name
         )
         
         if not hasattr(callback, 'inline_message_id') or not callback.inline_message_id: